@@ -1,7 +1,7 @@
 import os
 
 from app import create_app
-from app.db_schema import ensure_database_schema
+from app.db_schema import ensure_database_schema, rebuild_book_review_stats
 from app.extensions import db
 from app.models import Annotation, Book, Reader, Review
 
@@ -121,6 +121,8 @@ with app.app_context():
     ]
     db.session.add_all([Review(**row) for row in reviews_data])
     safe_commit()
+    rebuild_book_review_stats(db.session.connection())
+    safe_commit()
 
     annotations_data = [
         {'id': 331, 'text': 'Time in this novel feels cyclical.', 'reviewer_id': 123, 'book_id': 12},
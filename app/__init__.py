@@ -12,6 +12,11 @@ from sqlalchemy.exc import OperationalError
 
 from app.db_schema import ensure_database_schema
 from app.extensions import cache, db, login_manager
+from app.password_hashing import password_hasher
+from app.search_index import book_index
+from app.services.auth_service import access_token_cache, session_revocations
+from app.services.book_text_service import book_text_cache
+from app.session_pruning import session_pruner
 
 if TYPE_CHECKING:
     from app.models import Reader
@@ -28,6 +33,17 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logging.warning('Invalid number for %s=%r. Using default %s.', name, value, default)
+        return default
+
+
 def _configure_logging() -> None:
     valid_levels: dict[str, int] = {
         'CRITICAL': logging.CRITICAL,
@@ -74,10 +90,34 @@ def create_app(test_config: Mapping[str, Any] | None = None) -> Flask:
         JWT_SECRET_KEY=os.getenv('JWT_SECRET_KEY', os.getenv('SECRET_KEY', 'change-me-in-production')),
         JWT_ACCESS_TOKEN_EXPIRES_MINUTES=_env_int('JWT_ACCESS_TOKEN_EXPIRES_MINUTES', 15),
         JWT_REFRESH_TOKEN_EXPIRES_DAYS=_env_int('JWT_REFRESH_TOKEN_EXPIRES_DAYS', 30),
+        ACCESS_TOKEN_CACHE_SIZE=_env_int('ACCESS_TOKEN_CACHE_SIZE', 1024),
+        ACCESS_TOKEN_CACHE_MAX_AGE=_env_int('ACCESS_TOKEN_CACHE_MAX_AGE', 60),
+        SESSION_REVOCATION_POLL_INTERVAL=_env_float('SESSION_REVOCATION_POLL_INTERVAL', 5.0),
+        SESSION_PRUNE_INTERVAL=_env_int('SESSION_PRUNE_INTERVAL', 0),
+        SESSION_PRUNE_BATCH_SIZE=_env_int('SESSION_PRUNE_BATCH_SIZE', 500),
+        REFRESH_SESSIONS_PER_READER=_env_int('REFRESH_SESSIONS_PER_READER', 10),
+        PASSWORD_HASH_METHOD=os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1'),
+        PASSWORD_HASH_WORKERS=_env_int('PASSWORD_HASH_WORKERS', 2),
+        PASSWORD_HASH_MAX_QUEUE=_env_int('PASSWORD_HASH_MAX_QUEUE', 8),
         SQLALCHEMY_DATABASE_URI=f"sqlite:///{db_path}",
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        BOOK_SEARCH_MODE=os.getenv('BOOK_SEARCH_MODE', 'fts'),
+        BOOK_COUNT_CACHE_TIMEOUT=_env_int('BOOK_COUNT_CACHE_TIMEOUT', 300),
+        BOOK_DETAILS_PREVIEW_SIZE=_env_int('BOOK_DETAILS_PREVIEW_SIZE', 10),
+        BOOK_TEXT_CACHE_SIZE=_env_int('BOOK_TEXT_CACHE_SIZE', 128),
         CACHE_TYPE=os.getenv('CACHE_TYPE', 'SimpleCache'),
         CACHE_DEFAULT_TIMEOUT=_env_int('CACHE_DEFAULT_TIMEOUT', 60),
+        CACHE_THRESHOLD=_env_int('CACHE_THRESHOLD', 500),
+        CACHE_MAX_BYTES=_env_int('CACHE_MAX_BYTES', 32 * 1024 * 1024),
+        CACHE_SWEEP_INTERVAL=_env_int('CACHE_SWEEP_INTERVAL', 30),
+        CACHE_SQLITE_PATH=os.getenv('CACHE_SQLITE_PATH'),
+        CACHE_REDIS_URL=os.getenv('CACHE_REDIS_URL'),
+        CACHE_KEY_PREFIX=os.getenv('CACHE_KEY_PREFIX', 'flasklibrary:'),
+        CACHE_EARLY_REFRESH_BETA=_env_float('CACHE_EARLY_REFRESH_BETA', 1.0),
+        CACHE_SINGLE_FLIGHT_TIMEOUT=_env_int('CACHE_SINGLE_FLIGHT_TIMEOUT', 10),
+        CACHE_STALE_WHILE_REVALIDATE=_env_int('CACHE_STALE_WHILE_REVALIDATE', 0),
+        CACHE_REVALIDATE_WORKERS=_env_int('CACHE_REVALIDATE_WORKERS', 2),
+        CACHE_VALIDATOR_TIMEOUT=_env_int('CACHE_VALIDATOR_TIMEOUT', 600),
     )
 
     if test_config:
@@ -102,11 +142,22 @@ def create_app(test_config: Mapping[str, Any] | None = None) -> Flask:
     app.register_blueprint(api_auth_bp)
     app.register_blueprint(api_bp)
 
+    from app.cli import register_commands  # noqa: E402
+
+    register_commands(app)
+
     with app.app_context():
         created_tables = ensure_database_schema()
         if created_tables:
             logging.info('Created missing tables: %s', ', '.join(created_tables))
 
+    password_hasher.init_app(app)
+    book_index.init_app(app)
+    book_text_cache.init_app(app)
+    access_token_cache.init_app(app)
+    session_revocations.init_app(app)
+    session_pruner.init_app(app)
+
     @app.after_request
     def add_no_store_headers(response: Response) -> Response:
         if request.blueprint == 'main' and current_user.is_authenticated:
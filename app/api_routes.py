@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import hashlib
 import json
+from dataclasses import dataclass
 
-from flask import Blueprint, jsonify, redirect, request, url_for
+from flask import Blueprint, Response, current_app, jsonify, redirect, request, url_for
 from flask.typing import ResponseReturnValue
 from marshmallow import Schema, ValidationError as MarshmallowValidationError
 from werkzeug.exceptions import HTTPException
 
 from app.extensions import cache
+from app.repositories.book_repository import BOOK_SORT_RATING
 from app.schemas import (
     annotation_request_schema,
     annotation_update_request_schema,
@@ -16,17 +18,37 @@ from app.schemas import (
     review_create_request_schema,
     review_update_request_schema,
 )
-from app.serializers import serialize_annotation, serialize_book, serialize_reader, serialize_review
+from app.serializers import (
+    serialize_annotation,
+    serialize_book,
+    serialize_book_annotation,
+    serialize_book_details,
+    serialize_book_review,
+    serialize_book_text_chapter,
+    serialize_reader,
+    serialize_review,
+)
 from app.services.access_policy import can_create_annotation, can_view_hidden_books
 from app.services.auth_service import AnonymousApiActor, ApiActor
-from app.services.exceptions import AuthenticationRequiredError, BadRequestError, PermissionDeniedError, ServiceError, ValidationError
+from app.services.book_service import BOOK_SORT_CATALOGUE
+from app.services.book_text_service import load_book_text_section
+from app.services.exceptions import (
+    AuthenticationRequiredError,
+    BadRequestError,
+    NotFoundError,
+    PermissionDeniedError,
+    ServiceError,
+    ValidationError,
+)
 from app.services.factories import (
     build_annotation_service,
     build_auth_service,
     build_book_service,
     build_reader_service,
+    build_resource_versions,
     build_review_service,
 )
+from app.services.resource_versions import BOOK_LIST_RESOURCE, BOOK_RATINGS_RESOURCE, book_resource, reader_resource, review_resource
 
 
 bp = Blueprint('api', __name__)
@@ -52,6 +74,10 @@ def _auth_service():
     return build_auth_service()
 
 
+def _resource_versions():
+    return build_resource_versions()
+
+
 def _json_payload() -> dict[str, object]:
     payload = request.get_json(silent=True)
     if payload is None:
@@ -96,29 +122,132 @@ def _api_actor(*, required: bool = False) -> ApiActor | AnonymousApiActor:
         return AnonymousApiActor()
 
 
-def _build_api_response(payload, ttl=60) -> ResponseReturnValue:
-    payload_json = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
-    etag = hashlib.sha256(payload_json.encode('utf-8')).hexdigest()
+def _visibility_scope(actor) -> str:
+    return 'librarian' if can_view_hidden_books(actor) else 'reader'
 
-    response = jsonify(payload)
-    response.set_etag(etag, weak=False)
+
+@dataclass(slots=True)
+class CachedApiResponse:
+    body: bytes
+    etag: str
+    tags: tuple[str, ...] = ()
+    stamps: tuple[str, ...] = ()
+
+
+def _encode_api_payload(payload) -> CachedApiResponse:
+    body = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode('utf-8')
+    return CachedApiResponse(body=body, etag=hashlib.sha256(body).hexdigest())
+
+
+def _stale_ttl() -> int:
+    return max(int(current_app.config.get('CACHE_STALE_WHILE_REVALIDATE', 0) or 0), 0)
+
+
+def _validator_key(cache_key) -> str:
+    return f'api:validator:{cache_key}'
+
+
+def _set_cache_headers(response, ttl=60, stale_ttl=0) -> None:
     response.headers['Cache-Control'] = f'private, max-age={ttl}'
+    if stale_ttl:
+        response.headers['Cache-Control'] += f', stale-while-revalidate={stale_ttl}'
     response.headers['Vary'] = 'Accept, Authorization'
 
+
+def _build_api_response(encoded, ttl=60, stale_ttl=0) -> ResponseReturnValue:
+    response = Response(encoded.body, mimetype='application/json')
+    response.set_etag(encoded.etag, weak=False)
+    _set_cache_headers(response, ttl=ttl, stale_ttl=stale_ttl)
+
     return response.make_conditional(request)
 
 
-def _cached_api_json(cache_key, payload_factory, ttl=60) -> ResponseReturnValue:
-    payload = cache.get(cache_key)
-    if payload is None:
+def _not_modified_response(cache_key_for_scope, ttl=60) -> Response | None:
+    if not request.if_none_match:
+        return None
+
+    bearer_token = _bearer_token()
+    if bearer_token is None:
+        return None
+    try:
+        actor = _auth_service().authenticate_access_token(bearer_token)
+    except AuthenticationRequiredError:
+        return None
+
+    validator = cache.get(_validator_key(cache_key_for_scope(_visibility_scope(actor))))
+    if validator is None:
+        return None
+
+    tags, stamps, etag = validator
+    if not request.if_none_match.contains(etag) or _resource_versions().current(tags) != stamps:
+        return None
+
+    response = Response(status=304)
+    response.set_etag(etag, weak=False)
+    _set_cache_headers(response, ttl=ttl, stale_ttl=_stale_ttl())
+    return response
+
+
+def _in_app_context(payload_factory):
+    app = current_app._get_current_object()
+
+    def run_in_app_context():
+        with app.app_context():
+            return payload_factory()
+
+    return run_in_app_context
+
+
+def _cached_api_json(cache_key, payload_factory, ttl=60, tags=(), item_tags=None) -> ResponseReturnValue:
+    stale_ttl = _stale_ttl()
+    validator_ttl = int(current_app.config.get('CACHE_VALIDATOR_TIMEOUT', 600))
+    if not cache.is_shared:
+        # Per-process stamps only see this worker's writes, so they cannot vouch for longer than the payload.
+        validator_ttl = min(validator_ttl, ttl)
+
+    def encoded_factory():
+        stamps = _resource_versions().ensure(tags)
         payload = payload_factory()
-        cache.set(cache_key, payload, timeout=ttl)
+        entry_tags = tuple(tags)
+        if item_tags is not None:
+            payload_tags = tuple(item_tags(payload))
+            stamps += _resource_versions().ensure(payload_tags)
+            entry_tags += payload_tags
+        encoded = _encode_api_payload(payload)
+        encoded.tags = entry_tags
+        encoded.stamps = stamps
+        return encoded
+
+    def store_validator(encoded):
+        # Skipped when a tag was touched while building: the item stamps may be newer than the payload.
+        cache.set(
+            _validator_key(cache_key),
+            (encoded.tags, encoded.stamps, encoded.etag),
+            timeout=validator_ttl,
+            tags=encoded.tags,
+        )
+
+    encoded = cache.get_or_set(
+        cache_key,
+        encoded_factory,
+        timeout=ttl,
+        tags=tags,
+        stale_timeout=stale_ttl,
+        background_factory=_in_app_context(encoded_factory) if stale_ttl else None,
+        value_tags=_cached_response_tags if item_tags is not None else None,
+        on_store=store_validator,
+    )
+    if not isinstance(encoded, CachedApiResponse):
+        encoded = _encode_api_payload(encoded)
+    return _build_api_response(encoded, ttl=ttl, stale_ttl=stale_ttl)
+
 
-    return _build_api_response(payload, ttl=ttl)
+def _cached_response_tags(encoded) -> tuple[str, ...]:
+    return encoded.tags if isinstance(encoded, CachedApiResponse) else ()
 
 
-def _invalidate_api_cache() -> None:
-    cache.clear()
+def _book_item_tags(payload) -> list[str]:
+    return [book_resource(item['id']) for item in payload['items']]
 
 
 def _json_error(status, message, details=None) -> ResponseReturnValue:
@@ -144,10 +273,52 @@ def books_collection() -> ResponseReturnValue:
     search_query = request.args.get('search', '').strip()
     page = max(request.args.get('page', 1, type=int), 1)
     per_page = min(max(request.args.get('per_page', 10, type=int), 1), 50)
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', '').strip().lower() in {'1', 'true', 'yes'}
+    with_count = request.args.get('count', '').strip().lower() not in {'0', 'false', 'no'}
+    sort = request.args.get('sort', BOOK_SORT_CATALOGUE).strip().lower() or BOOK_SORT_CATALOGUE
+    if cursor is not None and sort != BOOK_SORT_CATALOGUE:
+        raise BadRequestError('Cursor pagination supports only the catalogue sort.')
+    # Only rating-sorted pages depend on every book's rating; other pages follow the books they list.
+    tags = (BOOK_LIST_RESOURCE, BOOK_RATINGS_RESOURCE) if sort == BOOK_SORT_RATING else (BOOK_LIST_RESOURCE,)
+
+    def cache_key_for_scope(visibility_scope):
+        if cursor is not None:
+            return (
+                f'api:v1:books:{visibility_scope}:search={search_query}:cursor={cursor}:'
+                f'per_page={per_page}:total={int(include_total)}'
+            )
+        return (
+            f'api:v1:books:{visibility_scope}:search={search_query}:page={page}:per_page={per_page}'
+            f'{"" if with_count else ":count=0"}{"" if sort == BOOK_SORT_CATALOGUE else f":sort={sort}"}'
+        )
+
+    not_modified = _not_modified_response(cache_key_for_scope)
+    if not_modified is not None:
+        return not_modified
+
     actor = _api_actor(required=True)
-    visibility_scope = 'librarian' if can_view_hidden_books(actor) else 'reader'
+    cache_key = cache_key_for_scope(_visibility_scope(actor))
 
-    cache_key = f'api:v1:books:{visibility_scope}:search={search_query}:page={page}:per_page={per_page}'
+    def cursor_payload_factory():
+        cursor_page = _book_service().paginate_books_by_cursor(
+            search_query=search_query,
+            cursor=cursor,
+            per_page=per_page,
+            include_hidden=can_view_hidden_books(actor),
+            with_total=include_total,
+        )
+        return {
+            'items': [serialize_book(book) for book in cursor_page.items],
+            'pagination': {
+                'per_page': per_page,
+                'cursor': cursor or None,
+                'next_cursor': cursor_page.next_cursor,
+                'has_next': cursor_page.next_cursor is not None,
+                'total': cursor_page.total,
+            },
+            'search': search_query,
+        }
 
     def payload_factory():
         paginated = _book_service().paginate_books(
@@ -155,40 +326,116 @@ def books_collection() -> ResponseReturnValue:
             page=page,
             per_page=per_page,
             include_hidden=can_view_hidden_books(actor),
+            count=with_count,
+            sort=sort,
         )
         return {
             'items': [serialize_book(book) for book in paginated.items],
             'pagination': {
                 'page': paginated.page,
                 'per_page': paginated.per_page,
-                'pages': paginated.pages,
+                'pages': paginated.pages if paginated.total is not None else None,
                 'total': paginated.total,
                 'has_next': paginated.has_next,
                 'has_prev': paginated.has_prev,
             },
             'search': search_query,
+            'sort': sort,
         }
 
-    return _cached_api_json(cache_key, payload_factory)
+    return _cached_api_json(
+        cache_key,
+        cursor_payload_factory if cursor is not None else payload_factory,
+        tags=tags,
+        item_tags=None if sort == BOOK_SORT_RATING else _book_item_tags,
+    )
 
 
 @bp.route('/api/v1/books/<int:book_id>', methods=['GET'])
 def book_details(book_id) -> ResponseReturnValue:
+    tags = (book_resource(book_id),)
+
+    def cache_key_for_scope(visibility_scope):
+        return f'api:v1:books:{book_id}:details:{visibility_scope}'
+
+    not_modified = _not_modified_response(cache_key_for_scope)
+    if not_modified is not None:
+        return not_modified
+
     actor = _api_actor(required=True)
-    visibility_scope = 'librarian' if can_view_hidden_books(actor) else 'reader'
-    cache_key = f'api:v1:books:{book_id}:details:{visibility_scope}'
+    cache_key = cache_key_for_scope(_visibility_scope(actor))
 
     def payload_factory():
         book = _book_service().get_book_for_actor(book_id, actor)
-        reviews = [serialize_review(review) for review in _review_service().list_book_reviews_desc(book.id)]
-        annotations = [serialize_annotation(annotation) for annotation in _annotation_service().list_book_annotations_desc(book.id)]
+        preview_size = int(current_app.config.get('BOOK_DETAILS_PREVIEW_SIZE', 10))
+        return serialize_book_details(
+            book,
+            _review_service().list_book_reviews_page(book.id, per_page=preview_size),
+            _annotation_service().list_book_annotations_page(book.id, per_page=preview_size),
+        )
+
+    return _cached_api_json(cache_key, payload_factory, tags=tags)
+
 
-        payload = serialize_book(book)
-        payload['reviews'] = reviews
-        payload['annotations'] = annotations
-        return payload
+@bp.route('/api/v1/books/<int:book_id>/reviews', methods=['GET'])
+def book_reviews(book_id) -> ResponseReturnValue:
+    return _book_feed_response(
+        book_id,
+        'reviews',
+        lambda cursor, per_page: _review_service().list_book_reviews_page(book_id, cursor=cursor, per_page=per_page),
+        serialize_book_review,
+    )
 
-    return _cached_api_json(cache_key, payload_factory)
+
+@bp.route('/api/v1/books/<int:book_id>/annotations', methods=['GET'])
+def book_annotations(book_id) -> ResponseReturnValue:
+    return _book_feed_response(
+        book_id,
+        'annotations',
+        lambda cursor, per_page: _annotation_service().list_book_annotations_page(book_id, cursor=cursor, per_page=per_page),
+        serialize_book_annotation,
+    )
+
+
+def _book_feed_response(book_id, feed_name, load_page, serialize_item) -> ResponseReturnValue:
+    cursor = request.args.get('cursor', '').strip() or None
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 50)
+    tags = (book_resource(book_id),)
+
+    def cache_key_for_scope(visibility_scope):
+        return f'api:v1:books:{book_id}:{feed_name}:{visibility_scope}:cursor={cursor or ""}:per_page={per_page}'
+
+    not_modified = _not_modified_response(cache_key_for_scope)
+    if not_modified is not None:
+        return not_modified
+
+    actor = _api_actor(required=True)
+    cache_key = cache_key_for_scope(_visibility_scope(actor))
+
+    def payload_factory():
+        _book_service().get_book_for_actor(book_id, actor)
+        page = load_page(cursor, per_page)
+        return {
+            'items': [serialize_item(item) for item in page.items],
+            'pagination': {
+                'per_page': per_page,
+                'cursor': cursor,
+                'next_cursor': page.next_cursor,
+                'has_next': page.next_cursor is not None,
+            },
+        }
+
+    return _cached_api_json(cache_key, payload_factory, tags=tags)
+
+
+@bp.route('/api/v1/books/<int:book_id>/text/sections/<section_id>', methods=['GET'])
+def book_text_section(book_id, section_id) -> ResponseReturnValue:
+    actor = _api_actor(required=True)
+    book = _book_service().get_book_for_actor(book_id, actor)
+    chapter = load_book_text_section(book.id, section_id)
+    if chapter is None:
+        raise NotFoundError('Book text section not found.')
+    return _build_api_response(_encode_api_payload(serialize_book_text_chapter(book.id, chapter)))
 
 
 @bp.route('/api/v1/books/<int:book_id>/reviews', methods=['POST'])
@@ -201,7 +448,6 @@ def review_create(book_id) -> ResponseReturnValue:
         text=payload['text'],
         stars=payload['stars'],
     )
-    _invalidate_api_cache()
     return jsonify(serialize_review(review)), 201
 
 
@@ -218,7 +464,6 @@ def annotation_create(book_id) -> ResponseReturnValue:
         book_id,
         text=payload['text'],
     )
-    _invalidate_api_cache()
     return jsonify(serialize_annotation(annotation)), 201
 
 
@@ -231,7 +476,7 @@ def reader_profile(user_id) -> ResponseReturnValue:
         reader = _reader_service().require_reader(user_id)
         return serialize_reader(reader)
 
-    return _cached_api_json(cache_key, payload_factory)
+    return _cached_api_json(cache_key, payload_factory, tags=(reader_resource(user_id),))
 
 
 @bp.route('/api/v1/reviews/<int:review_id>', methods=['GET'])
@@ -243,7 +488,7 @@ def review_details(review_id) -> ResponseReturnValue:
         review = _review_service().require_review(review_id)
         return serialize_review(review)
 
-    return _cached_api_json(cache_key, payload_factory)
+    return _cached_api_json(cache_key, payload_factory, tags=(review_resource(review_id),))
 
 
 @bp.route('/api/v1/reviews/<int:review_id>', methods=['PATCH'])
@@ -261,7 +506,6 @@ def review_update(review_id) -> ResponseReturnValue:
     else:
         review = review_service.update_review(actor, review_id)
 
-    _invalidate_api_cache()
     return jsonify(serialize_review(review))
 
 
@@ -269,7 +513,6 @@ def review_update(review_id) -> ResponseReturnValue:
 def review_delete(review_id) -> ResponseReturnValue:
     actor = _api_actor(required=True)
     _review_service().delete_review(actor, review_id)
-    _invalidate_api_cache()
     return ('', 204)
 
 
@@ -284,7 +527,6 @@ def annotation_update(annotation_id) -> ResponseReturnValue:
     else:
         annotation = annotation_service.update_annotation(actor, annotation_id)
 
-    _invalidate_api_cache()
     return jsonify(serialize_annotation(annotation))
 
 
@@ -292,7 +534,6 @@ def annotation_update(annotation_id) -> ResponseReturnValue:
 def annotation_delete(annotation_id) -> ResponseReturnValue:
     actor = _api_actor(required=True)
     _annotation_service().delete_annotation(actor, annotation_id)
-    _invalidate_api_cache()
     return ('', 204)
 
 
@@ -306,7 +547,6 @@ def book_details_legacy(book_id) -> ResponseReturnValue:
 def toggle_book_hidden(book_id) -> ResponseReturnValue:
     actor = _api_actor(required=True)
     target_book = _book_service().toggle_book_hidden(actor, book_id)
-    _invalidate_api_cache()
 
     return jsonify(
         {
@@ -0,0 +1,605 @@
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable, Mapping
+from pathlib import Path
+from typing import Any, Protocol
+
+
+class CacheBackend(Protocol):
+    # True when every worker process sees the same entries.
+    shared: bool
+
+    def get(self, key: Hashable) -> Any | None: ...
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        timeout: int | float | None = None,
+        *,
+        tags: Iterable[str] = (),
+    ) -> None: ...
+
+    def delete(self, key: Hashable) -> bool: ...
+
+    def invalidate_tags(self, *tags: str) -> int: ...
+
+    def clear(self) -> None: ...
+
+    def sweep(self) -> int: ...
+
+    def stats(self) -> dict[str, int]: ...
+
+
+def _approximate_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += _approximate_size(key) + _approximate_size(item)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += _approximate_size(item)
+    elif hasattr(value, '__slots__'):
+        slots = (value.__slots__,) if isinstance(value.__slots__, str) else value.__slots__
+        for slot in slots:
+            size += _approximate_size(getattr(value, slot, None))
+    return size
+
+
+class SimpleTTLCache:
+    shared = False
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        sweep_interval: float = 0,
+    ) -> None:
+        self._store: OrderedDict[Hashable, tuple[float | None, int, Any]] = OrderedDict()
+        self._key_tags: dict[Hashable, frozenset[str]] = {}
+        self._tag_keys: dict[str, set[Hashable]] = {}
+        self._lock = threading.RLock()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sweep_interval = sweep_interval
+        self._next_sweep_at = 0.0
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._tag_invalidations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            now = time.time()
+            self._maybe_sweep(now)
+
+            item = self._store.get(key)
+            if item is None:
+                self._misses += 1
+                return None
+
+            expires_at, _, value = item
+            if expires_at is not None and expires_at <= now:
+                self._discard(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._store.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        timeout: int | float | None = None,
+        *,
+        tags: Iterable[str] = (),
+    ) -> None:
+        with self._lock:
+            now = time.time()
+            expires_at = None if timeout is None else now + timeout
+            size = _approximate_size(value) if self._max_bytes else 0
+
+            self._discard(key)
+            self._store[key] = (expires_at, size, value)
+            self._current_bytes += size
+
+            key_tags = frozenset(tags)
+            if key_tags:
+                self._key_tags[key] = key_tags
+                for tag in key_tags:
+                    self._tag_keys.setdefault(tag, set()).add(key)
+
+            self._maybe_sweep(now)
+            self._evict_over_budget()
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._discard(key)
+
+    def invalidate_tags(self, *tags: str) -> int:
+        with self._lock:
+            keys: set[Hashable] = set()
+            for tag in tags:
+                keys.update(self._tag_keys.get(tag, ()))
+            for key in keys:
+                self._discard(key)
+            self._tag_invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self._key_tags.clear()
+            self._tag_keys.clear()
+            self._current_bytes = 0
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep_expired(time.time())
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._store),
+                'bytes': self._current_bytes,
+                'max_entries': self._max_entries,
+                'max_bytes': self._max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'tag_invalidations': self._tag_invalidations,
+            }
+
+    def _discard(self, key: Hashable) -> bool:
+        item = self._store.pop(key, None)
+        if item is None:
+            return False
+        self._current_bytes -= item[1]
+        self._untag(key)
+        return True
+
+    def _untag(self, key: Hashable) -> None:
+        for tag in self._key_tags.pop(key, ()):
+            tagged_keys = self._tag_keys.get(tag)
+            if tagged_keys is None:
+                continue
+            tagged_keys.discard(key)
+            if not tagged_keys:
+                del self._tag_keys[tag]
+
+    def _maybe_sweep(self, now: float) -> None:
+        if not self._sweep_interval or now < self._next_sweep_at:
+            return
+        self._next_sweep_at = now + self._sweep_interval
+        self._sweep_expired(now)
+
+    def _sweep_expired(self, now: float) -> int:
+        expired_keys = [
+            key for key, (expires_at, _, _) in self._store.items() if expires_at is not None and expires_at <= now
+        ]
+        for key in expired_keys:
+            self._discard(key)
+        self._expirations += len(expired_keys)
+        return len(expired_keys)
+
+    def _evict_over_budget(self) -> None:
+        if self._max_entries:
+            while len(self._store) > self._max_entries:
+                self._evict_oldest()
+        if self._max_bytes:
+            while self._current_bytes > self._max_bytes and self._store:
+                self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        key, (_, size, _) = self._store.popitem(last=False)
+        self._current_bytes -= size
+        self._untag(key)
+        self._evictions += 1
+
+
+class SQLiteCache:
+    shared = True
+    _SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS cache_entry ('
+        ' key TEXT PRIMARY KEY,'
+        ' value BLOB NOT NULL,'
+        ' size INTEGER NOT NULL,'
+        ' expires_at REAL,'
+        ' stored_at REAL NOT NULL,'
+        ' accessed_at REAL NOT NULL'
+        ')',
+        'CREATE INDEX IF NOT EXISTS ix_cache_entry_expires_at ON cache_entry (expires_at)',
+        'CREATE TABLE IF NOT EXISTS cache_tag ('
+        ' tag TEXT NOT NULL,'
+        ' key TEXT NOT NULL,'
+        ' PRIMARY KEY (tag, key)'
+        ')',
+        'CREATE INDEX IF NOT EXISTS ix_cache_tag_key ON cache_tag (key)',
+    )
+    # Hits refresh accessed_at at most this often, so hot keys do not turn every read into a write.
+    _ACCESS_RESOLUTION = 1.0
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        sweep_interval: float = 0,
+    ) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sweep_interval = sweep_interval
+        self._next_sweep_at = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._tag_invalidations = 0
+
+        with self._connection() as connection:
+            for statement in self._SCHEMA:
+                connection.execute(statement)
+            columns = {row[1] for row in connection.execute('PRAGMA table_info(cache_entry)')}
+            if 'accessed_at' not in columns:
+                # Files created before eviction followed reads only know when each entry was stored.
+                try:
+                    connection.execute('ALTER TABLE cache_entry ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0')
+                except sqlite3.OperationalError as error:
+                    if 'duplicate column' not in str(error):
+                        raise
+                else:
+                    connection.execute('UPDATE cache_entry SET accessed_at = stored_at')
+            connection.execute('DROP INDEX IF EXISTS ix_cache_entry_stored_at')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_cache_entry_accessed_at ON cache_entry (accessed_at)')
+
+    def get(self, key: Hashable) -> Any | None:
+        now = time.time()
+        self._maybe_sweep(now)
+
+        cache_key = str(key)
+        row = self._connection().execute(
+            'SELECT value, expires_at, accessed_at FROM cache_entry WHERE key = ?',
+            (cache_key,),
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self._count('_misses')
+            return None
+
+        if (self._max_entries or self._max_bytes) and now - row[2] >= self._ACCESS_RESOLUTION:
+            with self._connection() as connection:
+                connection.execute('UPDATE cache_entry SET accessed_at = ? WHERE key = ?', (now, cache_key))
+        self._count('_hits')
+        return pickle.loads(row[0])
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        timeout: int | float | None = None,
+        *,
+        tags: Iterable[str] = (),
+    ) -> None:
+        now = time.time()
+        expires_at = None if timeout is None else now + timeout
+        encoded = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        cache_key = str(key)
+
+        with self._connection() as connection:
+            connection.execute('DELETE FROM cache_tag WHERE key = ?', (cache_key,))
+            connection.execute(
+                'INSERT OR REPLACE INTO cache_entry (key, value, size, expires_at, stored_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (cache_key, encoded, len(encoded), expires_at, now, now),
+            )
+            connection.executemany(
+                'INSERT OR IGNORE INTO cache_tag (tag, key) VALUES (?, ?)',
+                [(tag, cache_key) for tag in set(tags)],
+            )
+
+        self._maybe_sweep(now)
+
+    def delete(self, key: Hashable) -> bool:
+        with self._connection() as connection:
+            return self._delete_keys(connection, [str(key)]) > 0
+
+    def invalidate_tags(self, *tags: str) -> int:
+        if not tags:
+            return 0
+
+        placeholders = ', '.join('?' for _ in tags)
+        with self._connection() as connection:
+            keys = [
+                row[0]
+                for row in connection.execute(
+                    f'SELECT DISTINCT key FROM cache_tag WHERE tag IN ({placeholders})',
+                    tags,
+                )
+            ]
+            removed = self._delete_keys(connection, keys)
+
+        self._count('_tag_invalidations', removed)
+        return removed
+
+    def clear(self) -> None:
+        with self._connection() as connection:
+            connection.execute('DELETE FROM cache_entry')
+            connection.execute('DELETE FROM cache_tag')
+
+    def sweep(self) -> int:
+        return self._sweep(time.time())
+
+    def stats(self) -> dict[str, int]:
+        entries, total_bytes = self._connection().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entry'
+        ).fetchone()
+        with self._lock:
+            return {
+                'entries': entries,
+                'bytes': total_bytes,
+                'max_entries': self._max_entries,
+                'max_bytes': self._max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'tag_invalidations': self._tag_invalidations,
+            }
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.isolation_level = 'DEFERRED'
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    @staticmethod
+    def _delete_keys(connection: sqlite3.Connection, keys: list[str]) -> int:
+        removed = 0
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ', '.join('?' for _ in chunk)
+            connection.execute(f'DELETE FROM cache_tag WHERE key IN ({placeholders})', chunk)
+            removed += connection.execute(f'DELETE FROM cache_entry WHERE key IN ({placeholders})', chunk).rowcount
+        return removed
+
+    def _maybe_sweep(self, now: float) -> None:
+        if not self._sweep_interval:
+            return
+        with self._lock:
+            if now < self._next_sweep_at:
+                return
+            self._next_sweep_at = now + self._sweep_interval
+        self._sweep(now)
+
+    def _sweep(self, now: float) -> int:
+        with self._connection() as connection:
+            expired_keys = [
+                row[0]
+                for row in connection.execute(
+                    'SELECT key FROM cache_entry WHERE expires_at IS NOT NULL AND expires_at <= ?',
+                    (now,),
+                )
+            ]
+            expired = self._delete_keys(connection, expired_keys)
+            evicted = self._evict_over_budget(connection)
+
+        self._count('_expirations', expired)
+        self._count('_evictions', evicted)
+        return expired
+
+    def _evict_over_budget(self, connection: sqlite3.Connection) -> int:
+        evicted = 0
+        if self._max_entries:
+            overflow = connection.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0] - self._max_entries
+            if overflow > 0:
+                keys = [
+                    row[0]
+                    for row in connection.execute(
+                        'SELECT key FROM cache_entry ORDER BY accessed_at ASC LIMIT ?',
+                        (overflow,),
+                    )
+                ]
+                evicted += self._delete_keys(connection, keys)
+
+        if self._max_bytes:
+            excess = connection.execute('SELECT COALESCE(SUM(size), 0) FROM cache_entry').fetchone()[0] - self._max_bytes
+            if excess > 0:
+                keys = []
+                for key, size in connection.execute('SELECT key, size FROM cache_entry ORDER BY accessed_at ASC'):
+                    keys.append(key)
+                    excess -= size
+                    if excess <= 0:
+                        break
+                evicted += self._delete_keys(connection, keys)
+
+        return evicted
+
+
+class RedisCache:
+    shared = True
+    # Drops tag members whose entry is gone. One script per tag set, so an entry re-set meanwhile re-adds itself.
+    _TRIM_TAG_SCRIPT = (
+        'local removed = 0 '
+        'for _, member in ipairs(ARGV) do '
+        "if redis.call('exists', member) == 0 then removed = removed + redis.call('srem', KEYS[1], member) end "
+        'end '
+        'return removed'
+    )
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        key_prefix: str = 'flasklibrary:',
+        sweep_interval: float = 0,
+    ) -> None:
+        self._client = client
+        self._key_prefix = key_prefix
+        self._sweep_interval = sweep_interval
+        self._next_sweep_at = 0.0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._tag_invalidations = 0
+        self._trimmed_tag_members = 0
+
+    @classmethod
+    def from_url(cls, url: str, *, key_prefix: str = 'flasklibrary:', sweep_interval: float = 0) -> RedisCache:
+        try:
+            import redis
+        except ImportError as error:
+            raise RuntimeError('CACHE_TYPE=RedisCache requires the "redis" package.') from error
+        return cls(redis.Redis.from_url(url), key_prefix=key_prefix, sweep_interval=sweep_interval)
+
+    def get(self, key: Hashable) -> Any | None:
+        raw = self._client.get(self._entry_key(key))
+        if raw is None:
+            self._count('_misses')
+            return None
+
+        self._count('_hits')
+        return pickle.loads(raw)
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        timeout: int | float | None = None,
+        *,
+        tags: Iterable[str] = (),
+    ) -> None:
+        entry_key = self._entry_key(key)
+        encoded = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expire_ms = None if timeout is None else max(int(timeout * 1000), 1)
+
+        self._client.set(entry_key, encoded, px=expire_ms)
+        for tag in set(tags):
+            tag_key = self._tag_key(tag)
+            # -2: no set yet, -1: the set already holds an entry that never expires.
+            tag_ttl = self._client.pttl(tag_key)
+            self._client.sadd(tag_key, entry_key)
+            if expire_ms is None:
+                self._client.persist(tag_key)
+            elif tag_ttl == -2 or 0 <= tag_ttl < expire_ms:
+                self._client.pexpire(tag_key, expire_ms)
+
+        self._maybe_sweep(time.time())
+
+    def delete(self, key: Hashable) -> bool:
+        return bool(self._client.delete(self._entry_key(key)))
+
+    def invalidate_tags(self, *tags: str) -> int:
+        entry_keys: set[Any] = set()
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        for tag_key in tag_keys:
+            entry_keys.update(self._client.smembers(tag_key))
+
+        removed = self._client.delete(*entry_keys) if entry_keys else 0
+        if tag_keys:
+            self._client.delete(*tag_keys)
+        self._count('_tag_invalidations', removed)
+        return removed
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=f'{self._key_prefix}*'))
+        if keys:
+            self._client.delete(*keys)
+
+    def sweep(self) -> int:
+        # Redis expires entries by itself; a tag set keeps their names until the tag is invalidated.
+        trimmed = 0
+        for tag_key in self._client.scan_iter(match=f'{self._key_prefix}tag:*'):
+            members = list(self._client.smembers(tag_key))
+            if members:
+                trimmed += int(self._client.eval(self._TRIM_TAG_SCRIPT, 1, tag_key, *members))
+        self._count('_trimmed_tag_members', trimmed)
+        return 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'tag_invalidations': self._tag_invalidations,
+                'trimmed_tag_members': self._trimmed_tag_members,
+            }
+
+    def _entry_key(self, key: Hashable) -> str:
+        return f'{self._key_prefix}entry:{key}'
+
+    def _tag_key(self, tag: str) -> str:
+        return f'{self._key_prefix}tag:{tag}'
+
+    def _maybe_sweep(self, now: float) -> None:
+        if not self._sweep_interval:
+            return
+        with self._lock:
+            if now < self._next_sweep_at:
+                return
+            self._next_sweep_at = now + self._sweep_interval
+        self.sweep()
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+
+def create_cache_backend(config: Mapping[str, Any], *, instance_path: str | os.PathLike[str]) -> CacheBackend:
+    cache_type = str(config.get('CACHE_TYPE') or 'SimpleCache')
+    max_entries = max(int(config.get('CACHE_THRESHOLD', 0) or 0), 0)
+    max_bytes = max(int(config.get('CACHE_MAX_BYTES', 0) or 0), 0)
+    sweep_interval = max(float(config.get('CACHE_SWEEP_INTERVAL', 0) or 0), 0)
+
+    if cache_type == 'SQLiteCache':
+        return SQLiteCache(
+            config.get('CACHE_SQLITE_PATH') or Path(instance_path) / 'api-cache.sqlite3',
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sweep_interval=sweep_interval,
+        )
+
+    if cache_type == 'RedisCache':
+        return RedisCache.from_url(
+            config.get('CACHE_REDIS_URL') or 'redis://localhost:6379/0',
+            key_prefix=config.get('CACHE_KEY_PREFIX') or 'flasklibrary:',
+            sweep_interval=sweep_interval,
+        )
+
+    if cache_type != 'SimpleCache':
+        logging.warning('Unknown CACHE_TYPE=%r. Falling back to SimpleCache.', cache_type)
+
+    return SimpleTTLCache(
+        max_entries=max_entries,
+        max_bytes=max_bytes,
+        sweep_interval=sweep_interval,
+    )
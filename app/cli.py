@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import click
+from flask import Flask
+from flask.cli import with_appcontext
+
+from app.password_hashing import calibration_candidates, measure_verify_seconds, password_hasher
+from app.services.book_text_service import rebuild_book_text_artifacts
+from app.services.factories import build_review_service
+from app.session_pruning import prune_refresh_sessions
+
+
+def register_commands(app: Flask) -> None:
+    app.cli.add_command(rebuild_review_stats_command)
+    app.cli.add_command(rebuild_book_text_artifacts_command)
+    app.cli.add_command(calibrate_password_hash_command)
+    app.cli.add_command(prune_refresh_sessions_command)
+
+
+@click.command('rebuild-review-stats')
+@with_appcontext
+def rebuild_review_stats_command() -> None:
+    """Recompute every book's review count, star total, histogram and average."""
+    updated = build_review_service().rebuild_review_stats()
+    click.echo(f'Rebuilt review aggregates for {updated} reviewed books.')
+
+
+@click.command('rebuild-book-text-artifacts')
+@with_appcontext
+def rebuild_book_text_artifacts_command() -> None:
+    """Write the pre-parsed JSON artifact next to every stale or missing book text."""
+    rebuilt, up_to_date = rebuild_book_text_artifacts()
+    click.echo(f'Rebuilt {rebuilt} book text artifacts ({up_to_date} already up to date).')
+
+
+@click.command('calibrate-password-hash')
+@click.option('--algorithm', type=click.Choice(['scrypt', 'pbkdf2']), default='scrypt', show_default=True)
+@click.option('--target-ms', type=float, default=250, show_default=True, help='Verify time budget per login.')
+@click.option('--samples', type=int, default=3, show_default=True)
+@with_appcontext
+def calibrate_password_hash_command(algorithm: str, target_ms: float, samples: int) -> None:
+    """Time password verification for candidate hash costs and suggest PASSWORD_HASH_METHOD."""
+    chosen = None
+    for method in calibration_candidates(algorithm):
+        seconds = measure_verify_seconds(method, samples=samples)
+        click.echo(f'{method:<28}{seconds * 1000:>9.1f} ms')
+        if seconds * 1000 > target_ms:
+            break
+        chosen = method
+    if chosen is None:
+        click.echo(f'Every candidate exceeds {target_ms:g} ms; keep the cheapest or raise the budget.')
+        return
+    click.echo(f'Suggested: PASSWORD_HASH_METHOD={chosen} (current: {password_hasher.method})')
+
+
+@click.command('prune-refresh-sessions')
+@click.option('--batch-size', type=int, default=None, help='Rows deleted per commit (default SESSION_PRUNE_BATCH_SIZE).')
+@click.option('--max-per-reader', type=int, default=None, help='Active sessions kept per reader (default REFRESH_SESSIONS_PER_READER).')
+@with_appcontext
+def prune_refresh_sessions_command(batch_size: int | None, max_per_reader: int | None) -> None:
+    """Delete expired and revoked API sessions in batches and revoke the oldest beyond the per-reader limit."""
+    result = prune_refresh_sessions(batch_size=batch_size, max_sessions_per_reader=max_per_reader)
+    click.echo(
+        f'Deleted {result.deleted} refresh sessions in {result.batches} batches; '
+        f'revoked {result.revoked_over_limit} over the per-reader limit.'
+    )
+    for label, stats in (('before', result.before), ('after', result.after)):
+        size = f", {stats['bytes']} bytes" if stats['bytes'] is not None else ''
+        click.echo(
+            f"Table {label}: {stats['rows']} rows ({stats['active']} active, {stats['revoked']} revoked, "
+            f"{stats['expired']} expired{size})."
+        )
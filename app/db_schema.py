@@ -1,15 +1,183 @@
 from __future__ import annotations
 
-from sqlalchemy import inspect
+import logging
+
+from sqlalchemy import DDL, Connection, case, event, func, inspect, select, text
 
 from app.extensions import db
+from app.models import MONTH_NAMES, REVIEW_STARS, Book, Review
+
+BOOK_SEARCH_TABLE = 'book_search'
+BOOK_SEARCH_COLUMNS = (
+    'title',
+    'author_name',
+    'author_surname',
+    'original_language',
+    'translation_language',
+    'first_publication',
+    'genre',
+    'month',
+    'year',
+)
+
+BOOK_REVIEW_STATS_COLUMNS = (
+    'review_count',
+    'review_star_total',
+    *(f'review_stars_{stars}' for stars in REVIEW_STARS),
+    'rating_average',
+)
+
+_BOOK_SEARCH_VALUES_NEW = ', '.join(f'new.{column}' for column in BOOK_SEARCH_COLUMNS)
+_BOOK_SEARCH_VALUES_OLD = ', '.join(f'old.{column}' for column in BOOK_SEARCH_COLUMNS)
+_BOOK_SEARCH_COLUMN_LIST = ', '.join(BOOK_SEARCH_COLUMNS)
+
+_BOOK_SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {BOOK_SEARCH_TABLE} USING fts5("
+    f"{_BOOK_SEARCH_COLUMN_LIST}, content='book', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {BOOK_SEARCH_TABLE}_ai AFTER INSERT ON book BEGIN "
+    f"INSERT INTO {BOOK_SEARCH_TABLE} (rowid, {_BOOK_SEARCH_COLUMN_LIST}) VALUES (new.id, {_BOOK_SEARCH_VALUES_NEW}); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {BOOK_SEARCH_TABLE}_ad AFTER DELETE ON book BEGIN "
+    f"INSERT INTO {BOOK_SEARCH_TABLE} ({BOOK_SEARCH_TABLE}, rowid, {_BOOK_SEARCH_COLUMN_LIST}) "
+    f"VALUES ('delete', old.id, {_BOOK_SEARCH_VALUES_OLD}); "
+    "END",
+    f"CREATE TRIGGER IF NOT EXISTS {BOOK_SEARCH_TABLE}_au AFTER UPDATE OF {_BOOK_SEARCH_COLUMN_LIST} ON book BEGIN "
+    f"INSERT INTO {BOOK_SEARCH_TABLE} ({BOOK_SEARCH_TABLE}, rowid, {_BOOK_SEARCH_COLUMN_LIST}) "
+    f"VALUES ('delete', old.id, {_BOOK_SEARCH_VALUES_OLD}); "
+    f"INSERT INTO {BOOK_SEARCH_TABLE} (rowid, {_BOOK_SEARCH_COLUMN_LIST}) VALUES (new.id, {_BOOK_SEARCH_VALUES_NEW}); "
+    "END",
+)
+
+
+for _statement in _BOOK_SEARCH_DDL:
+    event.listen(Book.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(
+    Book.__table__,
+    'before_drop',
+    DDL(f'DROP TABLE IF EXISTS {BOOK_SEARCH_TABLE}').execute_if(dialect='sqlite'),
+)
 
 
 def ensure_database_schema() -> tuple[str, ...]:
     inspector = inspect(db.engine)
     missing_tables = [table for table in db.metadata.sorted_tables if not inspector.has_table(table.name)]
-    if not missing_tables:
-        return ()
+    if missing_tables:
+        db.metadata.create_all(bind=db.engine, tables=missing_tables)
+
+    created = tuple(table.name for table in missing_tables)
+    ensure_book_month_number()
+    ensure_book_review_stats()
+    ensure_indexes()
+    if ensure_book_search_index():
+        created += (BOOK_SEARCH_TABLE,)
+    return created
+
+
+def ensure_book_month_number() -> bool:
+    columns = {column['name'] for column in inspect(db.engine).get_columns(Book.__tablename__)}
+    if 'month_number' in columns:
+        return False
+
+    month_numbers = {name.lower(): number for number, name in enumerate(MONTH_NAMES, start=1)}
+    with db.engine.begin() as connection:
+        connection.execute(text('ALTER TABLE book ADD COLUMN month_number INTEGER NOT NULL DEFAULT 0'))
+        connection.execute(
+            Book.__table__.update().values(
+                month_number=case(month_numbers, value=func.lower(func.trim(Book.__table__.c.month)), else_=0)
+            )
+        )
+    logging.info('Added book.month_number and filled it from book.month.')
+    return True
+
+
+def ensure_book_review_stats() -> bool:
+    columns = {column['name'] for column in inspect(db.engine).get_columns(Book.__tablename__)}
+    missing = [name for name in BOOK_REVIEW_STATS_COLUMNS if name not in columns]
+    if not missing:
+        return False
+
+    with db.engine.begin() as connection:
+        for name in missing:
+            column_type = 'REAL' if name == 'rating_average' else 'INTEGER'
+            connection.execute(text(f'ALTER TABLE book ADD COLUMN {name} {column_type} NOT NULL DEFAULT 0'))
+        rebuild_book_review_stats(connection)
+    logging.info('Added book review aggregates (%s) and filled them from review.', ', '.join(missing))
+    return True
+
+
+def rebuild_book_review_stats(connection: Connection) -> int:
+    book = Book.__table__
+    review = Review.__table__
+    stats = (
+        select(
+            review.c.book_id,
+            func.count().label('review_count'),
+            func.sum(review.c.stars).label('review_star_total'),
+            *(
+                func.sum(case((review.c.stars == stars, 1), else_=0)).label(f'review_stars_{stars}')
+                for stars in REVIEW_STARS
+            ),
+            func.avg(review.c.stars).label('rating_average'),
+        )
+        .group_by(review.c.book_id)
+        .subquery('review_stats')
+    )
+    connection.execute(
+        book.update()
+        .where(book.c.id.not_in(select(review.c.book_id)))
+        .values({name: 0 for name in BOOK_REVIEW_STATS_COLUMNS})
+    )
+    result = connection.execute(
+        book.update()
+        .where(book.c.id == stats.c.book_id)
+        .values({name: stats.c[name] for name in BOOK_REVIEW_STATS_COLUMNS})
+    )
+    return result.rowcount
+
+
+def ensure_indexes() -> tuple[str, ...]:
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+    if created:
+        logging.info('Created missing indexes: %s', ', '.join(created))
+    return tuple(created)
+
+
+def ensure_book_search_index() -> bool:
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    if inspect(db.engine).has_table(BOOK_SEARCH_TABLE):
+        ensure_book_search_update_trigger()
+        return False
+
+    rebuild_book_search_index()
+    return True
+
+
+def ensure_book_search_update_trigger() -> bool:
+    # Older databases re-index a book on every update, including review aggregate bumps.
+    trigger_name = f'{BOOK_SEARCH_TABLE}_au'
+    with db.engine.begin() as connection:
+        trigger_sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = :name"),
+            {'name': trigger_name},
+        ).scalar_one_or_none()
+        if trigger_sql is not None and ' UPDATE OF ' in trigger_sql:
+            return False
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {trigger_name}'))
+        connection.execute(text(_BOOK_SEARCH_DDL[-1]))
+    return True
+
 
-    db.metadata.create_all(bind=db.engine, tables=missing_tables)
-    return tuple(table.name for table in missing_tables)
+def rebuild_book_search_index() -> None:
+    with db.engine.begin() as connection:
+        for statement in _BOOK_SEARCH_DDL:
+            connection.execute(text(statement))
+        connection.execute(text(f"INSERT INTO {BOOK_SEARCH_TABLE} ({BOOK_SEARCH_TABLE}) VALUES ('rebuild')"))
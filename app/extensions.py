@@ -1,46 +1,272 @@
 from __future__ import annotations
 
+import logging
+import math
+import random
+import threading
 import time
-from collections.abc import Hashable
+from collections.abc import Callable, Hashable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Any
 
 from flask import Flask
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
 
+from app.cache_backends import CacheBackend, SimpleTTLCache, create_cache_backend
+
 
 db: SQLAlchemy = SQLAlchemy()
 login_manager: LoginManager = LoginManager()
 
 
-class SimpleTTLCache:
-    def __init__(self) -> None:
-        self._store: dict[Hashable, tuple[float | None, Any]] = {}
+@dataclass(slots=True)
+class CachedValue:
+    value: Any
+    fresh_until: float | None
+    compute_seconds: float
+
+    def is_stale(self, now: float) -> bool:
+        return self.fresh_until is not None and self.fresh_until <= now
+
+
+@dataclass(slots=True)
+class _Flight:
+    event: threading.Event = field(default_factory=threading.Event)
+    tags: frozenset[str] = frozenset()
+    touched: set[str] = field(default_factory=set)
+    value: Any = None
+    succeeded: bool = False
+    invalidated: bool = False
+
+
+class ApiCache:
+    def __init__(self, backend: CacheBackend | None = None) -> None:
+        self._backend: CacheBackend = backend or SimpleTTLCache()
+        self._early_refresh_beta = 1.0
+        self._flight_timeout = 10.0
+        self._flights: dict[Hashable, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._coalesced = 0
+        self._early_refreshes = 0
+        self._recomputes = 0
+        self._stale_hits = 0
+        self._background_refreshes = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._revalidate_workers = 2
+
+    @property
+    def backend(self) -> CacheBackend:
+        return self._backend
+
+    @property
+    def is_shared(self) -> bool:
+        return self._backend.shared
 
     def init_app(self, app: Flask) -> None:
-        return None
+        self._backend = create_cache_backend(app.config, instance_path=app.instance_path)
+        self._early_refresh_beta = max(float(app.config.get('CACHE_EARLY_REFRESH_BETA', 1.0) or 0), 0)
+        self._flight_timeout = max(float(app.config.get('CACHE_SINGLE_FLIGHT_TIMEOUT', 10) or 0), 0)
+        self._revalidate_workers = max(int(app.config.get('CACHE_REVALIDATE_WORKERS', 2) or 1), 1)
 
     def get(self, key: Hashable) -> Any | None:
-        item = self._store.get(key)
-        if item is None:
-            return None
+        value = self._backend.get(key)
+        if isinstance(value, CachedValue):
+            return value.value
+        return value
 
-        expires_at, value = item
-        if expires_at is not None and expires_at <= time.time():
-            self._store.pop(key, None)
-            return None
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        timeout: int | float | None = None,
+        *,
+        tags: Iterable[str] = (),
+    ) -> None:
+        self._backend.set(key, value, timeout=timeout, tags=tags)
 
-        return value
+    def get_or_set(
+        self,
+        key: Hashable,
+        factory: Callable[[], Any],
+        timeout: int | float | None = None,
+        *,
+        tags: Iterable[str] = (),
+        stale_timeout: int | float = 0,
+        background_factory: Callable[[], Any] | None = None,
+        value_tags: Callable[[Any], Iterable[str]] | None = None,
+        on_store: Callable[[Any], None] | None = None,
+    ) -> Any:
+        cached = self._backend.get(key)
+        if not isinstance(cached, CachedValue):
+            cached = None
+
+        if cached is not None:
+            if cached.is_stale(time.time()):
+                if background_factory is not None:
+                    self._count('_stale_hits')
+                    self._revalidate_in_background(
+                        key, background_factory, timeout, tags, stale_timeout, value_tags, on_store
+                    )
+                    return cached.value
+            elif not self._should_refresh_early(cached):
+                return cached.value
+
+        flight, is_leader = self._join_flight(key, tags)
+        if not is_leader:
+            if cached is not None and not cached.is_stale(time.time()):
+                return cached.value
+            if flight.event.wait(self._flight_timeout) and flight.succeeded:
+                return flight.value
+            return factory()
 
-    def set(self, key: Hashable, value: Any, timeout: int | float | None = None) -> None:
-        if timeout is None:
-            expires_at = None
-        else:
-            expires_at = time.time() + timeout
-        self._store[key] = (expires_at, value)
+        try:
+            if cached is not None and not cached.is_stale(time.time()):
+                self._count('_early_refreshes')
+            value = self._compute_and_store(key, factory, timeout, flight, stale_timeout, value_tags, on_store)
+            flight.value = value
+            flight.succeeded = True
+            return value
+        finally:
+            self._finish_flight(key, flight)
+
+    def delete(self, key: Hashable) -> bool:
+        return self._backend.delete(key)
+
+    def invalidate_tags(self, *tags: str) -> int:
+        with self._flights_lock:
+            for flight in self._flights.values():
+                if not flight.tags.isdisjoint(tags):
+                    flight.invalidated = True
+                else:
+                    flight.touched.update(tags)
+        return self._backend.invalidate_tags(*tags)
 
     def clear(self) -> None:
-        self._store.clear()
+        self._backend.clear()
+
+    def sweep(self) -> int:
+        return self._backend.sweep()
+
+    def stats(self) -> dict[str, int]:
+        stats = dict(self._backend.stats())
+        with self._flights_lock:
+            stats.update(
+                {
+                    'coalesced': self._coalesced,
+                    'early_refreshes': self._early_refreshes,
+                    'recomputes': self._recomputes,
+                    'stale_hits': self._stale_hits,
+                    'background_refreshes': self._background_refreshes,
+                    'in_flight': len(self._flights),
+                }
+            )
+        return stats
+
+    def _join_flight(self, key: Hashable, tags: Iterable[str]) -> tuple[_Flight, bool]:
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._coalesced += 1
+                return flight, False
+            flight = _Flight(tags=frozenset(tags))
+            self._flights[key] = flight
+            return flight, True
+
+    def _finish_flight(self, key: Hashable, flight: _Flight) -> None:
+        with self._flights_lock:
+            self._flights.pop(key, None)
+        flight.event.set()
+
+    def _revalidate_in_background(
+        self,
+        key: Hashable,
+        factory: Callable[[], Any],
+        timeout: int | float | None,
+        tags: Iterable[str],
+        stale_timeout: int | float,
+        value_tags: Callable[[Any], Iterable[str]] | None = None,
+        on_store: Callable[[Any], None] | None = None,
+    ) -> None:
+        flight, is_leader = self._join_flight(key, tags)
+        if not is_leader:
+            return
+
+        def revalidate() -> None:
+            try:
+                flight.value = self._compute_and_store(
+                    key, factory, timeout, flight, stale_timeout, value_tags, on_store
+                )
+                flight.succeeded = True
+                self._count('_background_refreshes')
+            except Exception:
+                logging.exception('Background refresh failed for cache key %r.', key)
+            finally:
+                self._finish_flight(key, flight)
+
+        try:
+            self._revalidate_executor().submit(revalidate)
+        except RuntimeError:
+            self._finish_flight(key, flight)
+
+    def _revalidate_executor(self) -> ThreadPoolExecutor:
+        with self._flights_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._revalidate_workers,
+                    thread_name_prefix='api-cache-revalidate',
+                )
+            return self._executor
+
+    def _compute_and_store(
+        self,
+        key: Hashable,
+        factory: Callable[[], Any],
+        timeout: int | float | None,
+        flight: _Flight,
+        stale_timeout: int | float = 0,
+        value_tags: Callable[[Any], Iterable[str]] | None = None,
+        on_store: Callable[[Any], None] | None = None,
+    ) -> Any:
+        started_at = time.monotonic()
+        value = factory()
+        compute_seconds = time.monotonic() - started_at
+        self._count('_recomputes')
+
+        tags = flight.tags
+        if value_tags is not None:
+            # Tags that depend on the computed value (e.g. the rows on a page) could not guard the flight
+            # up front, so any of them touched while computing also discards the result.
+            tags = tags | frozenset(value_tags(value))
+            with self._flights_lock:
+                if not flight.touched.isdisjoint(tags):
+                    flight.invalidated = True
+        if flight.invalidated:
+            return value
+
+        fresh_until = None if timeout is None else time.time() + timeout
+        hard_timeout = None if timeout is None else timeout + max(stale_timeout, 0)
+        cached = CachedValue(value, fresh_until, compute_seconds)
+        self._backend.set(key, cached, timeout=hard_timeout, tags=tags)
+        if on_store is not None:
+            # Runs only for results that were kept, so nothing derived from a discarded result survives it.
+            on_store(value)
+        return value
+
+    def _should_refresh_early(self, cached: CachedValue) -> bool:
+        # XFetch: the closer an entry is to going stale and the longer it took to build,
+        # the more likely a request refreshes it ahead of time.
+        if cached.fresh_until is None or not self._early_refresh_beta:
+            return False
+        jitter = cached.compute_seconds * self._early_refresh_beta * -math.log(1.0 - random.random())
+        return time.time() + jitter >= cached.fresh_until
+
+    def _count(self, counter: str) -> None:
+        with self._flights_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
 
+cache: ApiCache = ApiCache()
 
-cache: SimpleTTLCache = SimpleTTLCache()
+__all__ = ['ApiCache', 'CachedValue', 'SimpleTTLCache', 'cache', 'db', 'login_manager']
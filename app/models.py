@@ -3,11 +3,38 @@ from __future__ import annotations
 from datetime import datetime
 
 from flask_login import UserMixin
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String
-from sqlalchemy.orm import DynamicMapped, Mapped, mapped_column, relationship
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String
+from sqlalchemy.engine.default import DefaultExecutionContext
+from sqlalchemy.orm import DynamicMapped, Mapped, mapped_column, relationship, validates
 
 from app.extensions import db
+from app.password_hashing import password_hasher
+
+
+MONTH_NAMES = (
+    'January',
+    'February',
+    'March',
+    'April',
+    'May',
+    'June',
+    'July',
+    'August',
+    'September',
+    'October',
+    'November',
+    'December',
+)
+_MONTH_NUMBERS = {name.casefold(): number for number, name in enumerate(MONTH_NAMES, start=1)}
+REVIEW_STARS = (1, 2, 3, 4, 5)
+
+
+def month_number(month: str | None) -> int:
+    return _MONTH_NUMBERS.get((month or '').strip().casefold(), 0)
+
+
+def _default_month_number(context: DefaultExecutionContext) -> int:
+    return month_number(context.get_current_parameters().get('month'))
 
 
 class Book(db.Model):
@@ -22,9 +49,18 @@ class Book(db.Model):
     first_publication: Mapped[str] = mapped_column(String(120), index=True, nullable=False, default='')
     genre: Mapped[str] = mapped_column(String(160), index=True, nullable=False, default='')
     month: Mapped[str] = mapped_column(String(20), index=True)
+    month_number: Mapped[int] = mapped_column(Integer, nullable=False, default=_default_month_number, server_default='0')
     year: Mapped[int] = mapped_column(Integer, index=True)
     cover_image: Mapped[str] = mapped_column(String(255), nullable=False, default='book_covers/default.svg')
     is_hidden: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, index=True)
+    review_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    review_star_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    review_stars_1: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    review_stars_2: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    review_stars_3: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    review_stars_4: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    review_stars_5: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    rating_average: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default='0')
 
     reviews: DynamicMapped[Review] = relationship(
         back_populates='book',
@@ -40,6 +76,30 @@ class Book(db.Model):
     def __repr__(self) -> str:
         return f'Book(id={self.id}, month={self.month!r}, year={self.year!r})'
 
+    @property
+    def review_histogram(self) -> dict[int, int]:
+        return {stars: getattr(self, f'review_stars_{stars}') or 0 for stars in REVIEW_STARS}
+
+    @validates('month')
+    def _sync_month_number(self, key: str, value: str) -> str:
+        self.month_number = month_number(value)
+        return value
+
+
+# Match the catalogue order (year desc, month, title, id) so listings stream pages from the index.
+Index('ix_book_listing', Book.year.desc(), Book.month_number, Book.title)
+Index('ix_book_visible_listing', Book.is_hidden, Book.year.desc(), Book.month_number, Book.title)
+Index('ix_book_rating', Book.rating_average.desc(), Book.review_count.desc(), Book.year.desc(), Book.month_number, Book.title)
+Index(
+    'ix_book_visible_rating',
+    Book.is_hidden,
+    Book.rating_average.desc(),
+    Book.review_count.desc(),
+    Book.year.desc(),
+    Book.month_number,
+    Book.title,
+)
+
 
 class Reader(UserMixin, db.Model):
     __tablename__ = 'reader'
@@ -72,12 +132,17 @@ class Reader(UserMixin, db.Model):
         return f'Reader(id={self.id}, email={self.email!r})'
 
     def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
         if not self.password_hash:
             return False
-        return check_password_hash(self.password_hash, password)
+        if not password_hasher.verify(self.password_hash, password):
+            return False
+        upgraded = password_hasher.upgrade(self.password_hash, password)
+        if upgraded is not None:
+            self.password_hash = upgraded
+        return True
 
 
 class Review(db.Model):
@@ -96,6 +161,9 @@ class Review(db.Model):
         return f'Review(id={self.id}, stars={self.stars}, book_id={self.book_id})'
 
 
+Index('ix_review_book_feed', Review.book_id, Review.id)
+
+
 class Annotation(db.Model):
     __tablename__ = 'annotation'
 
@@ -111,6 +179,9 @@ class Annotation(db.Model):
         return f'Annotation(reviewer_id={self.reviewer_id}, book_id={self.book_id}, text={self.text!r})'
 
 
+Index('ix_annotation_book_feed', Annotation.book_id, Annotation.id)
+
+
 class RefreshTokenSession(db.Model):
     __tablename__ = 'refresh_token_session'
 
@@ -130,3 +201,14 @@ class RefreshTokenSession(db.Model):
 
     def __repr__(self) -> str:
         return f'RefreshTokenSession(id={self.id}, user_id={self.user_id}, session_id={self.session_id!r})'
+
+
+class JobLease(db.Model):
+    __tablename__ = 'job_lease'
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(64))
+    expires_at: Mapped[datetime] = mapped_column(DateTime())
+
+    def __repr__(self) -> str:
+        return f'JobLease(name={self.name!r}, holder={self.holder!r}, expires_at={self.expires_at!r})'
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any
+
+from flask import Flask
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from app.services.exceptions import ServiceUnavailableError
+
+_LATENCY_SAMPLES = 1024
+DEFAULT_PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+_CALIBRATION_PASSWORD = 'calibration-password'
+
+
+def normalize_password_method(method: str) -> str:
+    name, *args = method.strip().split(':')
+    if name == 'scrypt':
+        if not args:
+            return DEFAULT_PASSWORD_HASH_METHOD
+        if len(args) != 3:
+            raise ValueError("'scrypt' takes 3 arguments.")
+        n, r, p = map(int, args)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2':
+        if len(args) > 2:
+            raise ValueError("'pbkdf2' takes 2 arguments.")
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f'Invalid hash method {method!r}.')
+
+
+def calibration_candidates(algorithm: str) -> list[str]:
+    if algorithm == 'scrypt':
+        return [f'scrypt:{2 ** exponent}:8:1' for exponent in range(14, 18)]
+    if algorithm == 'pbkdf2':
+        return [f'pbkdf2:sha256:{100_000 * 2 ** step}' for step in range(7)]
+    raise ValueError(f'Invalid hash algorithm {algorithm!r}.')
+
+
+def measure_verify_seconds(method: str, *, samples: int = 3) -> float:
+    password_hash = generate_password_hash(_CALIBRATION_PASSWORD, method=method)
+    best = float('inf')
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        check_password_hash(password_hash, _CALIBRATION_PASSWORD)
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = 0, max_queue: int = 0, method: str = DEFAULT_PASSWORD_HASH_METHOD) -> None:
+        self._method = normalize_password_method(method)
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_pid: int | None = None
+        self._latencies: dict[str, deque[float]] = {
+            'hash': deque(maxlen=_LATENCY_SAMPLES),
+            'verify': deque(maxlen=_LATENCY_SAMPLES),
+        }
+        self._counts = {'hash': 0, 'verify': 0}
+        self._rejected = 0
+        self._in_flight = 0
+        self._upgraded = 0
+        self._upgrades_skipped = 0
+        self._configure(workers, max_queue)
+
+    @property
+    def method(self) -> str:
+        return self._method
+
+    def init_app(self, app: Flask) -> None:
+        self.shutdown()
+        method = str(app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_PASSWORD_HASH_METHOD)
+        try:
+            self._method = normalize_password_method(method)
+        except ValueError:
+            logging.warning('Invalid PASSWORD_HASH_METHOD=%r. Falling back to %s.', method, DEFAULT_PASSWORD_HASH_METHOD)
+            self._method = DEFAULT_PASSWORD_HASH_METHOD
+        self._configure(
+            max(int(app.config.get('PASSWORD_HASH_WORKERS', 2) or 0), 0),
+            max(int(app.config.get('PASSWORD_HASH_MAX_QUEUE', 8) or 0), 0),
+        )
+
+    def hash(self, password: str) -> str:
+        return self._run('hash', generate_password_hash, password, self._method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run('verify', check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return password_hash.partition('$')[0] != self._method
+
+    def upgrade(self, password_hash: str, password: str) -> str | None:
+        if not self.needs_rehash(password_hash):
+            return None
+        try:
+            upgraded = self.hash(password)
+        except ServiceUnavailableError:
+            with self._lock:
+                self._upgrades_skipped += 1
+            return None
+        with self._lock:
+            self._upgraded += 1
+        return upgraded
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._executor_pid == os.getpid():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats: dict[str, Any] = {
+                'method': self._method,
+                'workers': self._workers,
+                'max_queue': self._max_queue,
+                'in_flight': self._in_flight,
+                'rejected': self._rejected,
+                'upgraded': self._upgraded,
+                'upgrades_skipped': self._upgrades_skipped,
+            }
+            for operation, samples in self._latencies.items():
+                ordered = sorted(samples)
+                stats[operation] = {
+                    'count': self._counts[operation],
+                    'p50_ms': round(ordered[len(ordered) // 2] * 1000, 2) if ordered else None,
+                    'p95_ms': round(ordered[int(len(ordered) * 0.95)] * 1000, 2) if ordered else None,
+                    'max_ms': round(ordered[-1] * 1000, 2) if ordered else None,
+                }
+            return stats
+
+    def _configure(self, workers: int, max_queue: int) -> None:
+        self._workers = workers
+        self._max_queue = max_queue
+        self._slots = threading.BoundedSemaphore(workers + max_queue) if workers else None
+
+    def _run(self, operation: str, function: Callable[..., Any], *args: Any) -> Any:
+        started_at = time.perf_counter()
+        slots = self._slots
+        if slots is None:
+            result = function(*args)
+        else:
+            if not slots.acquire(blocking=False):
+                with self._lock:
+                    self._rejected += 1
+                logging.warning('Password hashing pool saturated (%s in flight); rejecting %s.', self._in_flight, operation)
+                raise ServiceUnavailableError('Too many sign-in attempts right now. Please try again in a moment.')
+            with self._lock:
+                self._in_flight += 1
+            try:
+                result = self._submit(function, *args)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                slots.release()
+
+        with self._lock:
+            self._counts[operation] += 1
+            self._latencies[operation].append(time.perf_counter() - started_at)
+        return result
+
+    def _submit(self, function: Callable[..., Any], *args: Any) -> Any:
+        executor = self._pool()
+        try:
+            return executor.submit(function, *args).result()
+        except BrokenProcessPool:
+            logging.warning('Password hashing pool broke; restarting it.', exc_info=True)
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            return function(*args)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else None)
+                self._executor = ProcessPoolExecutor(max_workers=self._workers, mp_context=context)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+
+password_hasher: PasswordHasher = PasswordHasher()
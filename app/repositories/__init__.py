@@ -1,5 +1,6 @@
 from app.repositories.annotation_repository import AnnotationRepository
 from app.repositories.book_repository import BookRepository
+from app.repositories.job_lease_repository import JobLeaseRepository
 from app.repositories.refresh_token_repository import RefreshTokenRepository
 from app.repositories.reader_repository import ReaderRepository
 from app.repositories.review_repository import ReviewRepository
@@ -7,6 +8,7 @@ from app.repositories.review_repository import ReviewRepository
 __all__ = [
     'AnnotationRepository',
     'BookRepository',
+    'JobLeaseRepository',
     'RefreshTokenRepository',
     'ReaderRepository',
     'ReviewRepository',
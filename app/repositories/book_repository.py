@@ -1,17 +1,106 @@
 from __future__ import annotations
 
-from flask_sqlalchemy.pagination import Pagination
-from sqlalchemy import String, and_, cast, or_, select
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from collections.abc import Callable
+
+from flask_sqlalchemy.pagination import Pagination, SelectPagination
+from sqlalchemy import Float, String, and_, case, cast, func, literal_column, or_, select, update
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import Select
+from sqlalchemy.sql import ColumnElement, Select, column, table
 
-from app.extensions import db
+from app.db_schema import BOOK_SEARCH_COLUMNS, BOOK_SEARCH_TABLE, rebuild_book_review_stats
 from app.models import Book
+from app.search_index import BookSearchIndex
+
+SEARCH_MODE_FTS = 'fts'
+SEARCH_MODE_LIKE = 'like'
+SEARCH_MODE_MEMORY = 'memory'
+SEARCH_MODES = (SEARCH_MODE_FTS, SEARCH_MODE_LIKE, SEARCH_MODE_MEMORY)
+
+BOOK_SORT_CATALOGUE = 'catalogue'
+BOOK_SORT_RATING = 'rating'
+BOOK_SORTS = (BOOK_SORT_CATALOGUE, BOOK_SORT_RATING)
+
+# bm25() weights in BOOK_SEARCH_COLUMNS order: title and author matches rank first.
+_BOOK_SEARCH_WEIGHTS = (10.0, 5.0, 5.0, 1.0, 1.0, 1.0, 2.0, 1.0, 1.0)
+_FTS_TOKEN_PATTERN = re.compile(r'[^\W_]')
+
+book_search = table(BOOK_SEARCH_TABLE, column('rowid'), *(column(name) for name in BOOK_SEARCH_COLUMNS))
+
+BookSortKey = tuple[int, int, str, int]
+
+_CATALOGUE_ORDER = (Book.year.desc(), Book.month_number.asc(), Book.title.asc(), Book.id.asc())
+_RATING_ORDER = (Book.rating_average.desc(), Book.review_count.desc(), *_CATALOGUE_ORDER)
+
+
+@dataclass(slots=True)
+class BookKeysetPage:
+    items: list[Book]
+    has_next: bool
+
+
+def book_sort_key(book: Book) -> BookSortKey:
+    return (book.year, book.month_number, book.title, book.id)
+
+
+class BookIdPagination(Pagination):
+    def _query_items(self) -> list[Book]:
+        page_ids = self._query_args['book_ids'][self._query_offset : self._query_offset + self.per_page]
+        return self._query_args['repository']._get_many_in_order(
+            page_ids, include_hidden=self._query_args['include_hidden']
+        )
+
+    def _query_count(self) -> int:
+        return len(self._query_args['book_ids'])
+
+    @property
+    def has_next(self) -> bool:
+        return self._query_offset + self.per_page < len(self._query_args['book_ids'])
+
+
+class BookSelectPagination(SelectPagination):
+    # Reads one extra row so has_next is known even when the total count is skipped.
+    def _query_items(self) -> list[Book]:
+        statement = self._query_args['select'].limit(self.per_page + 1).offset(self._query_offset)
+        items = list(self._query_args['session'].execute(statement).unique().scalars())
+        self._has_more = len(items) > self.per_page
+        return items[: self.per_page]
+
+    def _query_count(self) -> int:
+        counter = self._query_args.get('counter')
+        if counter is not None:
+            return counter()
+        return super()._query_count()
+
+    @property
+    def has_next(self) -> bool:
+        return self._has_more
 
 
 class BookRepository:
-    def __init__(self, session: Session) -> None:
+    def __init__(
+        self,
+        session: Session,
+        *,
+        search_mode: str = SEARCH_MODE_LIKE,
+        search_index: BookSearchIndex | None = None,
+    ) -> None:
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f'Unknown book search mode: {search_mode!r}.')
         self._session = session
+        self._search_mode = search_mode
+        self._search_index = search_index
+
+    @property
+    def search_mode(self) -> str:
+        return self._search_mode
+
+    @property
+    def search_index(self) -> BookSearchIndex | None:
+        return self._search_index
 
     def build_search_statement(self, search_query: str = '', *, include_hidden: bool = True) -> Select:
         statement = select(Book)
@@ -19,30 +108,32 @@ class BookRepository:
         if not include_hidden:
             statement = statement.where(Book.is_hidden.is_(False))
 
-        if not search_query:
+        terms = [term for term in search_query.split() if term]
+        if not terms:
             return statement
 
-        terms = [term for term in search_query.split() if term]
-        term_filters = []
+        if self._uses_search_index(terms):
+            return statement.where(Book.id.in_(self._search_index.search(search_query, include_hidden=include_hidden)))
 
-        for term in terms:
-            lookup = f'%{term}%'
-            term_filters.append(
-                or_(
-                    Book.title.ilike(lookup),
-                    Book.author_name.ilike(lookup),
-                    Book.author_surname.ilike(lookup),
-                    Book.original_language.ilike(lookup),
-                    Book.translation_language.ilike(lookup),
-                    Book.first_publication.ilike(lookup),
-                    Book.genre.ilike(lookup),
-                    Book.month.ilike(lookup),
-                    cast(Book.year, String).ilike(lookup),
+        if self._search_mode == SEARCH_MODE_FTS:
+            match_query = self._fts_match_query(terms)
+            if match_query:
+                # Materialized so SQLite runs the MATCH once instead of probing the index per book row.
+                matches = (
+                    select(
+                        book_search.c.rowid.label('book_id'),
+                        func.bm25(literal_column(BOOK_SEARCH_TABLE), *_BOOK_SEARCH_WEIGHTS).label('rank'),
+                    )
+                    .where(literal_column(BOOK_SEARCH_TABLE).op('MATCH')(match_query))
+                    .cte('book_search_matches')
+                    .prefix_with('MATERIALIZED')
                 )
-            )
+                statement = statement.join(matches, matches.c.book_id == Book.id).order_by(matches.c.rank)
+            # Punctuation-only terms have no FTS tokens, so they keep the substring semantics.
+            terms = [term for term in terms if not _FTS_TOKEN_PATTERN.search(term)]
 
-        if term_filters:
-            statement = statement.where(and_(*term_filters))
+        if terms:
+            statement = statement.where(and_(*(self._like_filter(term) for term in terms)))
 
         return statement
 
@@ -53,10 +144,70 @@ class BookRepository:
         page: int = 1,
         per_page: int = 10,
         include_hidden: bool = True,
+        count: bool = True,
+        counter: Callable[[], int] | None = None,
+        sort: str = BOOK_SORT_CATALOGUE,
     ) -> Pagination:
+        if sort not in BOOK_SORTS:
+            raise ValueError(f'Unknown book sort: {sort!r}.')
+
+        if sort == BOOK_SORT_CATALOGUE and self._uses_search_index(search_query.split()):
+            return BookIdPagination(
+                page=page,
+                per_page=per_page,
+                max_per_page=None,
+                error_out=False,
+                count=count,
+                book_ids=self._search_index.search(search_query, include_hidden=include_hidden),
+                repository=self,
+                include_hidden=include_hidden,
+            )
+
         statement = self.build_search_statement(search_query, include_hidden=include_hidden)
-        statement = statement.order_by(Book.year.desc(), Book.month.asc(), Book.title.asc())
-        return db.paginate(statement, page=page, per_page=per_page, error_out=False)
+        if sort == BOOK_SORT_RATING:
+            statement = statement.order_by(None).order_by(*_RATING_ORDER)
+        else:
+            statement = statement.order_by(*_CATALOGUE_ORDER)
+        return BookSelectPagination(
+            page=page,
+            per_page=per_page,
+            max_per_page=None,
+            error_out=False,
+            count=count,
+            select=statement,
+            session=self._session,
+            counter=counter,
+        )
+
+    def paginate_after(
+        self,
+        search_query: str = '',
+        *,
+        after: BookSortKey | None = None,
+        per_page: int = 10,
+        include_hidden: bool = True,
+    ) -> BookKeysetPage:
+        if self._uses_search_index(search_query.split()):
+            book_ids = self._search_index.search(search_query, include_hidden=include_hidden)
+            start = 0
+            if after is not None:
+                year, month_number, title, book_id = after
+                start = bisect_right(book_ids, (-year, month_number, title, book_id), key=self._search_index.sort_key)
+            books = self._get_many_in_order(book_ids[start : start + per_page + 1], include_hidden=include_hidden)
+        else:
+            statement = self.build_search_statement(search_query, include_hidden=include_hidden).order_by(None)
+            if after is not None:
+                statement = statement.where(self._after_filter(after))
+            statement = statement.order_by(*_CATALOGUE_ORDER)
+            books = list(self._session.execute(statement.limit(per_page + 1)).scalars())
+
+        return BookKeysetPage(items=books[:per_page], has_next=len(books) > per_page)
+
+    def count(self, search_query: str = '', *, include_hidden: bool = True) -> int:
+        if self._uses_search_index(search_query.split()):
+            return len(self._search_index.search(search_query, include_hidden=include_hidden))
+        statement = self.build_search_statement(search_query, include_hidden=include_hidden).order_by(None)
+        return self._session.execute(select(func.count()).select_from(statement.subquery())).scalar_one()
 
     def get_by_id(self, book_id: int, *, include_hidden: bool = True) -> Book | None:
         statement = select(Book).where(Book.id == book_id)
@@ -70,3 +221,91 @@ class BookRepository:
 
     def add(self, book: Book) -> None:
         self._session.add(book)
+
+    def apply_review_stars(self, book_id: int, *, added: int | None = None, removed: int | None = None) -> None:
+        if added == removed:
+            return
+
+        count_delta = (added is not None) - (removed is not None)
+        total_delta = (added or 0) - (removed or 0)
+        review_count = Book.review_count + count_delta
+        star_total = Book.review_star_total + total_delta
+        values = {
+            Book.review_count: review_count,
+            Book.review_star_total: star_total,
+            Book.rating_average: case((review_count > 0, cast(star_total, Float) / review_count), else_=0.0),
+        }
+        for stars, delta in ((added, 1), (removed, -1)):
+            if stars is not None:
+                histogram_column = getattr(Book, f'review_stars_{stars}')
+                values[histogram_column] = histogram_column + delta
+        statement = update(Book).where(Book.id == book_id).values(values)
+        self._session.execute(statement, execution_options={'synchronize_session': False})
+
+    def rebuild_review_stats(self) -> int:
+        return rebuild_book_review_stats(self._session.connection())
+
+    def _get_many_in_order(self, book_ids: list[int], *, include_hidden: bool = True) -> list[Book]:
+        if not book_ids:
+            return []
+        statement = select(Book).where(Book.id.in_(book_ids))
+        if not include_hidden:
+            # The index only learns about hides committed through the ORM session.
+            statement = statement.where(Book.is_hidden.is_(False))
+        books = {book.id: book for book in self._session.execute(statement).scalars()}
+        return [books[book_id] for book_id in book_ids if book_id in books]
+
+    @staticmethod
+    def _after_filter(after: BookSortKey) -> ColumnElement[bool]:
+        year, month_number, title, book_id = after
+        # The leading year bound lets SQLite seek into ix_book_listing instead of scanning from the start.
+        return and_(
+            Book.year <= year,
+            or_(
+                Book.year < year,
+                and_(
+                    Book.year == year,
+                    or_(
+                        Book.month_number > month_number,
+                        and_(
+                            Book.month_number == month_number,
+                            or_(Book.title > title, and_(Book.title == title, Book.id > book_id)),
+                        ),
+                    ),
+                ),
+            ),
+        )
+
+    def _uses_search_index(self, terms: list[str]) -> bool:
+        # Punctuation-only terms have no index tokens, so such queries keep the SQL substring scan.
+        return (
+            self._search_mode == SEARCH_MODE_MEMORY
+            and self._search_index is not None
+            and self._search_index.is_loaded
+            and bool(terms)
+            and all(_FTS_TOKEN_PATTERN.search(term) for term in terms)
+        )
+
+    @staticmethod
+    def _fts_match_query(terms: list[str]) -> str:
+        phrases = []
+        for term in terms:
+            if _FTS_TOKEN_PATTERN.search(term):
+                escaped = term.replace('"', '""')
+                phrases.append(f'"{escaped}"*')
+        return ' '.join(phrases)
+
+    @staticmethod
+    def _like_filter(term: str) -> ColumnElement[bool]:
+        lookup = f'%{term}%'
+        return or_(
+            Book.title.ilike(lookup),
+            Book.author_name.ilike(lookup),
+            Book.author_surname.ilike(lookup),
+            Book.original_language.ilike(lookup),
+            Book.translation_language.ilike(lookup),
+            Book.first_publication.ilike(lookup),
+            Book.genre.ilike(lookup),
+            Book.month.ilike(lookup),
+            cast(Book.year, String).ilike(lookup),
+        )
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.models import JobLease
+
+
+class JobLeaseRepository:
+    def __init__(self, session: Session) -> None:
+        self._session = session
+
+    def take_expired(self, name: str, holder: str, *, now: datetime, until: datetime) -> bool:
+        taken = self._session.execute(
+            update(JobLease)
+            .where(JobLease.name == name, JobLease.expires_at <= now)
+            .values(holder=holder, expires_at=until),
+            execution_options={'synchronize_session': False},
+        )
+        return bool(taken.rowcount)
+
+    def add(self, name: str, holder: str, *, until: datetime) -> None:
+        """Insert the named lease; raises ``IntegrityError`` when another holder already has a row."""
+        self._session.execute(insert(JobLease).values(name=name, holder=holder, expires_at=until))
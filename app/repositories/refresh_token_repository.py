@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, or_, select, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
 from app.models import RefreshTokenSession
@@ -16,3 +19,84 @@ class RefreshTokenRepository:
 
     def add(self, token_session: RefreshTokenSession) -> None:
         self._session.add(token_session)
+
+    def revoked_since(self, since: datetime) -> list[tuple[str, datetime]]:
+        statement = select(RefreshTokenSession.session_id, RefreshTokenSession.revoked_at).where(
+            RefreshTokenSession.revoked_at > since
+        )
+        return [(row.session_id, row.revoked_at) for row in self._session.execute(statement)]
+
+    def prunable_ids(self, *, expired_before: datetime, revoked_before: datetime, limit: int) -> list[int]:
+        statement = (
+            select(RefreshTokenSession.id)
+            .where(
+                or_(
+                    RefreshTokenSession.expires_at <= expired_before,
+                    RefreshTokenSession.revoked_at <= revoked_before,
+                )
+            )
+            .order_by(RefreshTokenSession.id)
+            .limit(limit)
+        )
+        return list(self._session.scalars(statement))
+
+    def delete_ids(self, ids: list[int]) -> int:
+        result = self._session.execute(delete(RefreshTokenSession).where(RefreshTokenSession.id.in_(ids)))
+        return result.rowcount
+
+    def active_over_limit(self, *, per_reader: int, now: datetime) -> list[RefreshTokenSession]:
+        rank = (
+            func.row_number()
+            .over(
+                partition_by=RefreshTokenSession.user_id,
+                order_by=(
+                    func.coalesce(RefreshTokenSession.last_used_at, RefreshTokenSession.created_at).desc(),
+                    RefreshTokenSession.id.desc(),
+                ),
+            )
+            .label('rank')
+        )
+        ranked = (
+            select(RefreshTokenSession.id, rank)
+            .where(RefreshTokenSession.revoked_at.is_(None), RefreshTokenSession.expires_at > now)
+            .subquery()
+        )
+        statement = (
+            select(RefreshTokenSession)
+            .join(ranked, ranked.c.id == RefreshTokenSession.id)
+            .where(ranked.c.rank > per_reader)
+            .order_by(RefreshTokenSession.id)
+        )
+        return list(self._session.scalars(statement))
+
+    def table_stats(self, now: datetime) -> dict[str, int | None]:
+        revoked = RefreshTokenSession.revoked_at.is_not(None)
+        row = self._session.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(case((revoked, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((~revoked & (RefreshTokenSession.expires_at <= now), 1), else_=0)), 0),
+            )
+        ).one()
+        return {
+            'rows': row[0],
+            'active': row[0] - row[1] - row[2],
+            'revoked': row[1],
+            'expired': row[2],
+            'bytes': self._table_bytes(),
+        }
+
+    def _table_bytes(self) -> int | None:
+        if self._session.get_bind().dialect.name != 'sqlite':
+            return None
+        try:
+            return self._session.execute(
+                text(
+                    'SELECT SUM(pgsize) FROM dbstat WHERE name IN '
+                    '(SELECT name FROM sqlite_master WHERE tbl_name = :table_name)'
+                ),
+                {'table_name': RefreshTokenSession.__tablename__},
+            ).scalar()
+        except OperationalError:
+            self._session.rollback()
+            return None
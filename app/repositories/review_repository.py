@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.models import Review
 
@@ -11,7 +11,19 @@ class ReviewRepository:
         self._session = session
 
     def list_for_book_desc(self, book_id: int) -> list[Review]:
-        statement = select(Review).filter_by(book_id=book_id).order_by(Review.id.desc())
+        statement = (
+            select(Review)
+            .filter_by(book_id=book_id)
+            .options(joinedload(Review.reviewer))
+            .order_by(Review.id.desc())
+        )
+        return list(self._session.execute(statement).scalars().all())
+
+    def list_for_book_page(self, book_id: int, *, before_id: int | None = None, limit: int = 10) -> list[Review]:
+        statement = select(Review).filter_by(book_id=book_id)
+        if before_id is not None:
+            statement = statement.where(Review.id < before_id)
+        statement = statement.options(joinedload(Review.reviewer)).order_by(Review.id.desc()).limit(limit)
         return list(self._session.execute(statement).scalars().all())
 
     def get_by_id(self, review_id: int) -> Review | None:
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import logging
+import re
+import sys
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from flask import Flask
+from sqlalchemy import Row, event, select
+from sqlalchemy.orm import Session
+
+from app.extensions import cache, db
+from app.services.resource_versions import BOOK_LIST_RESOURCE, ResourceVersions
+
+if TYPE_CHECKING:
+    from app.models import Book
+
+_TOKEN_PATTERN = re.compile(r'[^\W_]+')
+_COMBINING_MARKS_PATTERN = re.compile('[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]')
+_PENDING_KEY = 'book_search_index_pending'
+
+
+def tokenize(value: Any) -> list[str]:
+    folded = str(value).casefold()
+    if not folded.isascii():
+        folded = _COMBINING_MARKS_PATTERN.sub('', unicodedata.normalize('NFKD', folded))
+    return _TOKEN_PATTERN.findall(folded)
+
+
+@dataclass(slots=True, frozen=True)
+class BookSearchDocument:
+    tokens: tuple[str, ...]
+    is_hidden: bool
+    sort_key: tuple[int, int, str]
+
+    @classmethod
+    def from_book(cls, book: Book | Row[Any]) -> BookSearchDocument:
+        values = (
+            book.title,
+            book.author_name,
+            book.author_surname,
+            book.original_language,
+            book.translation_language,
+            book.first_publication,
+            book.genre,
+            book.month,
+            book.year,
+        )
+        tokens = set(tokenize(' '.join(str(value) for value in values if value is not None)))
+        return cls(
+            tokens=tuple(sys.intern(token) for token in tokens),
+            is_hidden=bool(book.is_hidden),
+            sort_key=(-(book.year or 0), book.month_number or 0, book.title or ''),
+        )
+
+
+class BookSearchIndex:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._documents: dict[int, BookSearchDocument] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._sorted_tokens: list[str] | None = None
+        self._loaded = False
+        self._stamp: str | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def init_app(self, app: Flask) -> None:
+        if str(app.config.get('BOOK_SEARCH_MODE', '')).strip().lower() != 'memory':
+            return
+        if not cache.is_shared:
+            logging.warning(
+                'BOOK_SEARCH_MODE=memory needs a shared CACHE_TYPE (SQLiteCache or RedisCache) '
+                'to see other workers\' writes. Falling back to the SQL search.'
+            )
+            return
+        self.attach()
+        with app.app_context():
+            self.sync(ResourceVersions(cache).ensure([BOOK_LIST_RESOURCE])[0])
+
+    def attach(self) -> None:
+        if not event.contains(db.session, 'after_flush', self._collect_flushed_books):
+            event.listen(db.session, 'after_flush', self._collect_flushed_books)
+            event.listen(db.session, 'after_commit', self._apply_committed_books)
+            event.listen(db.session, 'after_rollback', self._discard_pending_books)
+
+    def detach(self) -> None:
+        if event.contains(db.session, 'after_flush', self._collect_flushed_books):
+            event.remove(db.session, 'after_flush', self._collect_flushed_books)
+            event.remove(db.session, 'after_commit', self._apply_committed_books)
+            event.remove(db.session, 'after_rollback', self._discard_pending_books)
+
+    def sync(self, stamp: str) -> None:
+        """Rebuild the index unless it already reflects the given ``book-list`` stamp.
+
+        Commits made through another worker's session never reach this process's
+        session events. ``init_app`` only loads the index when the cache backend
+        is shared, so every worker's ``BookService`` writes move the same stamp.
+        """
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            self.rebuild()
+            self._stamp = stamp
+
+    def advance(self, previous_stamp: str | None, stamp: str) -> None:
+        with self._lock:
+            if self._loaded and previous_stamp is not None and previous_stamp == self._stamp:
+                self._stamp = stamp
+
+    def rebuild(self) -> None:
+        from app.models import Book
+
+        rows = db.session.execute(
+            select(
+                Book.id,
+                Book.title,
+                Book.author_name,
+                Book.author_surname,
+                Book.original_language,
+                Book.translation_language,
+                Book.first_publication,
+                Book.genre,
+                Book.month,
+                Book.month_number,
+                Book.year,
+                Book.is_hidden,
+            )
+        )
+        self.load((row.id, BookSearchDocument.from_book(row)) for row in rows)
+        stats = self.stats()
+        logging.info(
+            'Book search index built: %s books, %s tokens, ~%s bytes.',
+            stats['books'],
+            stats['tokens'],
+            stats['approx_bytes'],
+        )
+
+    def load(self, documents: Iterable[tuple[int, BookSearchDocument]]) -> None:
+        with self._lock:
+            self._documents = {}
+            self._postings = {}
+            for book_id, document in documents:
+                self._add(book_id, document)
+            self._sorted_tokens = None
+            self._loaded = True
+            self._stamp = None
+
+    def replace(self, book_id: int, document: BookSearchDocument | None) -> None:
+        with self._lock:
+            self._remove(book_id)
+            if document is not None:
+                self._add(book_id, document)
+
+    def search(self, search_query: str, *, include_hidden: bool = True) -> list[int]:
+        query_tokens = sorted(set(tokenize(search_query)))
+        with self._lock:
+            matched: set[int] | None = None
+            for token in query_tokens:
+                token_matches = self._prefix_matches(token)
+                matched = token_matches if matched is None else matched & token_matches
+                if not matched:
+                    return []
+            if matched is None:
+                matched = set(self._documents)
+            if not include_hidden:
+                matched = {book_id for book_id in matched if not self._documents[book_id].is_hidden}
+            return sorted(matched, key=self.sort_key)
+
+    def sort_key(self, book_id: int) -> tuple[int, int, str, int]:
+        return (*self._documents[book_id].sort_key, book_id)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            approx_bytes = sys.getsizeof(self._documents) + sys.getsizeof(self._postings)
+            for token, book_ids in self._postings.items():
+                approx_bytes += sys.getsizeof(token) + sys.getsizeof(book_ids)
+            for document in self._documents.values():
+                approx_bytes += sys.getsizeof(document) + sys.getsizeof(document.tokens)
+                approx_bytes += sys.getsizeof(document.sort_key) + sum(sys.getsizeof(part) for part in document.sort_key)
+            if self._sorted_tokens is not None:
+                approx_bytes += sys.getsizeof(self._sorted_tokens)
+            return {
+                'books': len(self._documents),
+                'tokens': len(self._postings),
+                'postings': sum(len(book_ids) for book_ids in self._postings.values()),
+                'approx_bytes': approx_bytes,
+            }
+
+    def _add(self, book_id: int, document: BookSearchDocument) -> None:
+        self._documents[book_id] = document
+        for token in document.tokens:
+            book_ids = self._postings.get(token)
+            if book_ids is None:
+                self._postings[token] = {book_id}
+                self._sorted_tokens = None
+            else:
+                book_ids.add(book_id)
+
+    def _remove(self, book_id: int) -> None:
+        document = self._documents.pop(book_id, None)
+        if document is None:
+            return
+        for token in document.tokens:
+            book_ids = self._postings.get(token)
+            if book_ids is None:
+                continue
+            book_ids.discard(book_id)
+            if not book_ids:
+                del self._postings[token]
+                self._sorted_tokens = None
+
+    def _prefix_matches(self, prefix: str) -> set[int]:
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._postings)
+        tokens = self._sorted_tokens
+        matches: set[int] = set()
+        position = bisect_left(tokens, prefix)
+        while position < len(tokens) and tokens[position].startswith(prefix):
+            matches |= self._postings[tokens[position]]
+            position += 1
+        return matches
+
+    def _collect_flushed_books(self, session: Session, flush_context: Any) -> None:
+        from app.models import Book
+
+        pending = session.info.setdefault(_PENDING_KEY, {})
+        for instance in (*session.new, *session.dirty):
+            if isinstance(instance, Book):
+                pending[instance.id] = BookSearchDocument.from_book(instance)
+        for instance in session.deleted:
+            if isinstance(instance, Book):
+                pending[instance.id] = None
+
+    def _apply_committed_books(self, session: Session) -> None:
+        pending = session.info.pop(_PENDING_KEY, None)
+        if not pending or not self._loaded:
+            return
+        for book_id, document in pending.items():
+            self.replace(book_id, document)
+
+    def _discard_pending_books(self, session: Session) -> None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+book_index: BookSearchIndex = BookSearchIndex()
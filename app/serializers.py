@@ -4,10 +4,22 @@ from typing import Any
 
 from app.models import Annotation, Book, Reader, Review
 from app.schemas import annotation_schema, book_schema, reader_schema, review_schema
+from app.services.book_text_service import BookTextChapter, ReadContentsItem
+from app.services.pagination import CursorPage
 
 
 def serialize_book(book: Book) -> dict[str, Any]:
-    return dict(book_schema.dump(book))
+    payload = dict(book_schema.dump(book))
+    payload['rating'] = serialize_book_rating(book)
+    return payload
+
+
+def serialize_book_rating(book: Book) -> dict[str, Any]:
+    return {
+        'count': book.review_count or 0,
+        'average': round(book.rating_average or 0.0, 2),
+        'histogram': {str(stars): count for stars, count in book.review_histogram.items()},
+    }
 
 
 def serialize_review(review: Review) -> dict[str, Any]:
@@ -20,3 +32,42 @@ def serialize_annotation(annotation: Annotation) -> dict[str, Any]:
 
 def serialize_reader(reader: Reader) -> dict[str, Any]:
     return dict(reader_schema.dump(reader))
+
+
+def reader_display_name(reader: Reader) -> str:
+    return f'{reader.name} {reader.surname}'.strip()
+
+
+def serialize_book_review(review: Review) -> dict[str, Any]:
+    return {**serialize_review(review), 'reviewer_name': reader_display_name(review.reviewer)}
+
+
+def serialize_book_annotation(annotation: Annotation) -> dict[str, Any]:
+    return {**serialize_annotation(annotation), 'author_name': reader_display_name(annotation.author)}
+
+
+def serialize_book_details(book: Book, reviews: CursorPage[Review], annotations: CursorPage[Annotation]) -> dict[str, Any]:
+    payload = serialize_book(book)
+    payload['reviews'] = [serialize_book_review(review) for review in reviews.items]
+    payload['reviews_next_cursor'] = reviews.next_cursor
+    payload['annotations'] = [serialize_book_annotation(annotation) for annotation in annotations.items]
+    payload['annotations_next_cursor'] = annotations.next_cursor
+    return payload
+
+
+def serialize_book_text_chapter(book_id: int, chapter: BookTextChapter) -> dict[str, Any]:
+    return {
+        'book_id': book_id,
+        'section_id': chapter.section.section_id,
+        'title': chapter.section.title,
+        'paragraphs': chapter.section.paragraphs,
+        'previous_section': _serialize_contents_item(chapter.previous_section),
+        'next_section': _serialize_contents_item(chapter.next_section),
+        'contents': [_serialize_contents_item(item) for item in chapter.contents],
+    }
+
+
+def _serialize_contents_item(item: ReadContentsItem | None) -> dict[str, str] | None:
+    if item is None:
+        return None
+    return {'section_id': item.target_id, 'title': item.title}
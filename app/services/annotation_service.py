@@ -15,19 +15,33 @@ from app.services.exceptions import (
     PermissionDeniedError,
     ValidationError,
 )
+from app.services.pagination import CursorPage, decode_cursor, id_cursor_page
+from app.services.resource_versions import ResourceVersions, book_resource
 
 _UNSET = object()
 
 
 class AnnotationService:
-    def __init__(self, session: Session, annotations: AnnotationRepository, books: BookRepository) -> None:
+    def __init__(
+        self,
+        session: Session,
+        annotations: AnnotationRepository,
+        books: BookRepository,
+        versions: ResourceVersions | None = None,
+    ) -> None:
         self._session = session
         self._annotations = annotations
         self._books = books
+        self._versions = versions
 
     def list_book_annotations_desc(self, book_id: int) -> list[Annotation]:
         return self._annotations.list_for_book_desc(book_id)
 
+    def list_book_annotations_page(self, book_id: int, *, cursor: str | None = None, per_page: int = 10) -> CursorPage[Annotation]:
+        before_id = decode_cursor(cursor, int)[0] if cursor else None
+        annotations = self._annotations.list_for_book_page(book_id, before_id=before_id, limit=per_page + 1)
+        return id_cursor_page(annotations, per_page)
+
     def get_annotation(self, annotation_id: int) -> Annotation | None:
         return self._annotations.get_by_id(annotation_id)
 
@@ -56,6 +70,7 @@ class AnnotationService:
         )
         self._annotations.add(annotation)
         self._session.commit()
+        self._touch_book(annotation.book_id)
         return annotation
 
     def update_annotation(self, actor: Any, annotation_id: int, *, text: object = _UNSET) -> Annotation:
@@ -69,6 +84,7 @@ class AnnotationService:
 
         annotation.text = self._normalize_text(text)
         self._session.commit()
+        self._touch_book(annotation.book_id)
         return annotation
 
     def delete_annotation(self, actor: Any, annotation_id: int) -> int:
@@ -81,8 +97,13 @@ class AnnotationService:
         book_id = annotation.book_id
         self._annotations.delete(annotation)
         self._session.commit()
+        self._touch_book(book_id)
         return book_id
 
+    def _touch_book(self, book_id: int) -> None:
+        if self._versions is not None:
+            self._versions.touch(book_resource(book_id))
+
     def _require_accessible_book(self, book_id: int, actor: Any) -> Book:
         book = self._books.get_by_id(book_id, include_hidden=can_view_hidden_books(actor))
         if book is not None:
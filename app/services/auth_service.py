@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from collections.abc import Callable
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
+import hashlib
 import hmac
+import logging
+import threading
+import time
 
+from flask import Flask
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.extensions import db
 from app.models import Reader, RefreshTokenSession
 from app.repositories.reader_repository import ReaderRepository
 from app.repositories.refresh_token_repository import RefreshTokenRepository
@@ -29,6 +38,15 @@ class AnonymousApiActor:
     session_id: str | None = None
 
 
+@dataclass(slots=True)
+class SessionPruneResult:
+    deleted: int
+    batches: int
+    revoked_over_limit: int
+    before: dict[str, int | None]
+    after: dict[str, int | None]
+
+
 @dataclass(slots=True)
 class IssuedTokenSession:
     session: RefreshTokenSession
@@ -36,6 +54,221 @@ class IssuedTokenSession:
     refresh_expires_at: datetime
 
 
+class AccessTokenCache:
+    def __init__(self, max_entries: int = 1024, max_age: int = 60, clock: Callable[[], float] = time.time) -> None:
+        self._entries: OrderedDict[bytes, tuple[float, ApiActor]] = OrderedDict()
+        self._sessions: dict[str, set[bytes]] = {}
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._max_age = max_age
+        self._clock = clock
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def init_app(self, app: Flask) -> None:
+        self._max_entries = max(int(app.config.get('ACCESS_TOKEN_CACHE_SIZE', 1024) or 0), 0)
+        self._max_age = max(int(app.config.get('ACCESS_TOKEN_CACHE_MAX_AGE', 60) or 0), 0)
+        self.clear()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, token: str) -> ApiActor | None:
+        if not self._max_entries:
+            return None
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[0] <= self._clock():
+                self._drop(key)
+                self._misses += 1
+                self._expired += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, token: str, actor: ApiActor, *, expires_at: float, generation: int) -> None:
+        if not self._max_entries or actor.session_id is None:
+            return
+        if self._max_age:
+            expires_at = min(expires_at, self._clock() + self._max_age)
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._drop(key)
+            self._entries[key] = (expires_at, actor)
+            self._sessions.setdefault(actor.session_id, set()).add(key)
+            while len(self._entries) > self._max_entries:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate_session(self, session_id: str) -> int:
+        with self._lock:
+            self._generation += 1
+            keys = self._sessions.pop(session_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._sessions.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self._max_entries,
+                'max_age': self._max_age,
+                'hits': self._hits,
+                'misses': self._misses,
+                'expired': self._expired,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
+
+    def _drop(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        session_id = entry[1].session_id
+        keys = self._sessions.get(session_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._sessions[session_id]
+
+
+access_token_cache: AccessTokenCache = AccessTokenCache()
+
+REVOCATION_FEED_OVERLAP = timedelta(seconds=30)
+
+
+class SessionRevocations:
+    def __init__(
+        self,
+        poll_interval: float = 5,
+        window: timedelta = timedelta(minutes=15),
+        on_revoke: Callable[[str], object] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._revoked: dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._poll_interval = poll_interval
+        self._window = window
+        self._on_revoke = on_revoke
+        self._clock = clock
+        self._loaded = False
+        self._cursor: datetime | None = None
+        self._synced_at = float('-inf')
+        self._syncs = 0
+        self._active = 0
+        self._revoked_hits = 0
+        self._fallbacks = 0
+
+    def init_app(self, app: Flask) -> None:
+        self._poll_interval = max(float(app.config.get('SESSION_REVOCATION_POLL_INTERVAL', 5) or 0), 0)
+        access_ttl = timedelta(minutes=int(app.config.get('JWT_ACCESS_TOKEN_EXPIRES_MINUTES', 15)))
+        refresh_ttl = timedelta(days=int(app.config.get('JWT_REFRESH_TOKEN_EXPIRES_DAYS', 30)))
+        if refresh_ttl < access_ttl:
+            self._poll_interval = 0
+        self._window = access_ttl + REVOCATION_FEED_OVERLAP
+        self.clear()
+        if not self._poll_interval:
+            return
+        with app.app_context():
+            try:
+                self.sync(RefreshTokenRepository(db.session))
+            except SQLAlchemyError:
+                db.session.rollback()
+                logging.warning('Session revocation set not loaded; access tokens fall back to session lookups.', exc_info=True)
+            finally:
+                db.session.remove()
+
+    def check(self, session_id: str, refresh_tokens: RefreshTokenRepository) -> bool | None:
+        if not self._poll_interval:
+            with self._lock:
+                self._fallbacks += 1
+            return None
+        if self._clock() - self._synced_at >= self._poll_interval and self._sync_lock.acquire(blocking=False):
+            try:
+                self._sync(refresh_tokens)
+            finally:
+                self._sync_lock.release()
+        with self._lock:
+            if session_id in self._revoked:
+                self._revoked_hits += 1
+                return True
+            if not self._loaded or self._clock() - self._synced_at > self._poll_interval * 2:
+                self._fallbacks += 1
+                return None
+            self._active += 1
+            return False
+
+    def add(self, session_id: str, revoked_at: datetime) -> None:
+        with self._lock:
+            known = session_id in self._revoked
+            self._revoked[session_id] = revoked_at
+        if not known and self._on_revoke is not None:
+            self._on_revoke(session_id)
+
+    def sync(self, refresh_tokens: RefreshTokenRepository) -> None:
+        with self._sync_lock:
+            self._sync(refresh_tokens)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked.clear()
+            self._loaded = False
+            self._cursor = None
+            self._synced_at = float('-inf')
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                'loaded': self._loaded,
+                'revoked': len(self._revoked),
+                'poll_interval': self._poll_interval,
+                'sync_age': round(self._clock() - self._synced_at, 3) if self._loaded else None,
+                'syncs': self._syncs,
+                'active': self._active,
+                'revoked_hits': self._revoked_hits,
+                'fallbacks': self._fallbacks,
+            }
+
+    def _sync(self, refresh_tokens: RefreshTokenRepository) -> None:
+        started_at = self._clock()
+        now = datetime.utcnow()
+        horizon = now - self._window
+        since = horizon if self._cursor is None else max(self._cursor - REVOCATION_FEED_OVERLAP, horizon)
+        for session_id, revoked_at in refresh_tokens.revoked_since(since):
+            self.add(session_id, revoked_at)
+        with self._lock:
+            for session_id in [key for key, revoked_at in self._revoked.items() if revoked_at <= horizon]:
+                del self._revoked[session_id]
+            self._cursor = now
+            self._synced_at = started_at
+            self._loaded = True
+            self._syncs += 1
+
+
+session_revocations: SessionRevocations = SessionRevocations(on_revoke=access_token_cache.invalidate_session)
+
+
 class AuthService:
     def __init__(
         self,
@@ -43,11 +276,15 @@ class AuthService:
         readers: ReaderRepository,
         refresh_tokens: RefreshTokenRepository,
         token_service: TokenService,
+        token_cache: AccessTokenCache | None = None,
+        revocations: SessionRevocations | None = None,
     ) -> None:
         self._session = session
         self._readers = readers
         self._refresh_tokens = refresh_tokens
         self._token_service = token_service
+        self._token_cache = token_cache
+        self._revocations = revocations
 
     def actor_from_reader(self, reader: Reader) -> ApiActor:
         return ApiActor(id=reader.id, role=reader.role, session_id=None)
@@ -98,14 +335,12 @@ class AuthService:
             raise AuthenticationRequiredError('Authentication required.')
 
         if token_session.refresh_jti != refresh_jti:
-            token_session.revoked_at = datetime.utcnow()
-            self._session.commit()
+            self._revoke(token_session)
             raise AuthenticationRequiredError('Refresh token has been revoked.')
 
         token_hash = self._token_service.hash_token(token_value)
         if not hmac.compare_digest(token_session.token_hash, token_hash):
-            token_session.revoked_at = datetime.utcnow()
-            self._session.commit()
+            self._revoke(token_session)
             raise AuthenticationRequiredError('Refresh token has been revoked.')
 
         new_refresh_token, new_refresh_jti, refresh_expires_at = self._token_service.issue_refresh_token(
@@ -135,18 +370,56 @@ class AuthService:
         )
 
     def authenticate_access_token(self, token: str) -> ApiActor:
+        cached = self._cached_actor(token)
+        if cached is not None:
+            return cached
+
+        generation = self._token_cache.generation if self._token_cache is not None else 0
         payload = self._token_service.decode_token(token, expected_type='access')
         session_id = self._claim_str(payload, 'session_id')
-        token_session = self._require_active_session(session_id)
+        user_id = self._claim_int(payload, 'sub')
+        self._require_active_token_session(session_id, user_id)
         reader = self._require_reader(payload)
-        if token_session.user_id != reader.id:
-            raise AuthenticationRequiredError('Authentication required.')
-        return ApiActor(id=reader.id, role=reader.role, session_id=token_session.session_id)
+        actor = ApiActor(id=reader.id, role=reader.role, session_id=session_id)
+        if self._token_cache is not None:
+            self._token_cache.put(token, actor, expires_at=float(payload['exp']), generation=generation)
+        return actor
 
     def revoke_session(self, session_id: str) -> None:
-        token_session = self._require_active_session(session_id)
-        token_session.revoked_at = datetime.utcnow()
-        self._session.commit()
+        self._revoke(self._require_active_session(session_id))
+
+    def prune_sessions(self, *, batch_size: int = 500, max_sessions_per_reader: int = 0) -> SessionPruneResult:
+        now = datetime.utcnow()
+        before = self._refresh_tokens.table_stats(now)
+
+        over_limit = []
+        if max_sessions_per_reader > 0:
+            over_limit = self._refresh_tokens.active_over_limit(per_reader=max_sessions_per_reader, now=now)
+            for token_session in over_limit:
+                token_session.revoked_at = now
+            self._session.commit()
+            for token_session in over_limit:
+                self._forget_session(token_session.session_id, now)
+
+        revoked_before = now - self._token_service.access_token_ttl - REVOCATION_FEED_OVERLAP
+        deleted = batches = 0
+        while True:
+            ids = self._refresh_tokens.prunable_ids(expired_before=now, revoked_before=revoked_before, limit=batch_size)
+            if not ids:
+                break
+            deleted += self._refresh_tokens.delete_ids(ids)
+            self._session.commit()
+            batches += 1
+            if len(ids) < batch_size:
+                break
+
+        return SessionPruneResult(
+            deleted=deleted,
+            batches=batches,
+            revoked_over_limit=len(over_limit),
+            before=before,
+            after=self._refresh_tokens.table_stats(now),
+        )
 
     def get_reader_for_actor(self, actor: ApiActor) -> Reader:
         reader = self._readers.get_by_id(actor.id)
@@ -195,6 +468,42 @@ class AuthService:
             refresh_expires_at=issued_session.refresh_expires_at,
         )
 
+    def _cached_actor(self, token: str) -> ApiActor | None:
+        if self._token_cache is None:
+            return None
+        actor = self._token_cache.get(token)
+        if actor is not None and self._revocations is not None and actor.session_id is not None:
+            revoked = self._revocations.check(actor.session_id, self._refresh_tokens)
+            if revoked:
+                raise AuthenticationRequiredError('Authentication required.')
+            if revoked is None:
+                # The revocation map cannot vouch for the session, so verify it against the database.
+                return None
+        return actor
+
+    def _revoke(self, token_session: RefreshTokenSession) -> None:
+        revoked_at = datetime.utcnow()
+        token_session.revoked_at = revoked_at
+        self._session.commit()
+        self._forget_session(token_session.session_id, revoked_at)
+
+    def _forget_session(self, session_id: str, revoked_at: datetime) -> None:
+        if self._token_cache is not None:
+            self._token_cache.invalidate_session(session_id)
+        if self._revocations is not None:
+            self._revocations.add(session_id, revoked_at)
+
+    def _require_active_token_session(self, session_id: str, user_id: int) -> None:
+        if self._revocations is not None:
+            revoked = self._revocations.check(session_id, self._refresh_tokens)
+            if revoked is not None:
+                if revoked:
+                    raise AuthenticationRequiredError('Authentication required.')
+                return
+        token_session = self._require_active_session(session_id)
+        if token_session.user_id != user_id:
+            raise AuthenticationRequiredError('Authentication required.')
+
     def _require_active_session(self, session_id: str) -> RefreshTokenSession:
         token_session = self._refresh_tokens.get_by_session_id(session_id)
         if token_session is None:
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Callable
+from typing import Any
+
+from app.services.resource_versions import BOOK_LIST_RESOURCE
+
+
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+def normalize_search_query(search_query: str) -> str:
+    # Only folds what every search mode folds: the terms the repository splits out, and ASCII case
+    # (SQLite's LIKE leaves other letters case-sensitive).
+    return ' '.join(search_query.split()).translate(_ASCII_LOWER)
+
+
+class BookCountCache:
+    def __init__(self, cache: Any, *, timeout: int = 300, key_prefix: str = 'books:count:') -> None:
+        self._cache = cache
+        self._timeout = timeout
+        self._key_prefix = key_prefix
+
+    @property
+    def enabled(self) -> bool:
+        return self._timeout > 0
+
+    def get_or_count(
+        self,
+        search_query: str,
+        *,
+        include_hidden: bool,
+        search_mode: str,
+        counter: Callable[[], int],
+    ) -> int:
+        if not self.enabled:
+            return counter()
+        key = self._key(search_query, include_hidden=include_hidden, search_mode=search_mode)
+        return self._cache.get_or_set(key, counter, self._timeout, tags=(BOOK_LIST_RESOURCE,))
+
+    def _key(self, search_query: str, *, include_hidden: bool, search_mode: str) -> str:
+        visibility_scope = 'all' if include_hidden else 'visible'
+        digest = hashlib.sha256(normalize_search_query(search_query).encode('utf-8')).hexdigest()
+        return f'{self._key_prefix}{search_mode}:{visibility_scope}:{digest}'
@@ -7,9 +7,19 @@ from flask_sqlalchemy.pagination import Pagination
 from sqlalchemy.orm import Session
 
 from app.models import Book
-from app.repositories.book_repository import BookRepository
+from app.repositories.book_repository import BOOK_SORT_CATALOGUE, BOOK_SORTS, BookRepository, BookSortKey, book_sort_key
+from app.search_index import BookSearchIndex
 from app.services.access_policy import can_create_book, can_update_book, can_view_hidden_books
-from app.services.exceptions import AuthenticationRequiredError, ConflictError, NotFoundError, PermissionDeniedError
+from app.services.book_counts import BookCountCache
+from app.services.exceptions import (
+    AuthenticationRequiredError,
+    BadRequestError,
+    ConflictError,
+    NotFoundError,
+    PermissionDeniedError,
+)
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.resource_versions import BOOK_LIST_RESOURCE, ResourceVersions, book_resource
 
 
 class BookAlreadyExistsError(ConflictError):
@@ -31,10 +41,36 @@ class BookWriteData:
     is_hidden: bool = False
 
 
+@dataclass(slots=True)
+class BookCursorPage:
+    items: list[Book]
+    next_cursor: str | None
+    total: int | None = None
+
+
+def encode_book_cursor(sort_key: BookSortKey) -> str:
+    return encode_cursor(sort_key)
+
+
+def decode_book_cursor(cursor: str) -> BookSortKey:
+    year, month_number, title, book_id = decode_cursor(cursor, int, int, str, int)
+    return year, month_number, title, book_id
+
+
 class BookService:
-    def __init__(self, session: Session, books: BookRepository) -> None:
+    def __init__(
+        self,
+        session: Session,
+        books: BookRepository,
+        versions: ResourceVersions | None = None,
+        counts: BookCountCache | None = None,
+        search_index: BookSearchIndex | None = None,
+    ) -> None:
         self._session = session
         self._books = books
+        self._versions = versions
+        self._counts = counts
+        self._search_index = search_index
 
     def paginate_books(
         self,
@@ -43,13 +79,53 @@ class BookService:
         page: int = 1,
         per_page: int = 10,
         include_hidden: bool = True,
+        count: bool = True,
+        sort: str = BOOK_SORT_CATALOGUE,
     ) -> Pagination:
+        if sort not in BOOK_SORTS:
+            raise BadRequestError('Invalid sort.', details={'sort': f"Must be one of: {', '.join(BOOK_SORTS)}."})
         return self._books.paginate(
             search_query,
             page=page,
             per_page=per_page,
             include_hidden=include_hidden,
+            count=count,
+            counter=lambda: self.count_books(search_query, include_hidden=include_hidden),
+            sort=sort,
+        )
+
+    def count_books(self, search_query: str = '', *, include_hidden: bool = True) -> int:
+        def counter() -> int:
+            return self._books.count(search_query, include_hidden=include_hidden)
+
+        if self._counts is None:
+            return counter()
+        return self._counts.get_or_count(
+            search_query,
+            include_hidden=include_hidden,
+            search_mode=self._books.search_mode,
+            counter=counter,
+        )
+
+    def paginate_books_by_cursor(
+        self,
+        search_query: str = '',
+        *,
+        cursor: str | None = None,
+        per_page: int = 10,
+        include_hidden: bool = True,
+        with_total: bool = False,
+    ) -> BookCursorPage:
+        after = decode_book_cursor(cursor) if cursor else None
+        page = self._books.paginate_after(
+            search_query,
+            after=after,
+            per_page=per_page,
+            include_hidden=include_hidden,
         )
+        next_cursor = encode_book_cursor(book_sort_key(page.items[-1])) if page.has_next else None
+        total = self.count_books(search_query, include_hidden=include_hidden) if with_total else None
+        return BookCursorPage(items=page.items, next_cursor=next_cursor, total=total)
 
     def get_book(self, book_id: int, *, include_hidden: bool = True) -> Book | None:
         return self._books.get_by_id(book_id, include_hidden=include_hidden)
@@ -105,6 +181,7 @@ class BookService:
         )
         self._books.add(book)
         self._session.commit()
+        self._touch_book(book.id)
         return book
 
     def update_book(self, actor: Any, book_id: int, data: BookWriteData) -> Book:
@@ -129,6 +206,7 @@ class BookService:
         book.cover_image = normalized.cover_image
         book.is_hidden = normalized.is_hidden
         self._session.commit()
+        self._touch_book(book.id)
         return book
 
     def toggle_book_hidden(self, actor: Any, book_id: int) -> Book:
@@ -140,8 +218,17 @@ class BookService:
         book = self.require_book(book_id)
         book.is_hidden = not book.is_hidden
         self._session.commit()
+        self._touch_book(book.id)
         return book
 
+    def _touch_book(self, book_id: int) -> None:
+        if self._versions is not None:
+            previous_stamps = self._versions.current([BOOK_LIST_RESOURCE])
+            stamps = self._versions.touch(BOOK_LIST_RESOURCE, book_resource(book_id))
+            if self._search_index is not None:
+                # This commit already reached the index through the session events.
+                self._search_index.advance(previous_stamps[0] if previous_stamps else None, stamps[0])
+
     def _ensure_unique_title(self, normalized_title: str) -> None:
         if self._books.get_by_title(normalized_title) is not None:
             raise BookAlreadyExistsError('A book with this title already exists.')
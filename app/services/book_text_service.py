@@ -1,28 +1,41 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import codecs
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+import hashlib
 from html import unescape
+import json
+import logging
+import mmap
+import os
 from pathlib import Path
 import re
-from typing import Iterable
+import tempfile
+import threading
+from typing import Any
 
-from flask import current_app
+from flask import Flask, current_app
 
 from app.models import Book
 
-_TAG_RE = re.compile(r'<[^>]+>')
-_H2_SECTION_RE = re.compile(r'<h2[^>]*>(.*?)</h2>(.*?)(?=<h2[^>]*>|</main>|</body>)', re.IGNORECASE | re.DOTALL)
-_PARAGRAPH_RE = re.compile(r'<p[^>]*>(.*?)</p>', re.IGNORECASE | re.DOTALL)
-_CONTENTS_H2_RE = re.compile(r'<h2[^>]*>\s*Contents\s*</h2>', re.IGNORECASE)
-_TEXT_H2_RE = re.compile(r'<h2[^>]*>\s*Text\s*</h2>', re.IGNORECASE)
-_UL_RE = re.compile(r'<ul[^>]*>(.*?)</ul>', re.IGNORECASE | re.DOTALL)
-_A_RE = re.compile(r'<a[^>]*href=["\']#([^"\']+)["\'][^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
-_SECTION_RE = re.compile(r'<section[^>]*id=["\']([^"\']+)["\'][^>]*>(.*?)</section>', re.IGNORECASE | re.DOTALL)
-_H3_RE = re.compile(r'<h3[^>]*>(.*?)</h3>', re.IGNORECASE | re.DOTALL)
-_H3_WITH_ID_RE = re.compile(
-    r'<h3[^>]*id=["\']([^"\']+)["\'][^>]*>(.*?)</h3>(.*?)(?=<h3[^>]*id=|</section>|</main>|</body>)',
-    re.IGNORECASE | re.DOTALL,
+_INFO_SKIP_TITLES = frozenset({'description', 'key facts', 'contents', 'text'})
+_PENDING, _PENDING_LIST, _OPEN, _DONE = range(4)
+BOOK_TEXT_ARTIFACT_FORMAT = 1
+_DECODE_CHUNK_SIZE = 1 << 20
+# Same token rules as html.parser: a tag needs a letter after '<' or '</', and quoted attribute values may contain '>'.
+# The alternatives never overlap, so a tag that is never closed fails in linear time instead of backtracking.
+_TAG_START_RE = re.compile(r'<(?:/?[a-zA-Z]|[!?])')
+_TOKEN_RE = re.compile(
+    r'<(?:(/?)([a-zA-Z][^\t\n\r\f />\x00]*)'
+    r'((?:[\t\n\r\f /\x00](?:[^=>]|=[\t\n\r\f ]*(?![\t\n\r\f ])(?:"[^"]*"|\'[^\']*\'|(?![\'"])))*)?)>'
+    r'|!--.*?-->|!(?!--)[^>]*>|\?[^>]*>)',
+    re.DOTALL,
 )
+_ATTRIBUTE_RE = re.compile(r'([^\s/>=][^\s/=>]*)(?:\s*=\s*(\'[^\']*\'|"[^"]*"|[^\s>]*))?')
+_RAW_TEXT_TAGS = frozenset({'script', 'style'})
 
 
 @dataclass(slots=True)
@@ -56,6 +69,119 @@ class BookReadContent:
     text_sections: list[ReadTextSection]
 
 
+@dataclass(slots=True)
+class BookText:
+    preview: BookTextPreview | None
+    read_content: BookReadContent | None
+
+
+@dataclass(slots=True)
+class BookTextSectionSpan:
+    section_id: str
+    title: str
+    start: int
+    end: int
+
+
+@dataclass(slots=True)
+class BookTextIndex:
+    signature: tuple[int, int]
+    wrapped: bool
+    contents: list[ReadContentsItem]
+    sections: list[BookTextSectionSpan]
+    positions: dict[str, int]
+
+
+@dataclass(slots=True)
+class BookTextChapter:
+    section: ReadTextSection
+    contents: list[ReadContentsItem]
+    previous_section: ReadContentsItem | None
+    next_section: ReadContentsItem | None
+
+
+@dataclass(slots=True, eq=False)
+class _OpenSection:
+    section_id: str = ''
+    title: str = ''
+    paragraphs: list[str] = field(default_factory=list)
+    claimed: bool = False
+    start: int = 0
+
+
+class BookTextCache:
+    def __init__(self, max_entries: int = 128) -> None:
+        self._entries: OrderedDict[tuple[str, str], tuple[tuple[int, int], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def init_app(self, app: Flask) -> None:
+        self._max_entries = max(int(app.config.get('BOOK_TEXT_CACHE_SIZE', 128) or 0), 0)
+        self.clear()
+
+    def get_or_load(self, kind: str, source_path: Path, loader: Callable[[Path], Any]) -> Any:
+        key = (kind, str(source_path))
+        try:
+            stat = source_path.stat()
+        except FileNotFoundError:
+            self.invalidate(source_path)
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+            if entry is not None:
+                self._stale += 1
+
+        value = loader(source_path)
+        if self._max_entries:
+            with self._lock:
+                self._entries[key] = (signature, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return value
+
+    def invalidate(self, source_path: Path) -> int:
+        path = str(source_path)
+        with self._lock:
+            keys = [key for key in self._entries if key[1] == path]
+            for key in keys:
+                del self._entries[key]
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self._max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'stale': self._stale,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
+
+
+book_text_cache: BookTextCache = BookTextCache()
+
+
 def load_book_text_source(book_id: int) -> str | None:
     source_path = _resolve_source_path(book_id)
     if source_path is None:
@@ -64,15 +190,72 @@ def load_book_text_source(book_id: int) -> str | None:
 
 
 def save_book_text_source(book_id: int, content: str) -> Path:
-    target_dir = _resolve_book_text_dir()
-    target_dir.mkdir(parents=True, exist_ok=True)
-
-    source_path = target_dir / f'book-{book_id}.html'
+    source_path = _book_text_path(book_id)
+    source_path.parent.mkdir(parents=True, exist_ok=True)
     normalized_content = content.strip()
-    source_path.write_text(f'{normalized_content}\n', encoding='utf-8')
+    raw = f'{normalized_content}\n'.encode('utf-8')
+    _replace_file(source_path, raw)
+    write_book_text_artifact(source_path, raw)
+    book_text_cache.invalidate(source_path)
     return source_path
 
 
+def book_text_artifact_path(source_path: Path) -> Path:
+    return source_path.with_suffix('.json')
+
+
+def write_book_text_artifact(source_path: Path, raw: bytes | None = None) -> Path:
+    if raw is None:
+        with _map_book_text(source_path) as (data, _):
+            return _write_book_text_artifact(source_path, data)
+    return _write_book_text_artifact(source_path, raw)
+
+
+def _write_book_text_artifact(source_path: Path, data: bytes | mmap.mmap) -> Path:
+    book_text = _parse_book_text_data(data)
+    payload = {
+        'format': BOOK_TEXT_ARTIFACT_FORMAT,
+        'source_sha256': hashlib.sha256(data).hexdigest(),
+        'preview': asdict(book_text.preview) if book_text.preview is not None else None,
+        'read_content': asdict(book_text.read_content) if book_text.read_content is not None else None,
+    }
+    artifact_path = book_text_artifact_path(source_path)
+    _replace_file(artifact_path, json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    return artifact_path
+
+
+def _replace_file(path: Path, data: bytes) -> None:
+    # Readers may hold an mmap of the current file; truncating it in place would SIGBUS them.
+    # A unique temp name keeps concurrent writers of the same book from sharing (and tearing) one file.
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    descriptor, temporary_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as temporary:
+            temporary.write(data)
+            temporary.flush()
+            os.fchmod(temporary.fileno(), mode)
+            os.fsync(temporary.fileno())
+        os.replace(temporary_name, path)
+    except BaseException:
+        Path(temporary_name).unlink(missing_ok=True)
+        raise
+
+
+def rebuild_book_text_artifacts() -> tuple[int, int]:
+    rebuilt = up_to_date = 0
+    for source_path in sorted(_resolve_book_text_dir().glob('book-*.html')):
+        with _map_book_text(source_path) as (data, _):
+            if _read_book_text_artifact(source_path, hashlib.sha256(data).hexdigest()) is not None:
+                up_to_date += 1
+                continue
+            _write_book_text_artifact(source_path, data)
+        rebuilt += 1
+    return rebuilt, up_to_date
+
+
 def build_book_text_template(book: Book) -> str:
     return """<!doctype html>
 <html lang="en">
@@ -117,173 +300,516 @@ def build_book_text_template(book: Book) -> str:
 """
 
 
-def load_book_text_preview(book_id: int) -> BookTextPreview | None:
-    source_path = _resolve_source_path(book_id)
-    if source_path is None:
-        return None
-
-    content = source_path.read_text(encoding='utf-8')
-    summary = _extract_summary(content)
-    sections = _extract_info_sections(content)
+def load_book_text(book_id: int) -> BookText | None:
+    return book_text_cache.get_or_load('text', _book_text_path(book_id), _load_book_text_file)
 
-    if not summary and not sections:
-        return None
 
-    return BookTextPreview(summary=summary, sections=sections)
+def load_book_text_preview(book_id: int) -> BookTextPreview | None:
+    book_text = load_book_text(book_id)
+    return book_text.preview if book_text is not None else None
 
 
 def load_book_read_content(book_id: int) -> BookReadContent | None:
-    source_path = _resolve_source_path(book_id)
-    if source_path is None:
-        return None
-
-    content = source_path.read_text(encoding='utf-8')
-    contents = _extract_contents_items(content)
-    text_sections = _extract_text_sections(content)
-    if not contents and not text_sections:
-        return None
-    return BookReadContent(contents=contents, text_sections=text_sections)
+    book_text = load_book_text(book_id)
+    return book_text.read_content if book_text is not None else None
 
 
-def _extract_summary(content: str) -> str:
-    h1_match = re.search(r'<h1[^>]*>.*?</h1>', content, flags=re.IGNORECASE | re.DOTALL)
-    if h1_match:
-        first_h2_match = re.search(r'<h2[^>]*>', content[h1_match.end() :], flags=re.IGNORECASE)
-        section_end = h1_match.end() + first_h2_match.start() if first_h2_match else len(content)
-        summary_scope = content[h1_match.end() : section_end]
+def load_book_text_section(book_id: int, section_id: str) -> BookTextChapter | None:
+    source_path = _book_text_path(book_id)
+    index = book_text_cache.get_or_load('index', source_path, _build_book_text_index_file)
+    if index is None:
+        return None
 
-        paragraph_match = _PARAGRAPH_RE.search(summary_scope)
-        if paragraph_match:
-            summary = _normalize_text(paragraph_match.group(1))
-            if summary:
-                return summary
+    try:
+        with _map_book_text(source_path) as (data, signature):
+            if signature != index.signature:
+                book_text_cache.invalidate(source_path)
+                index = build_book_text_index(data, signature)
+            position = index.positions.get(section_id)
+            if position is None:
+                return None
+            span = index.sections[position]
+            fragment = data[span.start : span.end]
+    except FileNotFoundError:
+        return None
 
-    for title, section_body in _iter_h2_sections(content):
-        if title.lower() != 'description':
+    section = _parse_text_section_fragment(fragment.decode('utf-8'), wrapped=index.wrapped)
+    if section is None:
+        return None
+    previous_span = index.sections[position - 1] if position > 0 else None
+    next_span = index.sections[position + 1] if position + 1 < len(index.sections) else None
+    return BookTextChapter(
+        section=section,
+        contents=index.contents,
+        previous_section=ReadContentsItem(target_id=previous_span.section_id, title=previous_span.title) if previous_span else None,
+        next_section=ReadContentsItem(target_id=next_span.section_id, title=next_span.title) if next_span else None,
+    )
+
+
+def parse_book_text(content: str) -> BookText:
+    parser = _BookTextParser()
+    parser.feed(content)
+    parser.close()
+    return parser.result()
+
+
+def build_book_text_index(data: bytes | mmap.mmap, signature: tuple[int, int]) -> BookTextIndex:
+    parser = _BookTextParser(retain_paragraphs=False)
+    boundaries = _feed_book_text(parser, data)
+    wrapped, sections, spans = parser.text_section_spans()
+
+    byte_offsets = _byte_offsets(data, boundaries, [offset for span in spans for offset in span])
+    index_sections = [
+        BookTextSectionSpan(section_id=section.section_id, title=section.title, start=byte_offsets[start], end=byte_offsets[end])
+        for section, (start, end) in zip(sections, spans)
+    ]
+    positions: dict[str, int] = {}
+    for position, span in enumerate(index_sections):
+        positions.setdefault(span.section_id, position)
+    read_content = parser.result().read_content
+    return BookTextIndex(
+        signature=signature,
+        wrapped=wrapped,
+        contents=read_content.contents if read_content is not None else [],
+        sections=index_sections,
+        positions=positions,
+    )
+
+
+def _build_book_text_index_file(source_path: Path) -> BookTextIndex:
+    with _map_book_text(source_path) as (data, signature):
+        return build_book_text_index(data, signature)
+
+
+def _parse_text_section_fragment(fragment: str, *, wrapped: bool) -> ReadTextSection | None:
+    parser = _BookTextParser()
+    parser.feed(f'<h2>Text</h2>{fragment}</section>')
+    parser.close()
+    _, sections, _ = parser.text_section_spans(wrapped=wrapped)
+    return sections[0] if sections else None
+
+
+@contextmanager
+def _map_book_text(source_path: Path) -> Iterator[tuple[bytes | mmap.mmap, tuple[int, int]]]:
+    with source_path.open('rb') as source:
+        signature = _file_signature(os.fstat(source.fileno()))
+        if not signature[1]:
+            yield b'', signature
+            return
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped, signature
+
+
+def _parse_book_text_data(data: bytes | mmap.mmap) -> BookText:
+    parser = _BookTextParser()
+    _feed_book_text(parser, data)
+    return parser.result()
+
+
+def _feed_book_text(parser: _BookTextParser, data: bytes | mmap.mmap) -> list[tuple[int, int]]:
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    boundaries = [(0, 0)]
+    char_position = 0
+    size = len(data)
+    for chunk_start in range(0, size, _DECODE_CHUNK_SIZE):
+        chunk_end = min(chunk_start + _DECODE_CHUNK_SIZE, size)
+        text = decoder.decode(data[chunk_start:chunk_end], final=chunk_end == size)
+        parser.feed(text)
+        char_position += len(text)
+        boundaries.append((char_position, chunk_end - len(decoder.getstate()[0])))
+    parser.close()
+    return boundaries
+
+
+def _byte_offsets(data: bytes | mmap.mmap, boundaries: list[tuple[int, int]], offsets: list[int]) -> dict[int, int]:
+    byte_offsets: dict[int, int] = {}
+    pending = sorted(set(offsets))
+    position = 0
+    for (char_start, byte_start), (char_end, byte_end) in zip(boundaries, boundaries[1:]):
+        chunk_offsets = []
+        while position < len(pending) and pending[position] < char_end:
+            chunk_offsets.append(pending[position])
+            position += 1
+        if not chunk_offsets:
             continue
-        paragraph_match = _PARAGRAPH_RE.search(section_body)
-        if not paragraph_match:
+        if byte_end - byte_start == char_end - char_start:
+            for offset in chunk_offsets:
+                byte_offsets[offset] = byte_start + offset - char_start
             continue
-        summary = _normalize_text(paragraph_match.group(1))
-        if summary:
-            return summary
-
-    return ''
-
-
-def _extract_contents_items(content: str) -> list[ReadContentsItem]:
-    match = _CONTENTS_H2_RE.search(content)
-    if not match:
-        return []
-    ul_match = _UL_RE.search(content, pos=match.end())
-    if not ul_match:
-        return []
+        text = data[byte_start:byte_end].decode('utf-8')
+        cursor, byte_position = char_start, byte_start
+        for offset in chunk_offsets:
+            byte_position += len(text[cursor - char_start : offset - char_start].encode('utf-8'))
+            cursor = offset
+            byte_offsets[offset] = byte_position
+    for offset in pending[position:]:
+        byte_offsets[offset] = boundaries[-1][1]
+    return byte_offsets
+
+
+def _file_signature(stat: os.stat_result) -> tuple[int, int]:
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_book_text_file(source_path: Path) -> BookText:
+    with _map_book_text(source_path) as (data, _):
+        book_text = _read_book_text_artifact(source_path, hashlib.sha256(data).hexdigest())
+        if book_text is None:
+            book_text = _parse_book_text_data(data)
+    return book_text
+
+
+def _read_book_text_artifact(source_path: Path, source_digest: str) -> BookText | None:
+    artifact_path = book_text_artifact_path(source_path)
+    try:
+        payload = json.loads(artifact_path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logging.warning('Ignoring unreadable book text artifact %s.', artifact_path)
+        return None
+    if not isinstance(payload, dict) or payload.get('format') != BOOK_TEXT_ARTIFACT_FORMAT:
+        return None
+    if payload.get('source_sha256') != source_digest:
+        return None
 
-    items: list[ReadContentsItem] = []
-    for target_id, raw_title in _A_RE.findall(ul_match.group(1)):
-        title = _normalize_text(raw_title)
-        if not title:
-            continue
-        items.append(ReadContentsItem(target_id=target_id.strip(), title=title))
-    return items
-
-
-def _extract_text_sections(content: str) -> list[ReadTextSection]:
-    match = _TEXT_H2_RE.search(content)
-    if not match:
-        return []
-    text_scope = content[match.end() :]
-    wrapped_sections = _extract_wrapped_text_sections(text_scope)
-    if wrapped_sections:
-        return wrapped_sections
-    return _extract_heading_text_sections(text_scope)
-
-
-def _extract_wrapped_text_sections(text_scope: str) -> list[ReadTextSection]:
-    sections: list[ReadTextSection] = []
-    for section_id, raw_section_body in _SECTION_RE.findall(text_scope):
-        title_match = _H3_RE.search(raw_section_body)
-        title = _normalize_text(title_match.group(1)) if title_match else ''
-        paragraphs = _extract_text_paragraphs(raw_section_body)
-        if not title and not paragraphs:
-            continue
-        sections.append(
-            ReadTextSection(
-                section_id=section_id.strip(),
-                title=title,
-                paragraphs=paragraphs,
-            )
+    try:
+        preview = payload['preview']
+        read_content = payload['read_content']
+        return BookText(
+            preview=None
+            if preview is None
+            else BookTextPreview(
+                summary=preview['summary'],
+                sections=[InfoSection(**section) for section in preview['sections']],
+            ),
+            read_content=None
+            if read_content is None
+            else BookReadContent(
+                contents=[ReadContentsItem(**item) for item in read_content['contents']],
+                text_sections=[ReadTextSection(**section) for section in read_content['text_sections']],
+            ),
         )
-    return sections
+    except (KeyError, TypeError):
+        logging.warning('Ignoring malformed book text artifact %s.', artifact_path)
+        return None
 
 
-def _extract_heading_text_sections(text_scope: str) -> list[ReadTextSection]:
-    sections: list[ReadTextSection] = []
-    for section_id, raw_title, raw_section_body in _H3_WITH_ID_RE.findall(text_scope):
-        title = _normalize_text(raw_title)
-        paragraphs = _extract_text_paragraphs(raw_section_body)
-        if not title and not paragraphs:
-            continue
-        sections.append(
-            ReadTextSection(
-                section_id=section_id.strip(),
-                title=title,
-                paragraphs=paragraphs,
+class _BookTextParser:
+    """Walk the tokens of a book text once, in chunks, keeping the char offset of the current token."""
+
+    def __init__(self, *, retain_paragraphs: bool = True) -> None:
+        self._retain_paragraphs = retain_paragraphs
+        self._captures: list[list[str]] = []
+        self._buffer = ''
+        self._consumed = 0
+        self._offset = 0
+        self._raw_text_end: re.Pattern[str] | None = None
+
+        self._paragraph: list[str] | None = None
+        self._paragraph_targets: tuple[_OpenSection, ...] = ()
+
+        self._h1_state = _PENDING
+        self._h1_section: _OpenSection | None = None
+        self._h1: _OpenSection | None = None
+
+        self._h2_title: list[str] | None = None
+        self._h2_title_plain = True
+        self._h2: _OpenSection | None = None
+        self._h2_sections: list[_OpenSection] = []
+
+        self._contents_state = _PENDING
+        self._anchor: list[str] | None = None
+        self._anchor_target = ''
+        self._contents: list[ReadContentsItem] = []
+
+        self._in_text = False
+        self._wrapped: _OpenSection | None = None
+        self._wrapped_title: list[str] | None = None
+        self._wrapped_title_owner: _OpenSection | None = None
+        self._wrapped_sections: list[ReadTextSection] = []
+        self._wrapped_spans: list[tuple[int, int]] = []
+        self._heading: _OpenSection | None = None
+        self._heading_title: list[str] | None = None
+        self._heading_id = ''
+        self._heading_start = 0
+        self._heading_sections: list[ReadTextSection] = []
+        self._heading_spans: list[tuple[int, int]] = []
+
+    def feed(self, data: str) -> None:
+        self._buffer += data
+        self._tokenize(final=False)
+
+    def close(self) -> None:
+        self._tokenize(final=True)
+
+    def result(self) -> BookText:
+        summary = ''
+        if self._h1_section is not None and self._h1_section.paragraphs:
+            summary = self._h1_section.paragraphs[0]
+        if not summary:
+            summary = next(
+                (
+                    section.paragraphs[0]
+                    for section in self._h2_sections
+                    if section.title.lower() == 'description' and section.paragraphs and section.paragraphs[0]
+                ),
+                '',
             )
+        info_sections = [
+            InfoSection(title=section.title, body=section.paragraphs[0])
+            for section in self._h2_sections
+            if section.title.lower() not in _INFO_SKIP_TITLES and section.paragraphs and section.paragraphs[0]
+        ]
+        text_sections = self._wrapped_sections or self._heading_sections
+
+        preview = BookTextPreview(summary=summary, sections=info_sections) if summary or info_sections else None
+        read_content = (
+            BookReadContent(contents=self._contents, text_sections=text_sections) if self._contents or text_sections else None
         )
-    return sections
-
-
-def _extract_text_paragraphs(section_body: str) -> list[str]:
-    paragraphs: list[str] = []
-    for raw_paragraph in _PARAGRAPH_RE.findall(section_body):
-        paragraph = _normalize_text(raw_paragraph)
-        if not paragraph or paragraph.lower() == 'back to contents':
-            continue
-        paragraphs.append(paragraph)
-    return paragraphs
-
-
-def _extract_info_sections(content: str) -> list[InfoSection]:
-    result: list[InfoSection] = []
-    skip_titles = {'description', 'key facts', 'contents', 'text'}
-
-    for title, section_body in _iter_h2_sections(content):
-        title_key = title.lower()
-        if title_key in skip_titles:
-            continue
-
-        paragraph_match = _PARAGRAPH_RE.search(section_body)
-        if not paragraph_match:
-            continue
-
-        body = _normalize_text(paragraph_match.group(1))
-        if body:
-            result.append(InfoSection(title=title, body=body))
-
-    return result
-
-
-def _iter_h2_sections(content: str) -> Iterable[tuple[str, str]]:
-    for title_html, section_body in _H2_SECTION_RE.findall(content):
-        title = _normalize_text(title_html)
-        if title:
-            yield title, section_body
-
-
-def _normalize_text(value: str) -> str:
-    without_tags = _TAG_RE.sub(' ', value)
-    unescaped = unescape(without_tags)
-    return ' '.join(unescaped.split())
+        return BookText(preview=preview, read_content=read_content)
+
+    def text_section_spans(
+        self, *, wrapped: bool | None = None
+    ) -> tuple[bool, list[ReadTextSection], list[tuple[int, int]]]:
+        if wrapped is None:
+            wrapped = bool(self._wrapped_sections)
+        if wrapped:
+            return True, self._wrapped_sections, self._wrapped_spans
+        return False, self._heading_sections, self._heading_spans
+
+    def _tokenize(self, *, final: bool) -> None:
+        buffer = self._buffer
+        position = scan = 0
+        while True:
+            if self._raw_text_end is not None:
+                match = self._raw_text_end.search(buffer, position)
+                if match is None:
+                    break
+                self._handle_text(buffer[position : match.start()])
+                position = scan = match.start()
+                self._raw_text_end = None
+            start = _TAG_START_RE.search(buffer, scan)
+            if start is None:
+                break
+            match = _TOKEN_RE.match(buffer, start.start())
+            if match is None:
+                if not final or buffer.find('>', start.start()) < 0:
+                    # Wait for the next chunk to complete the tag; at the end every later '<' is text too.
+                    break
+                scan = start.start() + 1
+                continue
+            if match.start() > position:
+                self._handle_text(buffer[position : match.start()])
+            self._offset = self._consumed + match.start()
+            position = scan = match.end()
+            closing, tag, attrs = match.groups()
+            if tag is None:
+                self._mark_tag()
+            elif closing:
+                self.handle_endtag(tag.lower())
+            else:
+                tag = tag.lower()
+                self.handle_starttag(tag, attrs)
+                if tag in _RAW_TEXT_TAGS:
+                    self._raw_text_end = re.compile(rf'</{tag}[\s/>]', re.IGNORECASE)
+        if final and position < len(buffer):
+            self._handle_text(buffer[position:])
+            position = len(buffer)
+        # Keep the unfinished tail (a tag split across chunks, trailing text) for the next chunk.
+        self._consumed += position
+        self._buffer = buffer[position:]
+
+    def _handle_text(self, text: str) -> None:
+        self.handle_data(unescape(text) if '&' in text else text)
+
+    def handle_starttag(self, tag: str, attrs: str) -> None:
+        self._mark_tag()
+        if tag == 'p':
+            if self._paragraph is None:
+                self._start_paragraph()
+        elif tag == 'h1':
+            if self._h1_state == _PENDING:
+                self._h1_state = _OPEN
+        elif tag == 'h2':
+            self._h1 = None
+            self._close_h2()
+            if self._h2_title is None:
+                self._h2_title = self._start_capture()
+                self._h2_title_plain = True
+        elif tag == 'h3':
+            if self._wrapped is not None and not self._wrapped.claimed:
+                self._wrapped.claimed = True
+                self._wrapped_title = self._start_capture()
+                self._wrapped_title_owner = self._wrapped
+            section_id = _attribute(attrs, 'id')
+            if self._in_text and section_id and self._heading_title is None:
+                self._close_heading()
+                self._heading_title = self._start_capture()
+                self._heading_id = section_id.strip()
+                self._heading_start = self._offset
+        elif tag == 'section':
+            section_id = _attribute(attrs, 'id')
+            if self._in_text and self._wrapped is None and section_id:
+                self._wrapped = _OpenSection(section_id=section_id.strip(), start=self._offset)
+        elif tag == 'ul':
+            if self._contents_state == _PENDING_LIST:
+                self._contents_state = _OPEN
+        elif tag == 'a':
+            href = _attribute(attrs, 'href')
+            if self._contents_state == _OPEN and self._anchor is None and href and len(href) > 1 and href[0] == '#':
+                self._anchor = self._start_capture()
+                self._anchor_target = href[1:].strip()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == 'p':
+            self._finish_paragraph()
+        elif tag == 'h1':
+            if self._h1_state == _OPEN:
+                self._h1_state = _DONE
+                self._h1 = self._h1_section = _OpenSection()
+        elif tag == 'h2':
+            self._finish_h2_title()
+        elif tag == 'h3':
+            self._finish_h3_titles()
+        elif tag == 'section':
+            self._close_wrapped()
+            self._close_heading()
+        elif tag in ('main', 'body'):
+            self._close_h2()
+            self._close_heading()
+        elif tag == 'ul':
+            if self._contents_state == _OPEN:
+                self._contents_state = _DONE
+                self._stop_capture(self._anchor)
+                self._anchor = None
+        elif tag == 'a':
+            if self._anchor is not None:
+                title = self._stop_capture(self._anchor)
+                self._anchor = None
+                if title:
+                    self._contents.append(ReadContentsItem(target_id=self._anchor_target, title=title))
+        self._mark_tag()
+
+    def handle_data(self, data: str) -> None:
+        for parts in self._captures:
+            parts.append(data)
+
+    def _mark_tag(self) -> None:
+        if self._h2_title is not None:
+            self._h2_title_plain = False
+        for parts in self._captures:
+            parts.append(' ')
+
+    def _start_capture(self) -> list[str]:
+        parts: list[str] = []
+        self._captures.append(parts)
+        return parts
+
+    def _stop_capture(self, parts: list[str] | None) -> str:
+        if parts is None:
+            return ''
+        self._captures = [capture for capture in self._captures if capture is not parts]
+        return ' '.join(''.join(parts).split())
+
+    def _start_paragraph(self) -> None:
+        targets = []
+        for section in (self._h1, self._h2):
+            if section is not None and not section.claimed:
+                section.claimed = True
+                targets.append(section)
+        targets.extend(section for section in (self._wrapped, self._heading) if section is not None)
+        self._paragraph = self._start_capture()
+        self._paragraph_targets = tuple(targets)
+
+    def _finish_paragraph(self) -> None:
+        if self._paragraph is None:
+            return
+        paragraph = self._stop_capture(self._paragraph)
+        for section in self._paragraph_targets:
+            if section is self._h1 or section is self._h2:
+                section.paragraphs.append(paragraph)
+            elif section is self._wrapped or section is self._heading:
+                if self._retain_paragraphs or (not section.paragraphs and _is_reading_paragraph(paragraph)):
+                    section.paragraphs.append(paragraph)
+        self._paragraph = None
+        self._paragraph_targets = ()
+
+    def _finish_h2_title(self) -> None:
+        if self._h2_title is None:
+            return
+        plain = self._h2_title_plain
+        title = self._stop_capture(self._h2_title)
+        self._h2_title = None
+        key = title.lower() if plain else ''
+        if key == 'contents' and self._contents_state == _PENDING:
+            self._contents_state = _PENDING_LIST
+        elif key == 'text':
+            self._in_text = True
+        self._h2 = _OpenSection(title=title)
+
+    def _finish_h3_titles(self) -> None:
+        if self._wrapped_title is not None:
+            title = self._stop_capture(self._wrapped_title)
+            if self._wrapped_title_owner is self._wrapped:
+                self._wrapped.title = title
+            self._wrapped_title = self._wrapped_title_owner = None
+        if self._heading_title is not None:
+            title = self._stop_capture(self._heading_title)
+            self._heading_title = None
+            self._heading = _OpenSection(section_id=self._heading_id, title=title, start=self._heading_start)
+
+    def _close_h2(self) -> None:
+        if self._h2 is not None and self._h2.title:
+            self._h2_sections.append(self._h2)
+        self._h2 = None
+
+    def _close_wrapped(self) -> None:
+        if self._wrapped is not None and _append_text_section(self._wrapped_sections, self._wrapped):
+            self._wrapped_spans.append((self._wrapped.start, self._offset))
+        self._wrapped = None
+
+    def _close_heading(self) -> None:
+        if self._heading is not None and _append_text_section(self._heading_sections, self._heading):
+            self._heading_spans.append((self._heading.start, self._offset))
+        self._heading = None
+
+
+def _append_text_section(sections: list[ReadTextSection], section: _OpenSection) -> bool:
+    paragraphs = [paragraph for paragraph in section.paragraphs if _is_reading_paragraph(paragraph)]
+    if not section.title and not paragraphs:
+        return False
+    sections.append(ReadTextSection(section_id=section.section_id, title=section.title, paragraphs=paragraphs))
+    return True
+
+
+def _is_reading_paragraph(paragraph: str) -> bool:
+    return bool(paragraph) and paragraph.lower() != 'back to contents'
+
+
+def _attribute(attrs: str, name: str) -> str | None:
+    for match in _ATTRIBUTE_RE.finditer(attrs):
+        if match.group(1).lower() == name:
+            value = match.group(2)
+            if value is None:
+                return None
+            if value[:1] == value[-1:] and value[:1] in ('"', "'"):
+                value = value[1:-1]
+            return unescape(value) if '&' in value else value
+    return None
 
 
 def _resolve_source_path(book_id: int) -> Path | None:
-    source_path = _resolve_book_text_dir() / f'book-{book_id}.html'
+    source_path = _book_text_path(book_id)
     if not source_path.exists():
         return None
     return source_path
 
 
+def _book_text_path(book_id: int) -> Path:
+    return _resolve_book_text_dir() / f'book-{book_id}.html'
+
+
 def _resolve_book_text_dir() -> Path:
     configured_dir = current_app.config.get('BOOK_TEXT_DIR')
     if configured_dir:
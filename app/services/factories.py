@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import logging
 from datetime import timedelta
 
 from flask import current_app
 from sqlalchemy.orm import Session
 
-from app.extensions import db
+from app.extensions import cache, db
 from app.repositories import AnnotationRepository, BookRepository, ReaderRepository, RefreshTokenRepository, ReviewRepository
-from app.services.auth_service import AuthService
+from app.repositories.book_repository import SEARCH_MODE_FTS, SEARCH_MODE_LIKE, SEARCH_MODE_MEMORY, SEARCH_MODES
+from app.search_index import book_index
+from app.services.auth_service import AuthService, access_token_cache, session_revocations
 from app.services.annotation_service import AnnotationService
+from app.services.book_counts import BookCountCache
 from app.services.book_service import BookService
 from app.services.reader_service import ReaderService
+from app.services.resource_versions import BOOK_LIST_RESOURCE, ResourceVersions
 from app.services.review_service import ReviewService
 from app.services.token_service import TokenService
 
@@ -19,9 +24,42 @@ def _resolve_session(session: Session | None = None) -> Session:
     return session or db.session
 
 
+def build_book_repository(session: Session | None = None) -> BookRepository:
+    active_session = _resolve_session(session)
+    search_mode = str(current_app.config.get('BOOK_SEARCH_MODE', SEARCH_MODE_FTS)).strip().lower()
+    if search_mode not in SEARCH_MODES:
+        logging.warning('Unknown BOOK_SEARCH_MODE=%r. Falling back to %s.', search_mode, SEARCH_MODE_LIKE)
+        search_mode = SEARCH_MODE_LIKE
+    if search_mode == SEARCH_MODE_MEMORY and not cache.is_shared:
+        # A per-process cache cannot carry the index stamp between workers; see BookSearchIndex.init_app.
+        search_mode = SEARCH_MODE_FTS
+    if search_mode == SEARCH_MODE_FTS and active_session.get_bind().dialect.name != 'sqlite':
+        search_mode = SEARCH_MODE_LIKE
+    search_index = book_index if search_mode == SEARCH_MODE_MEMORY else None
+    if search_index is not None and search_index.is_loaded:
+        search_index.sync(build_resource_versions().ensure([BOOK_LIST_RESOURCE])[0])
+    return BookRepository(active_session, search_mode=search_mode, search_index=search_index)
+
+
+def build_resource_versions() -> ResourceVersions:
+    return ResourceVersions(cache)
+
+
+def build_book_count_cache() -> BookCountCache:
+    timeout = int(current_app.config.get('BOOK_COUNT_CACHE_TIMEOUT', 300))
+    return BookCountCache(cache, timeout=timeout)
+
+
 def build_book_service(session: Session | None = None) -> BookService:
     active_session = _resolve_session(session)
-    return BookService(session=active_session, books=BookRepository(active_session))
+    books = build_book_repository(active_session)
+    return BookService(
+        session=active_session,
+        books=books,
+        versions=build_resource_versions(),
+        counts=build_book_count_cache(),
+        search_index=books.search_index,
+    )
 
 
 def build_reader_service(session: Session | None = None) -> ReaderService:
@@ -33,8 +71,9 @@ def build_review_service(session: Session | None = None) -> ReviewService:
     active_session = _resolve_session(session)
     return ReviewService(
         session=active_session,
-        books=BookRepository(active_session),
+        books=build_book_repository(active_session),
         reviews=ReviewRepository(active_session),
+        versions=build_resource_versions(),
     )
 
 
@@ -43,7 +82,8 @@ def build_annotation_service(session: Session | None = None) -> AnnotationServic
     return AnnotationService(
         session=active_session,
         annotations=AnnotationRepository(active_session),
-        books=BookRepository(active_session),
+        books=build_book_repository(active_session),
+        versions=build_resource_versions(),
     )
 
 
@@ -65,4 +105,6 @@ def build_auth_service(session: Session | None = None) -> AuthService:
         readers=ReaderRepository(active_session),
         refresh_tokens=RefreshTokenRepository(active_session),
         token_service=build_token_service(),
+        token_cache=access_token_cache,
+        revocations=session_revocations,
     )
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from app.services.exceptions import BadRequestError
+
+T = TypeVar('T')
+
+
+@dataclass(slots=True)
+class CursorPage(Generic[T]):
+    items: list[T]
+    next_cursor: str | None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple[Any, ...]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise BadRequestError('Invalid pagination cursor.') from error
+
+    if not (
+        isinstance(values, list)
+        and len(values) == len(types)
+        and all(isinstance(value, value_type) for value, value_type in zip(values, types))
+    ):
+        raise BadRequestError('Invalid pagination cursor.')
+    return tuple(values)
+
+
+def id_cursor_page(items: list[T], per_page: int) -> CursorPage[T]:
+    page_items = items[:per_page]
+    next_cursor = encode_cursor([page_items[-1].id]) if len(items) > per_page else None
+    return CursorPage(items=page_items, next_cursor=next_cursor)
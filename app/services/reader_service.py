@@ -43,6 +43,8 @@ class ReaderService:
         reader = self.get_reader_by_email(email)
         if reader is None or not reader.check_password(password):
             return None
+        if self._session.is_modified(reader):
+            self._session.commit()
         return reader
 
     def register_reader(self, data: ReaderRegistrationData) -> Reader:
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+from uuid import uuid4
+
+BOOK_LIST_RESOURCE = 'book-list'
+BOOK_RATINGS_RESOURCE = 'book-ratings'
+
+
+def book_resource(book_id: int) -> str:
+    return f'book:{book_id}'
+
+
+def review_resource(review_id: int) -> str:
+    return f'review:{review_id}'
+
+
+def reader_resource(reader_id: int) -> str:
+    return f'reader:{reader_id}'
+
+
+class ResourceVersions:
+    def __init__(self, cache: Any, *, key_prefix: str = 'api:version:') -> None:
+        self._cache = cache
+        self._key_prefix = key_prefix
+
+    def current(self, resources: Iterable[str]) -> tuple[str, ...] | None:
+        stamps = []
+        for resource in resources:
+            stamp = self._cache.get(self._key(resource))
+            if stamp is None:
+                return None
+            stamps.append(stamp)
+        return tuple(stamps)
+
+    def ensure(self, resources: Iterable[str]) -> tuple[str, ...]:
+        stamps = []
+        for resource in resources:
+            stamp = self._cache.get(self._key(resource))
+            if stamp is None:
+                stamp = uuid4().hex
+                self._cache.set(self._key(resource), stamp, timeout=None)
+            stamps.append(stamp)
+        return tuple(stamps)
+
+    def touch(self, *resources: str) -> tuple[str, ...]:
+        stamps = []
+        for resource in resources:
+            stamp = uuid4().hex
+            self._cache.set(self._key(resource), stamp, timeout=None)
+            stamps.append(stamp)
+        self._cache.invalidate_tags(*resources)
+        return tuple(stamps)
+
+    def _key(self, resource: str) -> str:
+        return f'{self._key_prefix}{resource}'
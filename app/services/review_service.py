@@ -15,19 +15,33 @@ from app.services.exceptions import (
     PermissionDeniedError,
     ValidationError,
 )
+from app.services.pagination import CursorPage, decode_cursor, id_cursor_page
+from app.services.resource_versions import BOOK_LIST_RESOURCE, BOOK_RATINGS_RESOURCE, ResourceVersions, book_resource, review_resource
 
 _UNSET = object()
 
 
 class ReviewService:
-    def __init__(self, session: Session, books: BookRepository, reviews: ReviewRepository) -> None:
+    def __init__(
+        self,
+        session: Session,
+        books: BookRepository,
+        reviews: ReviewRepository,
+        versions: ResourceVersions | None = None,
+    ) -> None:
         self._session = session
         self._books = books
         self._reviews = reviews
+        self._versions = versions
 
     def list_book_reviews_desc(self, book_id: int) -> list[Review]:
         return self._reviews.list_for_book_desc(book_id)
 
+    def list_book_reviews_page(self, book_id: int, *, cursor: str | None = None, per_page: int = 10) -> CursorPage[Review]:
+        before_id = decode_cursor(cursor, int)[0] if cursor else None
+        reviews = self._reviews.list_for_book_page(book_id, before_id=before_id, limit=per_page + 1)
+        return id_cursor_page(reviews, per_page)
+
     def get_review(self, review_id: int) -> Review | None:
         return self._reviews.get_by_id(review_id)
 
@@ -49,7 +63,9 @@ class ReviewService:
             reviewer_id=actor.id,
         )
         self._reviews.add(review)
+        self._books.apply_review_stars(book.id, added=review.stars)
         self._session.commit()
+        self._touch_review(review.id, review.book_id)
         return review
 
     def update_review(
@@ -74,10 +90,13 @@ class ReviewService:
         if not updates:
             raise BadRequestError('No valid fields to update.')
 
+        previous_stars = review.stars
         for key, value in updates.items():
             setattr(review, key, value)
 
+        self._books.apply_review_stars(review.book_id, added=review.stars, removed=previous_stars)
         self._session.commit()
+        self._touch_review(review.id, review.book_id)
         return review
 
     def delete_review(self, actor: Any, review_id: int) -> int:
@@ -89,9 +108,23 @@ class ReviewService:
 
         book_id = review.book_id
         self._reviews.delete(review)
+        self._books.apply_review_stars(book_id, removed=review.stars)
         self._session.commit()
+        self._touch_review(review_id, book_id)
         return book_id
 
+    def rebuild_review_stats(self) -> int:
+        updated = self._books.rebuild_review_stats()
+        self._session.commit()
+        if self._versions is not None:
+            # Every listed rating may have changed, so catalogue pages go too.
+            self._versions.touch(BOOK_LIST_RESOURCE, BOOK_RATINGS_RESOURCE)
+        return updated
+
+    def _touch_review(self, review_id: int, book_id: int) -> None:
+        if self._versions is not None:
+            self._versions.touch(review_resource(review_id), book_resource(book_id), BOOK_RATINGS_RESOURCE)
+
     def _require_accessible_book(self, book_id: int, actor: Any) -> Book:
         book = self._books.get_by_id(book_id, include_hidden=can_view_hidden_books(actor))
         if book is not None:
@@ -33,6 +33,10 @@ class TokenService:
         self._access_token_ttl = access_token_ttl
         self._refresh_token_ttl = refresh_token_ttl
 
+    @property
+    def access_token_ttl(self) -> timedelta:
+        return self._access_token_ttl
+
     def issue_access_token(self, *, user_id: int, role: str, session_id: str) -> tuple[str, datetime]:
         return self._issue_token(
             token_type='access',
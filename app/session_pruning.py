@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from flask import Flask, current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.repositories import JobLeaseRepository
+from app.services.auth_service import SessionPruneResult
+
+SESSION_PRUNE_LEASE = 'refresh-session-prune'
+
+
+def prune_refresh_sessions(*, batch_size: int | None = None, max_sessions_per_reader: int | None = None) -> SessionPruneResult:
+    from app.services.factories import build_auth_service
+
+    if batch_size is None:
+        batch_size = int(current_app.config.get('SESSION_PRUNE_BATCH_SIZE', 500))
+    if max_sessions_per_reader is None:
+        max_sessions_per_reader = int(current_app.config.get('REFRESH_SESSIONS_PER_READER', 10) or 0)
+    result = build_auth_service().prune_sessions(
+        batch_size=max(batch_size, 1),
+        max_sessions_per_reader=max(max_sessions_per_reader, 0),
+    )
+    logging.info(
+        'Pruned refresh sessions: deleted %s in %s batches, revoked %s over the per-reader limit; '
+        'table %s -> %s rows (%s active), %s -> %s bytes.',
+        result.deleted,
+        result.batches,
+        result.revoked_over_limit,
+        result.before['rows'],
+        result.after['rows'],
+        result.after['active'],
+        result.before['bytes'],
+        result.after['bytes'],
+    )
+    return result
+
+
+class SessionPruneScheduler:
+    def __init__(self) -> None:
+        self._app: Flask | None = None
+        self._interval = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._holder = _lease_holder()
+        self._runs = 0
+        self._skipped = 0
+        self._last_result: SessionPruneResult | None = None
+
+    @property
+    def last_result(self) -> SessionPruneResult | None:
+        return self._last_result
+
+    def init_app(self, app: Flask) -> None:
+        self.stop()
+        self._app = app
+        self._interval = max(float(app.config.get('SESSION_PRUNE_INTERVAL', 0) or 0), 0)
+        if self._interval:
+            self.start()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = threading.Event()
+        self._holder = _lease_holder()
+        self._thread = threading.Thread(target=self._loop, args=(self._stop,), name='session-pruner', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def run_once(self) -> SessionPruneResult:
+        with self._require_app().app_context():
+            try:
+                result = prune_refresh_sessions()
+            finally:
+                db.session.remove()
+        self._runs += 1
+        self._last_result = result
+        return result
+
+    def run_if_leased(self) -> SessionPruneResult | None:
+        """Prune unless another worker already holds this interval's lease."""
+        with self._require_app().app_context():
+            try:
+                leased = self._acquire_lease()
+            finally:
+                db.session.remove()
+        if not leased:
+            self._skipped += 1
+            return None
+        return self.run_once()
+
+    def stats(self) -> dict[str, object]:
+        return {
+            'interval': self._interval,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'runs': self._runs,
+            'skipped': self._skipped,
+        }
+
+    def _require_app(self) -> Flask:
+        if self._app is None:
+            raise RuntimeError('SessionPruneScheduler.init_app() must be called before running the job.')
+        return self._app
+
+    def _acquire_lease(self) -> bool:
+        # Every worker runs this loop; the lease row makes sure only one of them prunes per interval.
+        now = datetime.utcnow()
+        until = now + timedelta(seconds=self._interval)
+        leases = JobLeaseRepository(db.session)
+        try:
+            if not leases.take_expired(SESSION_PRUNE_LEASE, self._holder, now=now, until=until):
+                leases.add(SESSION_PRUNE_LEASE, self._holder, until=until)
+            db.session.commit()
+        except IntegrityError:
+            # The row exists and has not expired: another worker holds this interval.
+            db.session.rollback()
+            return False
+        return True
+
+    def _loop(self, stop: threading.Event) -> None:
+        while not stop.wait(self._interval):
+            try:
+                self.run_if_leased()
+            except Exception:
+                logging.exception('Refresh session pruning failed.')
+
+
+def _lease_holder() -> str:
+    return f'{os.getpid()}-{uuid4().hex[:12]}'
+
+
+session_pruner: SessionPruneScheduler = SessionPruneScheduler()
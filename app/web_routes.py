@@ -18,15 +18,16 @@ from app.services.access_policy import (
     is_librarian,
 )
 from app.services.annotation_service import AnnotationService
-from app.services.book_service import BookAlreadyExistsError, BookService, BookWriteData
+from app.services.book_service import BOOK_SORT_CATALOGUE, BOOK_SORTS, BookAlreadyExistsError, BookService, BookWriteData
 from app.services.book_text_service import (
     build_book_text_template,
     load_book_read_content,
     load_book_text_preview,
+    load_book_text_section,
     load_book_text_source,
     save_book_text_source,
 )
-from app.services.exceptions import NotFoundError, PermissionDeniedError
+from app.services.exceptions import NotFoundError, PermissionDeniedError, ServiceUnavailableError
 from app.services.factories import build_annotation_service, build_book_service, build_reader_service, build_review_service
 from app.services.reader_service import ReaderAlreadyExistsError, ReaderRegistrationData, ReaderService
 from app.services.review_service import ReviewService
@@ -112,8 +113,12 @@ def login():
 
     form = LoginForm()
     if form.validate_on_submit():
-        user = _reader_service().authenticate(form.email.data, form.password.data)
-        if user and user.check_password(form.password.data):
+        try:
+            user = _reader_service().authenticate(form.email.data, form.password.data)
+        except ServiceUnavailableError as error:
+            flash(error.message, 'error')
+            return render_template('login.html', form=form), 503
+        if user:
             login_user(user, remember=form.remember.data)
             return redirect(url_for('main.home'))
         flash('Invalid email or password.', 'error')
@@ -136,6 +141,9 @@ def register():
             )
         except ReaderAlreadyExistsError as error:
             flash(str(error), 'error')
+        except ServiceUnavailableError as error:
+            flash(error.message, 'error')
+            return render_template('register.html', title='Register', form=form), 503
         else:
             login_user(reader)
             return redirect(url_for('main.home'))
@@ -154,14 +162,18 @@ def logout():
 def home():
     search_query = request.args.get('search', '').strip()
     page = request.args.get('page', 1, type=int)
+    sort = request.args.get('sort', BOOK_SORT_CATALOGUE).strip().lower()
+    if sort not in BOOK_SORTS:
+        sort = BOOK_SORT_CATALOGUE
     books = _book_service().paginate_books(
         search_query=search_query,
         page=page,
         per_page=10,
         include_hidden=can_view_hidden_books(current_user),
+        sort=sort,
     )
 
-    return render_template('home.html', books=books, search_query=search_query, is_librarian=_is_librarian())
+    return render_template('home.html', books=books, search_query=search_query, sort=sort, is_librarian=_is_librarian())
 
 
 @bp.route('/books/new', methods=['GET', 'POST'])
@@ -359,6 +371,23 @@ def book_read(book_id):
     )
 
 
+@bp.route('/book/<int:book_id>/read/<section_id>')
+@login_required
+def book_read_section(book_id, section_id):
+    try:
+        book = _book_service().get_book_for_actor(book_id, current_user)
+    except PermissionDeniedError:
+        return _render_hidden_book_access_denied()
+    except NotFoundError:
+        return _render_book_not_found(book_id)
+
+    chapter = load_book_text_section(book.id, section_id)
+    if chapter is None:
+        raise NotFound('Book text section not found.')
+
+    return render_template('book_reads/book_section_read.html', book=book, chapter=chapter)
+
+
 @bp.route('/book/<int:book_id>/toggle-hidden', methods=['POST'])
 @login_required
 def toggle_book_hidden(book_id):
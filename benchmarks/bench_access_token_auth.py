@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Reader  # noqa: E402
+from app.repositories import ReaderRepository, RefreshTokenRepository  # noqa: E402
+from app.services.auth_service import AuthService, access_token_cache, session_revocations  # noqa: E402
+from app.services.factories import build_auth_service, build_token_service  # noqa: E402
+
+
+def _per_call(repeat: int, callback) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        callback()
+    return (time.perf_counter() - started_at) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare verifying an access token on every call with the verified-token cache.')
+    parser.add_argument('--repeat', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(tmp_dir) / 'bench.db'}", 'TESTING': True})
+        with app.app_context():
+            reader = Reader(name='Bench', surname='Reader', email='bench@example.com', role='reader')
+            reader.set_password('Secret123!')
+            db.session.add(reader)
+            db.session.commit()
+            _, tokens = build_auth_service().login(email='bench@example.com', password='Secret123!')
+
+            def uncached(revocations=None):
+                return AuthService(
+                    session=db.session,
+                    readers=ReaderRepository(db.session),
+                    refresh_tokens=RefreshTokenRepository(db.session),
+                    token_service=build_token_service(),
+                    revocations=revocations,
+                )
+
+            cached = build_auth_service()
+            cached.authenticate_access_token(tokens.access_token)
+
+            rows = [
+                ('decode + session/reader queries', uncached().authenticate_access_token),
+                ('decode + revocation set + reader query', uncached(session_revocations).authenticate_access_token),
+                ('verified-token cache hit', cached.authenticate_access_token),
+            ]
+            for name, authenticate in rows:
+                seconds = _per_call(args.repeat, lambda: authenticate(tokens.access_token))
+                print(f'{name:<40}{seconds * 1e6:>8.1f} us/call')
+            print(f'token cache: {access_token_cache.stats()}')
+            print(f'revocations: {session_revocations.stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event, select  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Annotation, Book, Reader, Review  # noqa: E402
+from app.services.factories import build_annotation_service, build_book_service, build_review_service  # noqa: E402
+from app.serializers import (  # noqa: E402
+    reader_display_name,
+    serialize_annotation,
+    serialize_book,
+    serialize_book_details,
+    serialize_review,
+)
+
+
+def _seed_book(review_count: int) -> int:
+    book = Book(title=f'Book with {review_count} reviews', author_name='Ann', author_surname='Reed', month='May', year=2020)
+    db.session.add(book)
+    db.session.flush()
+    readers = [
+        {'name': f'Reader{review_count}x{index}', 'surname': 'Bench', 'email': f'r{review_count}x{index}@example.com', 'role': 'reader'}
+        for index in range(review_count)
+    ]
+    db.session.execute(db.insert(Reader), readers)
+    reader_ids = db.session.execute(select(Reader.id).where(Reader.email.like(f'r{review_count}x%'))).scalars().all()
+    db.session.execute(
+        db.insert(Review),
+        [{'text': f'Review {index}', 'stars': 4, 'book_id': book.id, 'reviewer_id': reader_id} for index, reader_id in enumerate(reader_ids)],
+    )
+    db.session.execute(
+        db.insert(Annotation),
+        [{'text': f'Note {index}', 'book_id': book.id, 'reviewer_id': reader_id} for index, reader_id in enumerate(reader_ids[:50])],
+    )
+    db.session.commit()
+    return book.id
+
+
+def _per_query_loader(book_id: int) -> int:
+    # The original path: every review and annotation embedded, reviewer names loaded one by one.
+    book = db.session.execute(select(Book).where(Book.id == book_id)).scalar_one()
+    reviews = db.session.execute(select(Review).filter_by(book_id=book.id).order_by(Review.id.desc())).scalars().all()
+    annotations = db.session.execute(select(Annotation).filter_by(book_id=book.id).order_by(Annotation.id.desc())).scalars().all()
+    payload = serialize_book(book)
+    payload['reviews'] = [{**serialize_review(review), 'reviewer_name': reader_display_name(review.reviewer)} for review in reviews]
+    payload['annotations'] = [
+        {**serialize_annotation(annotation), 'reviewer_name': reader_display_name(annotation.author)} for annotation in annotations
+    ]
+    return len(json.dumps(payload))
+
+
+def _preview_loader(book_id: int) -> int:
+    book = build_book_service().require_book(book_id)
+    preview_size = 10
+    payload = serialize_book_details(
+        book,
+        build_review_service().list_book_reviews_page(book.id, per_page=preview_size),
+        build_annotation_service().list_book_annotations_page(book.id, per_page=preview_size),
+    )
+    return len(json.dumps(payload))
+
+
+def _measure(loader, book_id: int) -> tuple[int, float, int]:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db.session.remove()
+    event.listen(db.engine, 'before_cursor_execute', record)
+    started_at = time.perf_counter()
+    try:
+        payload_bytes = loader(book_id)
+    finally:
+        elapsed = time.perf_counter() - started_at
+        event.remove(db.engine, 'before_cursor_execute', record)
+    db.session.remove()
+    return len(statements), elapsed, payload_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare queries, time and size of the book details payload.')
+    parser.add_argument('--reviews', type=int, nargs='+', default=[10, 100, 500, 5000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_app(
+            {
+                'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(tmp_dir) / 'bench.db'}",
+                'TESTING': True,
+            }
+        )
+        with app.app_context():
+            print(f"{'reviews':>8}{'embed everything, lazy names':>40}{'bounded preview':>40}")
+            for review_count in args.reviews:
+                book_id = _seed_book(review_count)
+                before_queries, before_seconds, before_bytes = _measure(_per_query_loader, book_id)
+                after_queries, after_seconds, after_bytes = _measure(_preview_loader, book_id)
+                print(
+                    f'{review_count:>8}'
+                    f'{before_queries:>8} queries {before_seconds * 1000:>8.1f} ms {before_bytes / 1024:>8.1f} KiB'
+                    f'{after_queries:>8} queries {after_seconds * 1000:>8.1f} ms {after_bytes / 1024:>8.1f} KiB'
+                )
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
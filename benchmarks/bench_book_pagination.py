@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.repositories.book_repository import BookRepository, book_sort_key  # noqa: E402
+from bench_book_search import seed_books  # noqa: E402
+
+
+def _best_of(repeat: int, callback) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        callback()
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare OFFSET and keyset pagination of the book list.')
+    parser.add_argument('--books', type=int, default=100_000)
+    parser.add_argument('--per-page', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_app(
+            {
+                'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(tmp_dir) / 'bench.db'}",
+                'TESTING': True,
+            }
+        )
+        with app.app_context():
+            seed_books(args.books)
+            repository = BookRepository(db.session)
+            last_page = max(args.books // args.per_page, 1)
+
+            print(f'{args.books} books, {args.per_page} per page, best of {args.repeat} runs')
+            print(f"{'page':>8}{'offset + count':>18}{'keyset':>14}")
+            for page in sorted({1, 10, last_page // 10, last_page // 2, last_page}):
+                previous = repository.paginate(page=page - 1, per_page=args.per_page).items if page > 1 else []
+                after = book_sort_key(previous[-1]) if previous else None
+
+                offset_seconds = _best_of(
+                    args.repeat,
+                    lambda: repository.paginate(page=page, per_page=args.per_page, include_hidden=False),
+                )
+                keyset_seconds = _best_of(
+                    args.repeat,
+                    lambda: repository.paginate_after(after=after, per_page=args.per_page, include_hidden=False),
+                )
+                print(f'{page:>8}{offset_seconds * 1000:>15.1f} ms{keyset_seconds * 1000:>11.1f} ms')
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
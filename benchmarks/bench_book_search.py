@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Book  # noqa: E402
+from app.repositories.book_repository import SEARCH_MODE_MEMORY, SEARCH_MODES, BookRepository  # noqa: E402
+from app.search_index import BookSearchIndex  # noqa: E402
+
+MONTHS = ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December')
+WORDS = (
+    'ocean', 'river', 'shadow', 'garden', 'winter', 'silent', 'empire', 'letters', 'journey', 'memory',
+    'stone', 'harbor', 'crimson', 'night', 'forest', 'glass', 'orchard', 'storm', 'lantern', 'island',
+)
+NAMES = ('Ann', 'Bob', 'Cara', 'Dmytro', 'Olena', 'Gabriel', 'Marta', 'Taras', 'Iryna', 'Lesya')
+SURNAMES = ('Reed', 'Stone', 'Márquez', 'Franko', 'Shevchenko', 'Kravets', 'Moroz', 'Bondar', 'Hugo', 'Woolf')
+LANGUAGES = ('English', 'Ukrainian', 'Spanish', 'French', 'German', 'Polish')
+GENRES = ('novel', 'poetry', 'historical fiction', 'essays', 'philosophical novel', 'short stories')
+QUERIES = ('ocean', 'shevch', 'garden 1987', 'crimson lantern', 'historical ukrainian', 'zzz')
+
+
+def seed_books(book_count: int) -> None:
+    rng = random.Random(42)
+    rows = []
+    for index in range(book_count):
+        rows.append(
+            {
+                'title': f'{rng.choice(WORDS).title()} {rng.choice(WORDS)} {index}',
+                'author_name': rng.choice(NAMES),
+                'author_surname': rng.choice(SURNAMES),
+                'original_language': rng.choice(LANGUAGES),
+                'translation_language': rng.choice(LANGUAGES),
+                'first_publication': f'{rng.choice(WORDS).title()} Press',
+                'genre': rng.choice(GENRES),
+                'month': rng.choice(MONTHS),
+                'year': rng.randint(1850, 2024),
+                'cover_image': 'book_covers/default.svg',
+                'is_hidden': False,
+            }
+        )
+    db.session.execute(db.insert(Book), rows)
+    db.session.commit()
+
+
+def _time_query(repository: BookRepository, query: str, repeat: int) -> tuple[float, int]:
+    best = float('inf')
+    total = 0
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        pagination = repository.paginate(query, page=1, per_page=10, include_hidden=False)
+        best = min(best, time.perf_counter() - started_at)
+        total = pagination.total or 0
+    return best, total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare LIKE, FTS5 and in-memory book search on a synthetic catalogue.')
+    parser.add_argument('--books', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_app(
+            {
+                'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(tmp_dir) / 'bench.db'}",
+                'TESTING': True,
+            }
+        )
+        with app.app_context():
+            seed_books(args.books)
+            search_index = BookSearchIndex()
+            started_at = time.perf_counter()
+            search_index.rebuild()
+            index_stats = search_index.stats()
+            print(
+                f"memory index: built in {time.perf_counter() - started_at:.2f} s, "
+                f"{index_stats['tokens']} tokens, ~{index_stats['approx_bytes'] / 1024 / 1024:.1f} MiB"
+            )
+            print(f'{args.books} books, best of {args.repeat} runs, first page + total count')
+            print(f"{'query':<24}" + ''.join(f'{mode:>16}' for mode in SEARCH_MODES) + f"  {'matches':>22}")
+            for query in QUERIES:
+                timings = []
+                totals = []
+                for mode in SEARCH_MODES:
+                    index = search_index if mode == SEARCH_MODE_MEMORY else None
+                    repository = BookRepository(db.session, search_mode=mode, search_index=index)
+                    seconds, total = _time_query(repository, query, args.repeat)
+                    timings.append(f'{seconds * 1000:>13.1f} ms')
+                    totals.append(str(total))
+                print(f'{query!r:<24}' + ''.join(timings) + f"  {' / '.join(totals):>22}")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import book_text_service  # noqa: E402
+from app.services.book_text_service import parse_book_text, write_book_text_artifact  # noqa: E402
+from bench_book_text_parser import build_novel  # noqa: E402
+
+
+def _read_and_parse(source_path: Path):
+    raw = source_path.read_bytes()
+    hashlib.sha256(raw).hexdigest()
+    return parse_book_text(raw.decode('utf-8'))
+
+
+def _read_artifact(source_path: Path):
+    raw = source_path.read_bytes()
+    return book_text_service._read_book_text_artifact(source_path, hashlib.sha256(raw).hexdigest())
+
+
+def _mapped_artifact(source_path: Path):
+    with book_text_service._map_book_text(source_path) as (data, _):
+        return book_text_service._read_book_text_artifact(source_path, hashlib.sha256(data).hexdigest())
+
+
+def _measure(callback, source_path: Path) -> tuple[float, int]:
+    started_at = time.perf_counter()
+    callback(source_path)
+    elapsed = time.perf_counter() - started_at
+    tracemalloc.start()
+    try:
+        callback(source_path)
+        return elapsed, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare peak Python heap of read_bytes/decode and mmap book text loading.')
+    parser.add_argument('--sizes-mb', type=float, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    cases = [
+        ('live parse', _read_and_parse, book_text_service._load_book_text_file, False),
+        ('artifact hit', _read_artifact, _mapped_artifact, True),
+        ('section index', lambda path: parse_book_text(path.read_bytes().decode('utf-8')), book_text_service._build_book_text_index_file, False),
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'size':>8}{'path':>16}{'read + decode':>30}{'mmap + chunks':>30}")
+        for size_mb in args.sizes_mb:
+            source_path = Path(tmp_dir) / f'book-{int(size_mb * 10)}.html'
+            source_path.write_text(build_novel(int(size_mb * 1024 * 1024)), encoding='utf-8')
+            for name, before, after, with_artifact in cases:
+                book_text_service.book_text_artifact_path(source_path).unlink(missing_ok=True)
+                if with_artifact:
+                    write_book_text_artifact(source_path)
+                before_seconds, before_peak = _measure(before, source_path)
+                after_seconds, after_peak = _measure(after, source_path)
+                print(
+                    f'{source_path.stat().st_size / 1024 / 1024:>6.1f}MB{name:>16}'
+                    f'{before_seconds * 1000:>9.0f} ms {before_peak / 1024 / 1024:>7.1f} MiB peak'
+                    f'{after_seconds * 1000:>9.0f} ms {after_peak / 1024 / 1024:>7.1f} MiB peak'
+                )
+    print('Peaks are Python heap (tracemalloc); mapped pages live in the shared page cache and are not counted.')
+
+
+if __name__ == '__main__':
+    main()
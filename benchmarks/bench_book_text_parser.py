@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.book_text_service import parse_book_text  # noqa: E402
+from book_text_regex_parser import parse_book_read_content, parse_book_text_preview  # noqa: E402
+
+BOOK_TEXT_DIR = Path(__file__).resolve().parent.parent / 'app' / 'static' / 'book_text'
+PARAGRAPH = (
+    '<p>On an exceptionally hot evening early in July a young man came out of the garret in which he lodged '
+    'and walked slowly, as though in hesitation, towards the bridge &amp; the <em>canal</em>.</p>'
+)
+
+
+def build_novel(target_bytes: int, *, wrapped: bool = True, paragraphs_per_chapter: int = 40) -> str:
+    chapter_bytes = len(PARAGRAPH) * paragraphs_per_chapter
+    chapter_count = max(target_bytes // chapter_bytes, 1)
+    contents = ''.join(f'<li><a href="#ch{index}">Chapter {index}</a></li>\n' for index in range(1, chapter_count + 1))
+    body = '\n'.join(PARAGRAPH for _ in range(paragraphs_per_chapter))
+    chapters = []
+    for index in range(1, chapter_count + 1):
+        if wrapped:
+            chapters.append(f'<section id="ch{index}">\n<h3>Chapter {index}</h3>\n{body}\n<p><a href="#contents">Back to contents</a></p>\n</section>')
+        else:
+            chapters.append(f'<h3 id="ch{index}">Chapter {index}</h3>\n{body}')
+    return (
+        '<!doctype html>\n<html lang="en">\n<body>\n<main>\n'
+        '<section><h2>Description</h2><p>A synthetic novel for parser benchmarks.</p></section>\n'
+        '<section><h2>Plot &amp; Themes</h2><p>Guilt, poverty and redemption.</p></section>\n'
+        f'<section><h2 id="contents">Contents</h2><ul>\n{contents}</ul></section>\n'
+        '<section><h2>Text</h2>\n' + '\n'.join(chapters) + '\n</section>\n</main>\n</body>\n</html>\n'
+    )
+
+
+def _regex_parse(content: str) -> tuple:
+    return parse_book_text_preview(content), parse_book_read_content(content)
+
+
+def _single_pass_parse(content: str) -> tuple:
+    book_text = parse_book_text(content)
+    return book_text.preview, book_text.read_content
+
+
+def _best_of(repeat: int, parser, content: str) -> tuple[float, tuple]:
+    best = float('inf')
+    result: tuple = ()
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = parser(content)
+        best = min(best, time.perf_counter() - started_at)
+    return best, result
+
+
+def _peak_bytes(parser, content: str) -> int:
+    tracemalloc.start()
+    try:
+        parser(content)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the regex and single-pass book text parsers.')
+    parser.add_argument('--sizes-mb', type=float, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    shipped = sorted(BOOK_TEXT_DIR.glob('*.html'))
+    mismatches = [path.name for path in shipped if _regex_parse(text := path.read_text(encoding='utf-8')) != _single_pass_parse(text)]
+    print(f'shipped texts: {len(shipped) - len(mismatches)}/{len(shipped)} identical' + (f' (differs: {mismatches})' if mismatches else ''))
+
+    print(f"{'layout':>10}{'size':>10}{'chapters':>10}{'regex':>24}{'single pass':>24}{'same':>6}")
+    for wrapped in (True, False):
+        for size_mb in args.sizes_mb:
+            content = build_novel(int(size_mb * 1024 * 1024), wrapped=wrapped)
+            regex_seconds, regex_result = _best_of(args.repeat, _regex_parse, content)
+            single_seconds, single_result = _best_of(args.repeat, _single_pass_parse, content)
+            regex_peak = _peak_bytes(_regex_parse, content)
+            single_peak = _peak_bytes(_single_pass_parse, content)
+            chapters = len(single_result[1].text_sections) if single_result[1] else 0
+            print(
+                f"{'section' if wrapped else 'heading':>10}"
+                f'{len(content) / 1024 / 1024:>8.1f}MB'
+                f'{chapters:>10}'
+                f'{regex_seconds * 1000:>9.0f} ms {regex_peak / 1024 / 1024:>7.1f} MiB peak'
+                f'{single_seconds * 1000:>9.0f} ms {single_peak / 1024 / 1024:>7.1f} MiB peak'
+                f"{'yes' if regex_result == single_result else 'NO':>6}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app  # noqa: E402
+from app.services.book_text_service import book_text_cache, load_book_read_content, load_book_text_section  # noqa: E402
+from bench_book_text_parser import build_novel  # noqa: E402
+
+
+def _peak_bytes(callback) -> int:
+    tracemalloc.start()
+    try:
+        callback()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _best_of(repeat: int, callback) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        callback()
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare loading a whole book text with loading a single chapter.')
+    parser.add_argument('--sizes-mb', type=float, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_app(
+            {
+                'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(tmp_dir) / 'bench.db'}",
+                'TESTING': True,
+                'BOOK_TEXT_DIR': tmp_dir,
+            }
+        )
+        with app.app_context():
+            print(f"{'size':>8}{'chapters':>10}{'whole book (cold)':>28}{'index build':>14}{'one chapter (warm index)':>32}")
+            for book_id, size_mb in enumerate(args.sizes_mb, start=1):
+                content = build_novel(int(size_mb * 1024 * 1024))
+                (Path(tmp_dir) / f'book-{book_id}.html').write_text(content, encoding='utf-8')
+
+                book_text_cache.clear()
+                whole_seconds = _best_of(1, lambda: load_book_read_content(book_id))
+                book_text_cache.clear()
+                whole_peak = _peak_bytes(lambda: load_book_read_content(book_id))
+                sections = load_book_read_content(book_id).text_sections
+                middle_id = sections[len(sections) // 2].section_id
+
+                book_text_cache.clear()
+                index_seconds = _best_of(1, lambda: load_book_text_section(book_id, middle_id))
+                chapter_seconds = _best_of(args.repeat, lambda: load_book_text_section(book_id, middle_id))
+                chapter_peak = _peak_bytes(lambda: load_book_text_section(book_id, middle_id))
+                print(
+                    f'{len(content) / 1024 / 1024:>6.1f}MB'
+                    f'{len(sections):>10}'
+                    f'{whole_seconds * 1000:>10.0f} ms {whole_peak / 1024 / 1024:>7.1f} MiB peak'
+                    f'{index_seconds * 1000:>11.0f} ms'
+                    f'{chapter_seconds * 1000:>12.2f} ms {chapter_peak / 1024:>7.1f} KiB peak'
+                )
+
+
+if __name__ == '__main__':
+    main()
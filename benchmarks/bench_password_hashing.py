@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app.password_hashing import PasswordHasher  # noqa: E402
+from app.services.exceptions import ServiceUnavailableError  # noqa: E402
+
+_PAYLOAD = {'books': [{'id': index, 'title': f'Book {index}', 'tags': ['a', 'b', 'c']} for index in range(200)]}
+
+
+def _other_traffic(stop: threading.Event, latencies: list[float]) -> None:
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        json.dumps(_PAYLOAD)
+        latencies.append(time.perf_counter() - started_at)
+        time.sleep(0.005)
+
+
+def _burst(hasher: PasswordHasher, password_hash: str, logins: int) -> tuple[float, list[float], int]:
+    stop = threading.Event()
+    latencies: list[float] = []
+    rejected = 0
+    lock = threading.Lock()
+
+    def login() -> None:
+        nonlocal rejected
+        try:
+            hasher.verify(password_hash, 'Secret123!')
+        except ServiceUnavailableError:
+            with lock:
+                rejected += 1
+
+    traffic = threading.Thread(target=_other_traffic, args=(stop, latencies))
+    traffic.start()
+    started_at = time.perf_counter()
+    threads = [threading.Thread(target=login) for _ in range(logins)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started_at
+    stop.set()
+    traffic.join()
+    return elapsed, sorted(latencies), rejected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure other-request latency during a burst of password verifications.')
+    parser.add_argument('--logins', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--max-queue', type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    password_hash = generate_password_hash('Secret123!')
+    print(f"{'mode':<24}{'burst':>10}{'other p50':>12}{'other p95':>12}{'other max':>12}{'rejected':>10}")
+    for name, hasher in (
+        ('inline', PasswordHasher()),
+        (f'pool {args.workers}+{args.max_queue}', PasswordHasher(workers=args.workers, max_queue=args.max_queue)),
+        (f'pool {args.workers}+0', PasswordHasher(workers=args.workers, max_queue=0)),
+    ):
+        hasher.verify(password_hash, 'Secret123!')
+        elapsed, latencies, rejected = _burst(hasher, password_hash, args.logins)
+        hasher.shutdown()
+        print(
+            f'{name:<24}{elapsed * 1000:>8.0f}ms'
+            f'{latencies[len(latencies) // 2] * 1000:>10.2f}ms'
+            f'{latencies[int(len(latencies) * 0.95)] * 1000:>10.2f}ms'
+            f'{latencies[-1] * 1000:>10.2f}ms'
+            f'{rejected:>10}'
+        )
+        print(f'  {hasher.stats()["verify"]}')
+
+
+if __name__ == '__main__':
+    main()
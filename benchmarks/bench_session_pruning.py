@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Reader, RefreshTokenSession  # noqa: E402
+from app.repositories import RefreshTokenRepository  # noqa: E402
+from app.services.factories import build_auth_service  # noqa: E402
+
+
+def _seed(rows: int, readers: int) -> list[str]:
+    db.session.execute(
+        insert(Reader),
+        [{'name': 'Bench', 'surname': str(index), 'email': f'bench-{index}@example.com', 'role': 'reader'} for index in range(readers)],
+    )
+    now = datetime.utcnow()
+    sessions = []
+    for index in range(rows):
+        kind = index % 10
+        sessions.append(
+            {
+                'user_id': index % readers + 1,
+                'session_id': f'{index:032x}',
+                'refresh_jti': f'j{index:031x}',
+                'token_hash': f'{index:064x}',
+                'expires_at': now - timedelta(days=1) if kind < 6 else now + timedelta(days=20),
+                'created_at': now - timedelta(days=40),
+                'revoked_at': now - timedelta(days=2) if 6 <= kind < 9 else None,
+            }
+        )
+    db.session.execute(insert(RefreshTokenSession), sessions)
+    db.session.commit()
+    return [row['session_id'] for row in sessions if row['revoked_at'] is None and row['expires_at'] > now]
+
+
+def _lookup_us(session_ids: list[str]) -> float:
+    refresh_tokens = RefreshTokenRepository(db.session)
+    started_at = time.perf_counter()
+    for session_id in session_ids:
+        refresh_tokens.get_by_session_id(session_id)
+    return (time.perf_counter() - started_at) / len(session_ids) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Prune a synthetic refresh_token_session table in batches.')
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--readers', type=int, default=2_000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[500, 5000, 200_000])
+    args = parser.parse_args()
+
+    print(f"{'batch':>8}{'deleted':>10}{'batches':>9}{'total':>10}{'per batch':>12}{'table before':>15}{'after':>12}{'lookup before':>15}{'after':>10}")
+    for batch_size in args.batch_sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(tmp_dir) / 'bench.db'}", 'TESTING': True})
+            with app.app_context():
+                active_ids = _seed(args.rows, args.readers)[:2000]
+                lookup_before = _lookup_us(active_ids)
+                started_at = time.perf_counter()
+                result = build_auth_service().prune_sessions(batch_size=batch_size, max_sessions_per_reader=10)
+                elapsed = time.perf_counter() - started_at
+                lookup_after = _lookup_us(active_ids)
+                print(
+                    f'{batch_size:>8}{result.deleted:>10}{result.batches:>9}'
+                    f'{elapsed * 1000:>8.0f}ms{elapsed * 1000 / max(result.batches, 1):>10.1f}ms'
+                    f"{result.before['bytes'] / 1024 / 1024:>13.1f}MB{result.after['bytes'] / 1024 / 1024:>10.1f}MB"
+                    f'{lookup_before:>13.1f}us{lookup_after:>8.1f}us'
+                )
+                db.session.remove()
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ import pytest
 from app import create_app
 from app.extensions import cache, db
 from app.models import Book, Reader
+from app.services.auth_service import access_token_cache, session_revocations
 
 
 @pytest.fixture(scope='session')
@@ -20,6 +21,7 @@ def app(tmp_path_factory):
             'WTF_CSRF_ENABLED': False,
             'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_file}",
             'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'SESSION_REVOCATION_POLL_INTERVAL': 60,
         }
     )
 
@@ -27,7 +29,10 @@ def app(tmp_path_factory):
         db.session.remove()
         db.drop_all()
         db.create_all()
-        yield flask_app
+
+    yield flask_app
+
+    with flask_app.app_context():
         db.session.remove()
         db.drop_all()
 
@@ -41,6 +46,8 @@ def clean_db(app):
         db.session.commit()
         db.session.remove()
         cache.clear()
+        access_token_cache.clear()
+        session_revocations.clear()
 
     yield
 
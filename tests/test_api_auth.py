@@ -1,7 +1,15 @@
-from sqlalchemy import select
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, select
 
 from app.extensions import db
 from app.models import Book, Reader, Review
+from app.repositories import ReaderRepository, RefreshTokenRepository
+from app.services.auth_service import AccessTokenCache, ApiActor, AuthService, SessionRevocations, access_token_cache, session_revocations
+from app.services.exceptions import AuthenticationRequiredError
+from app.services.factories import build_auth_service, build_token_service
+from app.services.token_service import TokenService
 
 
 def _bearer_headers(access_token: str) -> dict[str, str]:
@@ -197,3 +205,191 @@ def test_api_review_create_validates_json_field_types(client, app, user):
     payload = response.get_json()
     assert payload['error']['message'] == 'Validation failed.'
     assert 'stars' in payload['error']['details']
+
+
+def _count_token_decodes(monkeypatch) -> list[str]:
+    calls: list[str] = []
+    original = TokenService.decode_token
+
+    def counting(self, token, *, expected_type):
+        calls.append(expected_type)
+        return original(self, token, expected_type=expected_type)
+
+    monkeypatch.setattr(TokenService, 'decode_token', counting)
+    return calls
+
+
+def test_api_access_token_is_verified_once_then_served_from_cache(client, user, monkeypatch):
+    tokens = _api_login(client, email=user)
+    calls = _count_token_decodes(monkeypatch)
+
+    for _ in range(3):
+        response = client.get('/api/v1/auth/me', headers=_bearer_headers(tokens['access_token']))
+        assert response.status_code == 200
+        assert response.get_json()['email'] == user
+
+    assert calls == ['access']
+    stats = access_token_cache.stats()
+    assert stats['entries'] == 1
+    assert stats['hits'] == 2
+
+
+def test_api_refresh_reuse_evicts_cached_access_tokens(client, user):
+    tokens = _api_login(client, email=user)
+    assert client.get('/api/v1/auth/me', headers=_bearer_headers(tokens['access_token'])).status_code == 200
+    client.post('/api/v1/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+
+    reuse_response = client.post('/api/v1/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+
+    assert reuse_response.status_code == 401
+    assert access_token_cache.stats()['entries'] == 0
+    assert client.get('/api/v1/auth/me', headers=_bearer_headers(tokens['access_token'])).status_code == 401
+
+
+def test_access_token_cache_expires_entries_and_bounds_size():
+    now = [1000.0]
+    token_cache = AccessTokenCache(max_entries=2, max_age=60, clock=lambda: now[0])
+    first = ApiActor(id=1, role='reader', session_id='s1')
+    second = ApiActor(id=2, role='reader', session_id='s2')
+
+    token_cache.put('token-a', first, expires_at=1030.0, generation=token_cache.generation)
+    token_cache.put('token-b', second, expires_at=5000.0, generation=token_cache.generation)
+    assert token_cache.get('token-a') is first
+
+    now[0] = 1030.0
+    assert token_cache.get('token-a') is None
+    assert token_cache.get('token-b') is second
+
+    now[0] = 1060.0
+    assert token_cache.get('token-b') is None
+
+    for index in range(3):
+        token_cache.put(f'token-{index}', first, expires_at=5000.0, generation=token_cache.generation)
+    stats = token_cache.stats()
+    assert stats['entries'] == 2
+    assert stats['evictions'] == 1
+    assert stats['expired'] == 2
+
+
+def test_access_token_cache_drops_puts_that_race_a_revocation():
+    token_cache = AccessTokenCache(max_entries=8, max_age=0)
+    actor = ApiActor(id=1, role='reader', session_id='s1')
+    generation = token_cache.generation
+
+    token_cache.invalidate_session('s1')
+    token_cache.put('token-a', actor, expires_at=float('inf'), generation=generation)
+    assert token_cache.get('token-a') is None
+
+    token_cache.put('token-a', actor, expires_at=float('inf'), generation=token_cache.generation)
+    token_cache.put('token-b', actor, expires_at=float('inf'), generation=token_cache.generation)
+    assert token_cache.invalidate_session('s1') == 2
+    assert token_cache.get('token-b') is None
+
+
+def _count_statements(app, callback):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        result = callback()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return result, statements
+
+
+def test_access_token_checks_skip_the_session_query_once_revocations_are_synced(app, user):
+    with app.app_context():
+        _, tokens = build_auth_service().login(email=user, password='Secret123!')
+        session_revocations.sync(RefreshTokenRepository(db.session))
+        access_token_cache.clear()
+        active_before = session_revocations.stats()['active']
+
+        actor, statements = _count_statements(app, lambda: build_auth_service().authenticate_access_token(tokens.access_token))
+        assert actor.role == 'reader'
+        assert len(statements) == 1
+        assert 'refresh_token_session' not in statements[0]
+
+        assert session_revocations.stats()['active'] == active_before + 1
+
+
+def test_access_token_checks_fall_back_to_the_database_until_revocations_load(app, user):
+    with app.app_context():
+        _, tokens = build_auth_service().login(email=user, password='Secret123!')
+        revocations = SessionRevocations(poll_interval=0)
+        service = AuthService(
+            session=db.session,
+            readers=ReaderRepository(db.session),
+            refresh_tokens=RefreshTokenRepository(db.session),
+            token_service=build_token_service(),
+            revocations=revocations,
+        )
+
+        _, statements = _count_statements(app, lambda: service.authenticate_access_token(tokens.access_token))
+
+        assert any('refresh_token_session' in statement for statement in statements)
+        assert revocations.stats()['fallbacks'] == 1
+
+
+def test_cached_access_tokens_are_rechecked_in_the_database_while_revocations_are_uncertain(app, user):
+    with app.app_context():
+        _, tokens = build_auth_service().login(email=user, password='Secret123!')
+        other_cache = AccessTokenCache()
+        service = AuthService(
+            session=db.session,
+            readers=ReaderRepository(db.session),
+            refresh_tokens=RefreshTokenRepository(db.session),
+            token_service=build_token_service(),
+            token_cache=other_cache,
+            revocations=SessionRevocations(poll_interval=0),
+        )
+        actor = service.authenticate_access_token(tokens.access_token)
+        assert other_cache.stats()['entries'] == 1
+
+        build_auth_service().revoke_session(actor.session_id)
+
+        with pytest.raises(AuthenticationRequiredError):
+            service.authenticate_access_token(tokens.access_token)
+
+
+def test_revocations_reach_other_workers_through_the_session_table(app, user):
+    now = [0.0]
+    with app.app_context():
+        _, tokens = build_auth_service().login(email=user, password='Secret123!')
+        other_cache = AccessTokenCache(max_age=0)
+        other_worker = SessionRevocations(poll_interval=5, on_revoke=other_cache.invalidate_session, clock=lambda: now[0])
+        service = AuthService(
+            session=db.session,
+            readers=ReaderRepository(db.session),
+            refresh_tokens=RefreshTokenRepository(db.session),
+            token_service=build_token_service(),
+            token_cache=other_cache,
+            revocations=other_worker,
+        )
+        actor = service.authenticate_access_token(tokens.access_token)
+        assert other_cache.stats()['entries'] == 1
+
+        build_auth_service().revoke_session(actor.session_id)
+        now[0] = 4.0
+        assert service.authenticate_access_token(tokens.access_token) == actor
+
+        now[0] = 5.0
+        with pytest.raises(AuthenticationRequiredError):
+            service.authenticate_access_token(tokens.access_token)
+        assert other_cache.stats()['entries'] == 0
+        assert other_worker.stats()['revoked'] == 1
+
+
+def test_session_revocations_forget_sessions_once_their_access_tokens_expired(app):
+    with app.app_context():
+        refresh_tokens = RefreshTokenRepository(db.session)
+        revocations = SessionRevocations(poll_interval=5, window=timedelta(minutes=15), clock=lambda: 0.0)
+        revocations.add('old-session', datetime.utcnow() - timedelta(minutes=16))
+        revocations.add('new-session', datetime.utcnow() - timedelta(minutes=1))
+
+        revocations.sync(refresh_tokens)
+
+        assert revocations.check('old-session', refresh_tokens) is False
+        assert revocations.check('new-session', refresh_tokens) is True
@@ -1,7 +1,16 @@
-from sqlalchemy import select
+import pickle
+import sqlite3
+import threading
+import time
 
-from app.extensions import db
+from sqlalchemy import select, update
+
+from app import api_routes, cache_backends, extensions
+from app.cache_backends import RedisCache, SQLiteCache
+from app.extensions import ApiCache, SimpleTTLCache, cache, db
 from app.models import Book, Reader, Review
+from app.services.auth_service import access_token_cache
+from app.services.resource_versions import ResourceVersions, book_resource
 
 
 def login(client, email='test.user@example.com', password='Secret123!'):
@@ -134,3 +143,612 @@ def test_api_mutation_invalidates_book_details_cache(client, app, user, libraria
     assert after.status_code == 200
     assert after.get_json()['reviews'][0]['text'] == 'Updated from cache invalidation test'
     assert after.headers.get('ETag') != before.headers.get('ETag')
+
+
+def test_simple_ttl_cache_evicts_least_recently_used_entry_over_threshold():
+    bounded = SimpleTTLCache(max_entries=2)
+    bounded.set('a', 1, timeout=60)
+    bounded.set('b', 2, timeout=60)
+    assert bounded.get('a') == 1
+
+    bounded.set('c', 3, timeout=60)
+
+    assert bounded.get('b') is None
+    assert bounded.get('a') == 1
+    assert bounded.get('c') == 3
+    assert bounded.stats()['evictions'] == 1
+    assert bounded.stats()['entries'] == 2
+
+
+def test_simple_ttl_cache_respects_byte_budget():
+    bounded = SimpleTTLCache(max_bytes=4096)
+    for index in range(20):
+        bounded.set(f'key-{index}', {'payload': 'x' * 500}, timeout=60)
+
+    stats = bounded.stats()
+    assert 0 < stats['bytes'] <= 4096
+    assert stats['evictions'] > 0
+    assert bounded.get('key-19') is not None
+    assert bounded.get('key-0') is None
+
+
+def test_simple_ttl_cache_sweep_drops_expired_entries_without_reads(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_backends.time, 'time', lambda: now[0])
+
+    swept = SimpleTTLCache(sweep_interval=10)
+    for index in range(5):
+        swept.set(f'short-{index}', index, timeout=5)
+    swept.set('long', 'kept', timeout=300)
+
+    now[0] += 30
+    swept.set('trigger', 'value', timeout=60)
+
+    stats = swept.stats()
+    assert stats['entries'] == 2
+    assert stats['expirations'] == 5
+    assert swept.get('long') == 'kept'
+
+
+def test_cache_limits_are_configured_from_app_config(app):
+    stats = cache.stats()
+
+    assert stats['max_entries'] == app.config['CACHE_THRESHOLD']
+    assert stats['max_bytes'] == app.config['CACHE_MAX_BYTES']
+
+
+def test_simple_ttl_cache_invalidates_only_tagged_entries():
+    tagged = SimpleTTLCache()
+    tagged.set('book-1', 'one', timeout=60, tags=('book:1', 'book-list'))
+    tagged.set('book-2', 'two', timeout=60, tags=('book:2',))
+    tagged.set('untagged', 'kept', timeout=60)
+
+    assert tagged.invalidate_tags('book:1') == 1
+
+    assert tagged.get('book-1') is None
+    assert tagged.get('book-2') == 'two'
+    assert tagged.get('untagged') == 'kept'
+    assert tagged.invalidate_tags('book-list') == 0
+
+
+def test_api_review_write_keeps_unrelated_cache_entries(client, app, user, librarian):
+    tokens = api_login(client, email=librarian)
+
+    with app.app_context():
+        reader = db.session.scalar(select(Reader).filter_by(email=user))
+        first = Book(title='Tagged One', author_name='T', author_surname='O', month='May', year=2024)
+        second = Book(title='Tagged Two', author_name='T', author_surname='T', month='May', year=2024)
+        db.session.add_all([first, second])
+        db.session.commit()
+        review = Review(text='Tagged review', stars=4, book_id=first.id, reviewer_id=reader.id)
+        db.session.add(review)
+        db.session.commit()
+        first_id, second_id, review_id = first.id, second.id, review.id
+
+    headers = api_headers(tokens['access_token'])
+    assert client.get(f'/api/v1/books/{first_id}', headers=headers).status_code == 200
+    assert client.get(f'/api/v1/books/{second_id}', headers=headers).status_code == 200
+    assert client.get('/api/v1/books?search=Tagged', headers=headers).status_code == 200
+
+    with app.app_context():
+        db.session.add(Book(title='Tagged Three', author_name='T', author_surname='H', month='May', year=2024))
+        db.session.commit()
+
+    patch_response = client.patch(f'/api/v1/reviews/{review_id}', headers=headers, json={'stars': 5})
+    assert patch_response.status_code == 200
+
+    collection = client.get('/api/v1/books?search=Tagged', headers=headers)
+    assert collection.get_json()['pagination']['total'] == 2
+
+    details = client.get(f'/api/v1/books/{first_id}', headers=headers)
+    assert details.get_json()['reviews'][0]['stars'] == 5
+
+
+def test_api_review_write_keeps_list_pages_without_the_reviewed_book(client, app, librarian):
+    tokens = api_login(client, email=librarian)
+
+    with app.app_context():
+        reviewed = Book(title='Reviewed Atlas', author_name='R', author_surname='A', month='May', year=2024)
+        unrelated = Book(title='Quiet Almanac', author_name='Q', author_surname='A', month='May', year=2024)
+        db.session.add_all([reviewed, unrelated])
+        db.session.commit()
+        reviewed_id, unrelated_id = reviewed.id, unrelated.id
+
+    headers = api_headers(tokens['access_token'])
+    assert client.get('/api/v1/books?search=Atlas', headers=headers).get_json()['items'][0]['rating']['count'] == 0
+    assert client.get('/api/v1/books?search=Almanac', headers=headers).status_code == 200
+    assert client.get('/api/v1/books?search=Almanac&sort=rating', headers=headers).status_code == 200
+
+    with app.app_context():
+        db.session.execute(update(Book).where(Book.id == unrelated_id).values(genre='uncached'))
+        db.session.commit()
+
+    review_response = client.post(
+        f'/api/v1/books/{reviewed_id}/reviews',
+        headers=headers,
+        json={'text': 'Listed review', 'stars': 5},
+    )
+    assert review_response.status_code == 201
+
+    assert client.get('/api/v1/books?search=Atlas', headers=headers).get_json()['items'][0]['rating']['count'] == 1
+    unrelated_page = client.get('/api/v1/books?search=Almanac', headers=headers).get_json()
+    assert unrelated_page['items'][0]['genre'] != 'uncached'
+    rating_page = client.get('/api/v1/books?search=Almanac&sort=rating', headers=headers).get_json()
+    assert rating_page['items'][0]['genre'] == 'uncached'
+
+
+def test_api_toggle_hidden_invalidates_book_list_cache(client, app, librarian):
+    tokens = api_login(client, email=librarian)
+
+    with app.app_context():
+        book = Book(title='Toggle Listed', author_name='T', author_surname='L', month='June', year=2024)
+        db.session.add(book)
+        db.session.commit()
+        book_id = book.id
+
+    headers = api_headers(tokens['access_token'])
+    before = client.get('/api/v1/books?search=Toggle', headers=headers)
+    assert before.get_json()['pagination']['total'] == 1
+
+    with app.app_context():
+        db.session.add(Book(title='Toggle Listed 2', author_name='T', author_surname='L', month='June', year=2024))
+        db.session.commit()
+
+    assert client.post(f'/api/v1/books/{book_id}/toggle-hidden', headers=headers).status_code == 200
+
+    after = client.get('/api/v1/books?search=Toggle', headers=headers)
+    assert after.get_json()['pagination']['total'] == 2
+
+
+def test_sqlite_cache_shares_entries_and_invalidations_between_workers(tmp_path):
+    cache_path = tmp_path / 'shared-cache.sqlite3'
+    first_worker = SQLiteCache(cache_path)
+    second_worker = SQLiteCache(cache_path)
+
+    first_worker.set('api:v1:books:7:details:reader', {'id': 7, 'title': 'Shared'}, timeout=60, tags=('book:7',))
+    first_worker.set('api:v1:books:8:details:reader', {'id': 8}, timeout=60, tags=('book:8',))
+
+    assert second_worker.get('api:v1:books:7:details:reader') == {'id': 7, 'title': 'Shared'}
+
+    assert second_worker.invalidate_tags('book:7') == 1
+
+    assert first_worker.get('api:v1:books:7:details:reader') is None
+    assert first_worker.get('api:v1:books:8:details:reader') == {'id': 8}
+
+
+def test_sqlite_cache_expires_and_trims_to_threshold(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_backends.time, 'time', lambda: now[0])
+
+    shared = SQLiteCache(tmp_path / 'bounded-cache.sqlite3', max_entries=3, sweep_interval=1)
+    shared.set('expiring', 'old', timeout=5)
+    for index in range(4):
+        now[0] += 1
+        shared.set(f'key-{index}', index, timeout=60)
+
+    now[0] += 10
+    assert shared.get('expiring') is None
+    shared.sweep()
+
+    stats = shared.stats()
+    assert stats['entries'] == 3
+    assert stats['evictions'] + stats['expirations'] >= 2
+    assert shared.get('key-3') == 3
+
+
+def test_sqlite_cache_evicts_the_least_recently_read_entry(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_backends.time, 'time', lambda: now[0])
+
+    shared = SQLiteCache(tmp_path / 'lru-cache.sqlite3', max_entries=2)
+    shared.set('stamp', 'kept', timeout=None)
+    now[0] += 5
+    shared.set('page', 'dropped', timeout=60)
+    now[0] += 5
+    assert shared.get('stamp') == 'kept'
+    shared.set('details', 'new', timeout=60)
+    shared.sweep()
+
+    assert shared.get('stamp') == 'kept'
+    assert shared.get('page') is None
+    assert shared.get('details') == 'new'
+
+
+def test_sqlite_cache_adds_the_access_column_to_older_cache_files(tmp_path):
+    cache_path = tmp_path / 'old-cache.sqlite3'
+    connection = sqlite3.connect(cache_path)
+    connection.execute(
+        'CREATE TABLE cache_entry (key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, '
+        'expires_at REAL, stored_at REAL NOT NULL)'
+    )
+    connection.execute(
+        'INSERT INTO cache_entry VALUES (?, ?, ?, NULL, ?)',
+        ('old', pickle.dumps('value'), 10, 1000.0),
+    )
+    connection.commit()
+    connection.close()
+
+    shared = SQLiteCache(cache_path, max_entries=10)
+
+    assert shared.get('old') == 'value'
+    shared.set('new', 'value', timeout=60)
+    assert shared.stats()['entries'] == 2
+
+
+def test_create_cache_backend_selects_backend_from_cache_type(tmp_path):
+    simple = cache_backends.create_cache_backend({'CACHE_TYPE': 'SimpleCache'}, instance_path=tmp_path)
+    shared = cache_backends.create_cache_backend({'CACHE_TYPE': 'SQLiteCache'}, instance_path=tmp_path)
+
+    assert isinstance(simple, SimpleTTLCache)
+    assert isinstance(shared, SQLiteCache)
+    assert (tmp_path / 'api-cache.sqlite3').exists()
+
+
+class _LocalRedisStandIn:
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.ttls = {}
+
+    def get(self, name):
+        return self.values.get(name)
+
+    def set(self, name, value, px=None):
+        self.values[name] = value
+
+    def delete(self, *names):
+        removed = 0
+        for name in names:
+            removed += int(self.values.pop(name, None) is not None or self.sets.pop(name, None) is not None)
+        return removed
+
+    def sadd(self, name, value):
+        self.sets.setdefault(name, set()).add(value)
+
+    def smembers(self, name):
+        return set(self.sets.get(name, set()))
+
+    def pttl(self, name):
+        if name not in self.values and name not in self.sets:
+            return -2
+        return self.ttls.get(name, -1)
+
+    def pexpire(self, name, milliseconds):
+        self.ttls[name] = milliseconds
+        return True
+
+    def persist(self, name):
+        return self.ttls.pop(name, None) is not None
+
+    def eval(self, script, numkeys, key, *members):
+        # Stand-in for RedisCache._TRIM_TAG_SCRIPT.
+        missing = {member for member in members if member not in self.values}
+        self.sets[key] -= missing
+        return len(missing)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip('*')
+        return [name for name in [*self.values, *self.sets] if name.startswith(prefix)]
+
+
+def test_redis_cache_invalidates_tags_through_shared_client():
+    client = _LocalRedisStandIn()
+    first_worker = RedisCache(client)
+    second_worker = RedisCache(client)
+
+    first_worker.set('api:v1:reviews:3', {'id': 3}, timeout=60, tags=('review:3',))
+    first_worker.set('api:v1:readers:4', {'id': 4}, timeout=60, tags=('reader:4',))
+
+    assert second_worker.get('api:v1:reviews:3') == {'id': 3}
+    assert second_worker.invalidate_tags('review:3') == 1
+    assert first_worker.get('api:v1:reviews:3') is None
+    assert first_worker.get('api:v1:readers:4') == {'id': 4}
+
+    second_worker.clear()
+    assert client.values == {}
+
+
+def test_redis_cache_keeps_tag_sets_as_long_as_their_entries_and_trims_expired_members():
+    client = _LocalRedisStandIn()
+    shared = RedisCache(client)
+
+    shared.set('page-1', 1, timeout=60, tags=('book-list',))
+    shared.set('page-2', 2, timeout=30, tags=('book-list',))
+    assert client.pttl('flasklibrary:tag:book-list') == 60000
+
+    shared.set('validator', 'v', timeout=None, tags=('book:1',))
+    shared.set('details', 'd', timeout=60, tags=('book:1',))
+    assert client.pttl('flasklibrary:tag:book:1') == -1
+
+    del client.values['flasklibrary:entry:page-1']
+    assert shared.sweep() == 0
+    assert client.sets['flasklibrary:tag:book-list'] == {'flasklibrary:entry:page-2'}
+    assert shared.stats()['trimmed_tag_members'] == 1
+
+
+def test_api_cache_get_or_set_coalesces_concurrent_recomputes():
+    single_flight = ApiCache(SimpleTTLCache())
+    calls = []
+    started = threading.Event()
+
+    def slow_factory():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {'id': 1}
+
+    results = []
+
+    def request_payload():
+        results.append(single_flight.get_or_set('api:v1:books:1:details:reader', slow_factory, timeout=60))
+
+    leader = threading.Thread(target=request_payload)
+    leader.start()
+    started.wait(1)
+    followers = [threading.Thread(target=request_payload) for _ in range(7)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'id': 1}] * 8
+    assert single_flight.stats()['coalesced'] == 7
+    assert single_flight.get('api:v1:books:1:details:reader') == {'id': 1}
+
+
+def test_api_cache_tags_entries_from_computed_value():
+    tagged = ApiCache(SimpleTTLCache())
+
+    def page_tags(value):
+        return [f'book:{book_id}' for book_id in value]
+
+    assert tagged.get_or_set('page', lambda: [1, 2], timeout=60, tags=('book-list',), value_tags=page_tags) == [1, 2]
+    tagged.invalidate_tags('book:3')
+    assert tagged.get('page') == [1, 2]
+    tagged.invalidate_tags('book:2')
+    assert tagged.get('page') is None
+
+    def touching_factory():
+        tagged.invalidate_tags('book:1')
+        return [1]
+
+    stored = []
+    assert tagged.get_or_set('page', touching_factory, timeout=60, value_tags=page_tags, on_store=stored.append) == [1]
+    assert tagged.get('page') is None
+    assert stored == []
+
+    assert tagged.get_or_set('page', lambda: [1], timeout=60, value_tags=page_tags, on_store=stored.append) == [1]
+    assert stored == [[1]]
+
+
+def test_api_cache_refreshes_hot_key_before_expiry(monkeypatch):
+    early = ApiCache(SimpleTTLCache())
+    calls = []
+    now = [1000.0]
+    monkeypatch.setattr(extensions.time, 'time', lambda: now[0])
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.01)
+        return len(calls)
+
+    assert early.get_or_set('hot', factory, timeout=60) == 1
+    assert early.get_or_set('hot', factory, timeout=60) == 1
+
+    now[0] += 59.95
+    monkeypatch.setattr(extensions.random, 'random', lambda: 0.999)
+    assert early.get_or_set('hot', factory, timeout=60) == 2
+    assert early.stats()['early_refreshes'] == 1
+
+
+def test_api_cache_serves_stale_value_and_refreshes_in_background(monkeypatch):
+    swr = ApiCache(SimpleTTLCache())
+    now = [1000.0]
+    monkeypatch.setattr(extensions.time, 'time', lambda: now[0])
+    refreshed = threading.Event()
+    versions = iter(['v1', 'v2'])
+
+    def factory():
+        return next(versions)
+
+    def background_factory():
+        value = factory()
+        refreshed.set()
+        return value
+
+    assert swr.get_or_set('swr', factory, timeout=60, stale_timeout=30, background_factory=background_factory) == 'v1'
+
+    now[0] += 70
+    assert swr.get_or_set('swr', factory, timeout=60, stale_timeout=30, background_factory=background_factory) == 'v1'
+    assert refreshed.wait(2)
+    for _ in range(50):
+        if swr.stats()['in_flight'] == 0:
+            break
+        time.sleep(0.01)
+
+    assert swr.get_or_set('swr', factory, timeout=60, stale_timeout=30, background_factory=background_factory) == 'v2'
+    stats = swr.stats()
+    assert stats['stale_hits'] == 1
+    assert stats['background_refreshes'] == 1
+
+
+def test_api_cache_drops_entries_past_hard_ttl(monkeypatch):
+    swr = ApiCache(SimpleTTLCache())
+    now = [1000.0]
+    monkeypatch.setattr(extensions.time, 'time', lambda: now[0])
+    versions = iter(['v1', 'v2'])
+
+    swr.get_or_set('swr', lambda: next(versions), timeout=60, stale_timeout=30, background_factory=lambda: None)
+    now[0] += 91
+
+    assert swr.get_or_set('swr', lambda: next(versions), timeout=60, stale_timeout=30, background_factory=lambda: None) == 'v2'
+    assert swr.stats()['stale_hits'] == 0
+
+
+def test_api_books_collection_advertises_stale_while_revalidate(client, app, user, monkeypatch):
+    monkeypatch.setitem(app.config, 'CACHE_STALE_WHILE_REVALIDATE', 30)
+    tokens = api_login(client)
+
+    response = client.get('/api/v1/books', headers=api_headers(tokens['access_token']))
+
+    assert response.status_code == 200
+    assert response.headers.get('Cache-Control') == 'private, max-age=60, stale-while-revalidate=30'
+
+
+def test_api_cache_hit_reuses_encoded_body_and_etag(client, app, user, monkeypatch):
+    tokens = api_login(client)
+    with app.app_context():
+        db.session.add(Book(title='Encoded Книга', author_name='E', author_surname='B', month='July', year=2024))
+        db.session.commit()
+
+    encode_calls = []
+    original_encode = api_routes._encode_api_payload
+
+    def counting_encode(payload):
+        encode_calls.append(payload)
+        return original_encode(payload)
+
+    monkeypatch.setattr(api_routes, '_encode_api_payload', counting_encode)
+    headers = api_headers(tokens['access_token'])
+
+    first = client.get('/api/v1/books?search=Encoded', headers=headers)
+    second = client.get('/api/v1/books?search=Encoded', headers=headers)
+    conditional = client.get(
+        '/api/v1/books?search=Encoded',
+        headers={**headers, 'If-None-Match': first.headers['ETag']},
+    )
+
+    assert len(encode_calls) == 1
+    assert first.data == second.data
+    assert first.get_json()['items'][0]['title'] == 'Encoded Книга'
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert conditional.status_code == 304
+
+
+def test_api_book_details_answers_304_from_version_stamp_without_rebuilding(client, app, user, monkeypatch):
+    tokens = api_login(client)
+    with app.app_context():
+        book = Book(title='Stamped Book', author_name='S', author_surname='B', month='August', year=2024)
+        db.session.add(book)
+        db.session.commit()
+        book_id = book.id
+
+    headers = api_headers(tokens['access_token'])
+    first = client.get(f'/api/v1/books/{book_id}', headers=headers)
+    assert first.status_code == 200
+    cache.delete(f'api:v1:books:{book_id}:details:reader')
+
+    def fail_encode(payload):
+        raise AssertionError('the payload should not be rebuilt for validated 304 responses')
+
+    monkeypatch.setattr(api_routes, '_encode_api_payload', fail_encode)
+    conditional = client.get(f'/api/v1/books/{book_id}', headers={**headers, 'If-None-Match': first.headers['ETag']})
+
+    assert conditional.status_code == 304
+    assert conditional.headers['ETag'] == first.headers['ETag']
+    assert conditional.headers['Cache-Control'] == 'private, max-age=60'
+
+
+def test_api_conditional_get_uses_the_current_role_not_the_token_claim(client, app, librarian):
+    tokens = api_login(client, email=librarian)
+    with app.app_context():
+        db.session.add(Book(title='Hidden Draft', author_name='H', author_surname='D', month='May', year=2024, is_hidden=True))
+        db.session.commit()
+
+    headers = api_headers(tokens['access_token'])
+    first = client.get('/api/v1/books', headers=headers)
+    assert [item['title'] for item in first.get_json()['items']] == ['Hidden Draft']
+
+    with app.app_context():
+        db.session.execute(update(Reader).where(Reader.email == librarian).values(role='reader'))
+        db.session.commit()
+    access_token_cache.clear()
+
+    conditional = client.get('/api/v1/books', headers={**headers, 'If-None-Match': first.headers['ETag']})
+
+    assert conditional.status_code == 200
+    assert conditional.get_json()['items'] == []
+
+
+def test_api_validator_outlives_the_payload_only_with_a_shared_cache(client, app, user, tmp_path, monkeypatch):
+    tokens = api_login(client)
+    headers = api_headers(tokens['access_token'])
+    timeouts = {}
+    original_set = cache.set
+
+    def recording_set(key, value, timeout=None, *, tags=()):
+        timeouts[key] = timeout
+        original_set(key, value, timeout, tags=tags)
+
+    monkeypatch.setattr(cache, 'set', recording_set)
+    client.get('/api/v1/books?search=per-process', headers=headers)
+    monkeypatch.setattr(cache, '_backend', SQLiteCache(tmp_path / 'shared-cache.sqlite3'))
+    client.get('/api/v1/books?search=shared', headers=headers)
+
+    validator_timeouts = sorted(timeout for key, timeout in timeouts.items() if key.startswith('api:validator:'))
+    assert validator_timeouts == [60, app.config['CACHE_VALIDATOR_TIMEOUT']]
+
+
+def test_api_skips_the_validator_when_an_item_is_touched_while_building(client, app, user, monkeypatch):
+    tokens = api_login(client)
+    with app.app_context():
+        book = Book(title='Racing Book', author_name='R', author_surname='B', month='May', year=2024)
+        db.session.add(book)
+        db.session.commit()
+        book_id = book.id
+
+    validator_keys = []
+    original_set = cache.set
+    original_item_tags = api_routes._book_item_tags
+
+    def recording_set(key, value, timeout=None, *, tags=()):
+        if key.startswith('api:validator:'):
+            validator_keys.append(key)
+        original_set(key, value, timeout, tags=tags)
+
+    def item_tags_after_concurrent_write(payload):
+        # A review committed after the page query but before the item stamps were read.
+        ResourceVersions(cache).touch(book_resource(book_id))
+        return original_item_tags(payload)
+
+    monkeypatch.setattr(cache, 'set', recording_set)
+    monkeypatch.setattr(api_routes, '_book_item_tags', item_tags_after_concurrent_write)
+    assert client.get('/api/v1/books', headers=api_headers(tokens['access_token'])).status_code == 200
+    assert validator_keys == []
+
+    monkeypatch.setattr(api_routes, '_book_item_tags', original_item_tags)
+    assert client.get('/api/v1/books', headers=api_headers(tokens['access_token'])).status_code == 200
+    assert len(validator_keys) == 1
+
+
+def test_api_conditional_get_still_requires_valid_session(client, app, user):
+    tokens = api_login(client)
+    headers = api_headers(tokens['access_token'])
+    first = client.get('/api/v1/books', headers=headers)
+    etag = first.headers['ETag']
+
+    assert client.get('/api/v1/books', headers={'If-None-Match': etag}).status_code == 401
+
+    assert client.post('/api/v1/auth/logout', headers=headers).status_code == 204
+    assert client.get('/api/v1/books', headers={**headers, 'If-None-Match': etag}).status_code == 401
+
+
+def test_web_review_bumps_book_version_for_api_conditional_get(client, app, user):
+    tokens = api_login(client)
+    with app.app_context():
+        book = Book(title='Web Review Stamp', author_name='W', author_surname='R', month='August', year=2024)
+        db.session.add(book)
+        db.session.commit()
+        book_id = book.id
+
+    headers = api_headers(tokens['access_token'])
+    first = client.get(f'/api/v1/books/{book_id}', headers=headers)
+
+    client.post('/login', data={'email': user, 'password': 'Secret123!'})
+    client.post(f'/book/{book_id}', data={'review-text': 'Posted on the web', 'review-stars': 4, 'review-submit': 'y'})
+
+    conditional = client.get(f'/api/v1/books/{book_id}', headers={**headers, 'If-None-Match': first.headers['ETag']})
+
+    assert conditional.status_code == 200
+    assert conditional.get_json()['reviews'][0]['text'] == 'Posted on the web'
@@ -43,14 +43,16 @@ def _sqlite_path_from_uri(uri):
     return Path(uri.replace('sqlite:///', '', 1)).resolve()
 
 
-def test_create_app_uses_project_instance_path_by_default():
-    from app import create_app
+def test_create_app_uses_project_instance_path_by_default(tmp_path):
+    from app import _default_paths, create_app
 
-    local_app = create_app({'TESTING': True})
+    _, instance_dir, _, db_path = _default_paths()
+    local_app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'smoke.db'}"})
 
-    assert Path(local_app.instance_path).name == 'instance'
-    assert _sqlite_path_from_uri(local_app.config['SQLALCHEMY_DATABASE_URI']).name == 'myDB.db'
-    assert _sqlite_path_from_uri(local_app.config['SQLALCHEMY_DATABASE_URI']).parent.name == 'instance'
+    assert Path(local_app.instance_path).resolve() == instance_dir
+    assert instance_dir.name == 'instance'
+    assert db_path == instance_dir / 'myDB.db'
+    assert _sqlite_path_from_uri(local_app.config['SQLALCHEMY_DATABASE_URI']) == (tmp_path / 'smoke.db').resolve()
 
 
 def test_create_app_supports_instance_and_db_env_overrides(monkeypatch, tmp_path):
@@ -0,0 +1,418 @@
+import pytest
+from sqlalchemy import insert, text, update
+
+from app.cache_backends import SQLiteCache
+from app.db_schema import BOOK_SEARCH_TABLE, ensure_database_schema
+from app.extensions import cache, db
+from app.models import Book
+from app.repositories.book_repository import (
+    SEARCH_MODE_FTS,
+    SEARCH_MODE_LIKE,
+    SEARCH_MODE_MEMORY,
+    BookRepository,
+    book_sort_key,
+)
+from app.search_index import BookSearchIndex
+from app.services.book_counts import normalize_search_query
+from app.services.book_service import BookService, BookWriteData
+from app.services import factories
+from app.services.factories import build_book_repository, build_book_service, build_resource_versions
+from app.services.resource_versions import BOOK_LIST_RESOURCE, ResourceVersions
+
+
+def _add_books(*books):
+    db.session.add_all(books)
+    db.session.commit()
+
+
+def _search_titles(search_query, *, search_mode=SEARCH_MODE_FTS, search_index=None, include_hidden=True):
+    repository = BookRepository(db.session, search_mode=search_mode, search_index=search_index)
+    return [book.title for book in repository.paginate(search_query, per_page=50, include_hidden=include_hidden).items]
+
+
+@pytest.fixture()
+def memory_index(app):
+    index = BookSearchIndex()
+    index.attach()
+    yield index
+    index.detach()
+
+
+class _Librarian:
+    is_authenticated = True
+    role = 'librarian'
+
+
+def _book_data(title, **overrides):
+    values = {
+        'title': title,
+        'author_name': 'Ann',
+        'author_surname': 'Reed',
+        'original_language': 'English',
+        'translation_language': 'Ukrainian',
+        'first_publication': 'Harbor Press',
+        'genre': 'novel',
+        'month': 'May',
+        'year': 2001,
+    }
+    values.update(overrides)
+    return BookWriteData(**values)
+
+
+def test_fts_search_matches_word_prefixes_and_ignores_diacritics(app):
+    with app.app_context():
+        _add_books(
+            Book(title='One Hundred Years of Solitude', author_name='Gabriel', author_surname='García Márquez', month='May', year=1967),
+            Book(title='The Little Prince', author_name='Antoine', author_surname='de Saint-Exupéry', month='April', year=1943),
+        )
+
+        assert _search_titles('marq') == ['One Hundred Years of Solitude']
+        assert _search_titles('saint-exup') == ['The Little Prince']
+        assert _search_titles('194') == ['The Little Prince']
+        assert _search_titles('solit gabr') == ['One Hundred Years of Solitude']
+        assert _search_titles('solit prince') == []
+
+
+def test_like_mode_keeps_substring_semantics(app):
+    with app.app_context():
+        _add_books(Book(title='Gamma Notes', author_name='Cara', author_surname='C', month='March', year=2022))
+
+        assert _search_titles('amm', search_mode=SEARCH_MODE_LIKE) == ['Gamma Notes']
+        assert _search_titles('amm') == []
+
+
+def test_fts_search_orders_by_relevance_before_publication_date(app):
+    with app.app_context():
+        _add_books(
+            Book(title='Ocean Atlas', author_name='Ann', author_surname='Reed', genre='travel', month='May', year=1990),
+            Book(title='Mountain Diary', author_name='Bob', author_surname='Stone', genre='ocean essays', month='June', year=2020),
+        )
+
+        assert _search_titles('ocean') == ['Ocean Atlas', 'Mountain Diary']
+        assert _search_titles('ocean', search_mode=SEARCH_MODE_LIKE) == ['Mountain Diary', 'Ocean Atlas']
+
+
+def test_fts_index_follows_book_updates_and_deletes(app):
+    with app.app_context():
+        book = Book(title='Draft Title', author_name='Ann', author_surname='Reed', month='May', year=2001)
+        _add_books(book)
+
+        book.title = 'Final Title'
+        db.session.commit()
+        assert _search_titles('draft') == []
+        assert _search_titles('final') == ['Final Title']
+
+        db.session.delete(book)
+        db.session.commit()
+        assert _search_titles('final') == []
+
+
+def test_ensure_database_schema_rebuilds_missing_search_index(app):
+    with app.app_context():
+        _add_books(Book(title='Existing Catalogue Book', author_name='Ann', author_surname='Reed', month='May', year=2001))
+        db.session.remove()
+        with db.engine.begin() as connection:
+            connection.execute(text(f'DROP TABLE {BOOK_SEARCH_TABLE}'))
+
+        assert BOOK_SEARCH_TABLE in ensure_database_schema()
+        assert _search_titles('catalog') == ['Existing Catalogue Book']
+        assert ensure_database_schema() == ()
+
+
+def test_book_repository_factory_reads_search_mode_from_config(app):
+    with app.app_context():
+        assert build_book_repository().search_mode == SEARCH_MODE_FTS
+
+        app.config['BOOK_SEARCH_MODE'] = 'like'
+        try:
+            assert build_book_repository().search_mode == SEARCH_MODE_LIKE
+        finally:
+            app.config['BOOK_SEARCH_MODE'] = SEARCH_MODE_FTS
+
+
+def test_memory_index_resolves_prefix_terms_and_pages_in_catalogue_order(app, memory_index):
+    with app.app_context():
+        _add_books(
+            Book(title='Ocean Atlas', author_name='Ann', author_surname='Reed', month='May', year=1990),
+            Book(title='Ocean Letters', author_name='Bob', author_surname='Márquez', month='June', year=2020),
+            Book(title='River Diary', author_name='Cara', author_surname='Stone', month='July', year=2010),
+        )
+        memory_index.rebuild()
+
+        assert _search_titles('oce', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == [
+            'Ocean Letters',
+            'Ocean Atlas',
+        ]
+        assert _search_titles('marq ocean', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == ['Ocean Letters']
+        assert _search_titles('201', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == ['River Diary']
+
+        repository = BookRepository(db.session, search_mode=SEARCH_MODE_MEMORY, search_index=memory_index)
+        second_page = repository.paginate('ocean', page=2, per_page=1)
+        assert [book.title for book in second_page.items] == ['Ocean Atlas']
+        assert second_page.total == 2
+        assert second_page.pages == 2
+
+        stats = memory_index.stats()
+        assert stats['books'] == 3
+        assert stats['tokens'] > 0
+        assert stats['approx_bytes'] > 0
+
+
+def test_memory_index_follows_book_service_commits_and_hidden_flag(app, memory_index):
+    with app.app_context():
+        memory_index.rebuild()
+        service = build_book_service()
+
+        book = service.create_book(_Librarian(), _book_data('Draft Lantern'))
+        assert _search_titles('lantern', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == ['Draft Lantern']
+
+        service.update_book(_Librarian(), book.id, _book_data('Final Orchard'))
+        assert _search_titles('lantern', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == []
+        assert _search_titles('orchard', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == ['Final Orchard']
+
+        service.toggle_book_hidden(_Librarian(), book.id)
+        assert _search_titles('orchard', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index, include_hidden=False) == []
+        assert _search_titles('orchard', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == ['Final Orchard']
+
+        db.session.delete(db.session.get(Book, book.id))
+        db.session.commit()
+        assert _search_titles('orchard', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == []
+
+
+def test_memory_index_never_returns_books_hidden_outside_the_session(app, memory_index):
+    with app.app_context():
+        _add_books(
+            Book(title='Open Meadow', author_name='Ann', author_surname='Reed', month='May', year=2001),
+            Book(title='Quiet Meadow', author_name='Ann', author_surname='Reed', month='May', year=2002),
+        )
+        memory_index.rebuild()
+
+        db.session.execute(update(Book).where(Book.title == 'Quiet Meadow').values(is_hidden=True))
+        db.session.commit()
+
+        repository = BookRepository(db.session, search_mode=SEARCH_MODE_MEMORY, search_index=memory_index)
+        page = repository.paginate('meadow', per_page=50, include_hidden=False)
+        keyset_page = repository.paginate_after('meadow', per_page=50, include_hidden=False)
+
+        assert [book.title for book in page.items] == ['Open Meadow']
+        assert [book.title for book in keyset_page.items] == ['Open Meadow']
+        assert _search_titles('meadow', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == [
+            'Quiet Meadow',
+            'Open Meadow',
+        ]
+
+
+def test_memory_index_rebuilds_when_book_list_stamp_changes_elsewhere(app, memory_index):
+    with app.app_context():
+        versions = build_resource_versions()
+        _add_books(Book(title='Amber Coast', author_name='Ann', author_surname='Reed', month='May', year=2001))
+        memory_index.sync(versions.ensure([BOOK_LIST_RESOURCE])[0])
+
+        db.session.execute(update(Book).values(title='Cobalt Coast'))
+        db.session.commit()
+        memory_index.sync(versions.ensure([BOOK_LIST_RESOURCE])[0])
+        assert _search_titles('cobalt', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == []
+
+        (stamp,) = versions.touch(BOOK_LIST_RESOURCE)
+        memory_index.sync(stamp)
+        assert _search_titles('cobalt', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == ['Cobalt Coast']
+
+
+def _insert_book_elsewhere(title):
+    db.session.execute(insert(Book).values(title=title, author_name='Ann', author_surname='Reed', month='May', year=2001))
+    db.session.commit()
+
+
+def test_memory_search_mode_falls_back_to_sql_with_a_per_process_cache(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'BOOK_SEARCH_MODE', SEARCH_MODE_MEMORY)
+    index = BookSearchIndex()
+    monkeypatch.setattr(factories, 'book_index', index)
+    with app.app_context():
+        index.init_app(app)
+        _insert_book_elsewhere('Zebra Crossing')
+
+        repository = build_book_repository()
+
+        assert not index.is_loaded
+        assert repository.search_mode == SEARCH_MODE_FTS
+        assert [book.title for book in repository.paginate('zebra').items] == ['Zebra Crossing']
+
+
+def test_memory_index_sees_other_workers_writes_through_a_shared_cache(app, tmp_path, monkeypatch):
+    cache_path = tmp_path / 'shared-cache.sqlite3'
+    monkeypatch.setattr(cache, '_backend', SQLiteCache(cache_path))
+    monkeypatch.setitem(app.config, 'BOOK_SEARCH_MODE', SEARCH_MODE_MEMORY)
+    index = BookSearchIndex()
+    monkeypatch.setattr(factories, 'book_index', index)
+    with app.app_context():
+        index.init_app(app)
+        try:
+            _insert_book_elsewhere('Zebra Crossing')
+            ResourceVersions(SQLiteCache(cache_path)).touch(BOOK_LIST_RESOURCE)
+
+            repository = build_book_repository()
+
+            assert index.is_loaded
+            assert repository.search_mode == SEARCH_MODE_MEMORY
+            assert [book.title for book in repository.paginate('zebra').items] == ['Zebra Crossing']
+        finally:
+            index.detach()
+
+
+def test_book_service_writes_keep_memory_index_stamp_without_rebuild(app, memory_index, monkeypatch):
+    with app.app_context():
+        versions = build_resource_versions()
+        memory_index.sync(versions.ensure([BOOK_LIST_RESOURCE])[0])
+        service = BookService(
+            session=db.session,
+            books=BookRepository(db.session, search_mode=SEARCH_MODE_MEMORY, search_index=memory_index),
+            versions=versions,
+            search_index=memory_index,
+        )
+        service.create_book(_Librarian(), _book_data('Stamped Harbor'))
+
+        monkeypatch.setattr(memory_index, 'rebuild', lambda: pytest.fail('index rebuilt after its own write'))
+        memory_index.sync(versions.ensure([BOOK_LIST_RESOURCE])[0])
+        assert _search_titles('harbor', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == ['Stamped Harbor']
+
+
+def test_memory_index_ignores_rolled_back_changes(app, memory_index):
+    with app.app_context():
+        _add_books(Book(title='Stone Garden', author_name='Ann', author_surname='Reed', month='May', year=2001))
+        memory_index.rebuild()
+
+        book = db.session.execute(db.select(Book)).scalar_one()
+        book.title = 'Glass Garden'
+        db.session.flush()
+        db.session.rollback()
+
+        assert _search_titles('glass', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == []
+        assert _search_titles('stone', search_mode=SEARCH_MODE_MEMORY, search_index=memory_index) == ['Stone Garden']
+
+
+@pytest.mark.parametrize('search_mode', [SEARCH_MODE_FTS, SEARCH_MODE_LIKE, SEARCH_MODE_MEMORY])
+def test_paginate_after_continues_from_sort_key_in_every_search_mode(app, memory_index, search_mode):
+    with app.app_context():
+        _add_books(
+            Book(title='Keyset Alpha', author_name='Ann', author_surname='Reed', month='May', year=2020),
+            Book(title='Keyset Beta', author_name='Ann', author_surname='Reed', month='May', year=2020),
+            Book(title='Keyset Gamma', author_name='Ann', author_surname='Reed', month='April', year=2021),
+            Book(title='Keyset Hidden', author_name='Ann', author_surname='Reed', month='June', year=2019, is_hidden=True),
+        )
+        memory_index.rebuild()
+        repository = BookRepository(db.session, search_mode=search_mode, search_index=memory_index)
+
+        first = repository.paginate_after('keyset', per_page=2, include_hidden=False)
+        assert [book.title for book in first.items] == ['Keyset Gamma', 'Keyset Alpha']
+        assert first.has_next
+
+        second = repository.paginate_after('keyset', after=book_sort_key(first.items[-1]), per_page=2, include_hidden=False)
+        assert [book.title for book in second.items] == ['Keyset Beta']
+        assert not second.has_next
+        assert repository.count('keyset', include_hidden=False) == 3
+
+
+def test_book_service_caches_totals_per_scope_and_query_until_books_change(app, monkeypatch):
+    with app.app_context():
+        _add_books(
+            Book(title='Counted Alpha', author_name='Ann', author_surname='Reed', month='May', year=2020),
+            Book(title='Counted Beta', author_name='Ann', author_surname='Reed', month='May', year=2019),
+        )
+        count_calls = []
+        original_count = BookRepository.count
+
+        def counting(self, search_query='', *, include_hidden=True):
+            count_calls.append((search_query, include_hidden))
+            return original_count(self, search_query, include_hidden=include_hidden)
+
+        monkeypatch.setattr(BookRepository, 'count', counting)
+
+        assert build_book_service().paginate_books('counted', per_page=1).total == 2
+        assert build_book_service().paginate_books('  COUNTED ', page=2, per_page=1).total == 2
+        assert build_book_service().paginate_books('counted', per_page=1, include_hidden=False).total == 2
+        assert count_calls == [('counted', True), ('counted', False)]
+
+        assert normalize_search_query('  Counted\tALPHA ') == 'counted alpha'
+        assert normalize_search_query('Ärger') != normalize_search_query('ärger')
+        assert normalize_search_query('straße') != normalize_search_query('STRASSE')
+
+        book = build_book_service().create_book(_Librarian(), _book_data('Counted Gamma'))
+        assert build_book_service().paginate_books('counted', per_page=1).total == 3
+
+        build_book_service().toggle_book_hidden(_Librarian(), book.id)
+        assert build_book_service().paginate_books('counted', per_page=1, include_hidden=False).total == 2
+        assert build_book_service().paginate_books('counted', per_page=1).total == 3
+        assert len(count_calls) == 5
+
+
+def test_book_service_can_skip_count_and_detect_next_page_with_extra_row(app, monkeypatch):
+    with app.app_context():
+        _add_books(
+            Book(title='Limit Alpha', author_name='Ann', author_surname='Reed', month='May', year=2020),
+            Book(title='Limit Beta', author_name='Ann', author_surname='Reed', month='May', year=2019),
+            Book(title='Limit Gamma', author_name='Ann', author_surname='Reed', month='May', year=2018),
+        )
+        monkeypatch.setattr(BookRepository, 'count', lambda *args, **kwargs: pytest.fail('count should be skipped'))
+        service = build_book_service()
+
+        first = service.paginate_books('limit', per_page=2, count=False)
+        assert [book.title for book in first.items] == ['Limit Alpha', 'Limit Beta']
+        assert first.total is None
+        assert first.has_next
+
+        last = service.paginate_books('limit', page=2, per_page=2, count=False)
+        assert [book.title for book in last.items] == ['Limit Gamma']
+        assert not last.has_next
+        assert last.has_prev
+
+
+def test_catalogue_order_is_chronological_by_month(app):
+    with app.app_context():
+        _add_books(
+            Book(title='Month April', author_name='Ann', author_surname='Reed', month='April', year=2020),
+            Book(title='Month February', author_name='Ann', author_surname='Reed', month='February', year=2020),
+            Book(title='Month December', author_name='Ann', author_surname='Reed', month='December', year=2019),
+        )
+        db.session.execute(
+            db.insert(Book),
+            [{'title': 'Month January', 'author_name': 'Ann', 'author_surname': 'Reed', 'month': 'January', 'year': 2020}],
+        )
+        db.session.commit()
+
+        assert _search_titles('', search_mode=SEARCH_MODE_LIKE) == [
+            'Month January',
+            'Month February',
+            'Month April',
+            'Month December',
+        ]
+
+
+@pytest.mark.parametrize('include_hidden', [True, False])
+def test_catalogue_listing_uses_index_order_without_temp_sort(app, include_hidden):
+    with app.app_context():
+        statement = BookRepository(db.session).build_search_statement(include_hidden=include_hidden)
+        statement = statement.order_by(Book.year.desc(), Book.month_number, Book.title, Book.id).limit(10)
+        compiled = statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        plan = ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}')))
+
+        assert 'ix_book_' in plan
+        assert 'TEMP B-TREE' not in plan
+
+
+def test_ensure_database_schema_migrates_month_number_for_existing_rows(app):
+    with app.app_context():
+        _add_books(Book(title='Legacy Row', author_name='Ann', author_surname='Reed', month='March', year=2001))
+        db.session.remove()
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP INDEX ix_book_listing'))
+            connection.execute(text('DROP INDEX ix_book_visible_listing'))
+            connection.execute(text('DROP INDEX ix_book_rating'))
+            connection.execute(text('DROP INDEX ix_book_visible_rating'))
+            connection.execute(text('ALTER TABLE book DROP COLUMN month_number'))
+
+        ensure_database_schema()
+
+        with db.engine.connect() as connection:
+            assert connection.execute(text("SELECT month_number FROM book WHERE title = 'Legacy Row'")).scalar_one() == 3
+            index_names = {row[1] for row in connection.execute(text("PRAGMA index_list('book')"))}
+        assert {'ix_book_listing', 'ix_book_visible_listing'} <= index_names
@@ -1,6 +1,54 @@
+from dataclasses import asdict
+import json
+import os
+from pathlib import Path
+import threading
+import time
+
+import pytest
+
 from app.extensions import db
 from app.models import Book
-from app.services.book_text_service import load_book_read_content, load_book_text_preview
+from app.services import book_text_service
+from app.services.book_text_service import (
+    BookReadContent,
+    BookTextCache,
+    BookTextPreview,
+    InfoSection,
+    ReadContentsItem,
+    ReadTextSection,
+    book_text_artifact_path,
+    book_text_cache,
+    load_book_read_content,
+    load_book_text_preview,
+    load_book_text_section,
+    parse_book_text,
+    save_book_text_source,
+)
+
+SHIPPED_BOOK_TEXTS = sorted((Path(__file__).resolve().parent.parent / 'app' / 'static' / 'book_text').glob('*.html'))
+# Output of the pre-single-pass regex parser for every shipped text.
+EXPECTED_BOOK_TEXTS = json.loads((Path(__file__).resolve().parent / 'data' / 'book_text_expected.json').read_text('utf-8'))
+
+
+@pytest.fixture()
+def book_text_dir(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'BOOK_TEXT_DIR', str(tmp_path))
+    book_text_cache.clear()
+    yield tmp_path
+    book_text_cache.clear()
+
+
+def _count_parses(monkeypatch):
+    calls = []
+    original = book_text_service._parse_book_text_data
+
+    def counting_parser(data):
+        calls.append(len(data))
+        return original(data)
+
+    monkeypatch.setattr(book_text_service, '_parse_book_text_data', counting_parser)
+    return calls
 
 
 def test_load_book_text_preview_for_existing_file(app):
@@ -67,3 +115,334 @@ def test_book_page_shows_preview_blocks(client, app, user):
     assert 'Translation Language:' in html
     assert '1866' in html
     assert 'Plot &amp; Themes:' in html
+
+
+def test_book_text_preview_is_parsed_once_until_the_file_changes(app, book_text_dir, monkeypatch):
+    calls = _count_parses(monkeypatch)
+    before = book_text_cache.stats()
+    source_path = book_text_dir / 'book-7.html'
+    source_path.write_text('<h2>Description</h2><p>First summary.</p></body>', encoding='utf-8')
+
+    with app.app_context():
+        first = load_book_text_preview(7)
+        second = load_book_text_preview(7)
+        assert second is first
+        assert len(calls) == 1
+
+        source_path.write_text('<h2>Description</h2><p>A longer second summary.</p></body>', encoding='utf-8')
+        stat = source_path.stat()
+        os.utime(source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert load_book_text_preview(7).summary == 'A longer second summary.'
+        assert len(calls) == 2
+
+    after = book_text_cache.stats()
+    assert {name: after[name] - before[name] for name in ('hits', 'misses', 'stale')} == {'hits': 1, 'misses': 2, 'stale': 1}
+
+
+def test_save_book_text_source_invalidates_cached_pages(app, book_text_dir):
+    invalidations = book_text_cache.stats()['invalidations']
+    with app.app_context():
+        save_book_text_source(8, '<h2>Description</h2><p>Before save.</p></body>')
+        assert load_book_text_preview(8).summary == 'Before save.'
+        assert load_book_read_content(8) is None
+
+        save_book_text_source(8, '<h2>Description</h2><p>After save.</p></body>')
+        assert load_book_text_preview(8).summary == 'After save.'
+
+    assert book_text_cache.stats()['invalidations'] - invalidations == 1
+
+
+def test_book_text_cache_is_bounded_and_forgets_deleted_files(tmp_path):
+    cache = BookTextCache(max_entries=2)
+    paths = []
+    for index in range(3):
+        path = tmp_path / f'book-{index}.html'
+        path.write_text(f'text {index}', encoding='utf-8')
+        paths.append(path)
+        cache.get_or_load('preview', path, Path.read_text)
+
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['evictions'] == 1
+
+    paths[2].unlink()
+    assert cache.get_or_load('preview', paths[2], Path.read_text) is None
+    assert cache.stats()['entries'] == 1
+
+
+def test_saved_book_text_is_read_back_from_its_artifact(app, book_text_dir, monkeypatch):
+    calls = _count_parses(monkeypatch)
+    with app.app_context():
+        source_path = save_book_text_source(9, '<h2>Description</h2><p>Precompiled.</p><h2>Text</h2><h3 id="c1">One</h3><p>Body</p></main>')
+        assert book_text_artifact_path(source_path).exists()
+        assert len(calls) == 1
+
+        book_text_cache.clear()
+        assert load_book_text_preview(9).summary == 'Precompiled.'
+        assert load_book_read_content(9).text_sections[0].paragraphs == ['Body']
+        assert len(calls) == 1
+
+
+def test_stale_or_broken_artifact_falls_back_to_live_parsing(app, book_text_dir, monkeypatch):
+    with app.app_context():
+        source_path = save_book_text_source(10, '<h2>Description</h2><p>Saved.</p></body>')
+        calls = _count_parses(monkeypatch)
+
+        source_path.write_text('<h2>Description</h2><p>Edited on disk.</p></body>', encoding='utf-8')
+        book_text_cache.clear()
+        assert load_book_text_preview(10).summary == 'Edited on disk.'
+        assert len(calls) == 1
+
+        book_text_artifact_path(source_path).write_text('{"format": 1, "source_sha256": ', encoding='utf-8')
+        book_text_cache.clear()
+        assert load_book_text_preview(10).summary == 'Edited on disk.'
+        assert len(calls) == 2
+
+
+def test_rebuild_book_text_artifacts_command_writes_missing_and_stale_artifacts(app, runner, book_text_dir):
+    for book_id in (1, 2):
+        (book_text_dir / f'book-{book_id}.html').write_text(f'<h2>Description</h2><p>Book {book_id}.</p></body>', encoding='utf-8')
+
+    first = runner.invoke(args=['rebuild-book-text-artifacts'])
+    (book_text_dir / 'book-2.html').write_text('<h2>Description</h2><p>Changed.</p></body>', encoding='utf-8')
+    second = runner.invoke(args=['rebuild-book-text-artifacts'])
+
+    assert first.exit_code == second.exit_code == 0
+    assert 'Rebuilt 2 book text artifacts (0 already up to date).' in first.output
+    assert 'Rebuilt 1 book text artifacts (1 already up to date).' in second.output
+    with app.app_context():
+        assert load_book_text_preview(2).summary == 'Changed.'
+
+
+def _add_crime_and_punishment():
+    db.session.add(
+        Book(id=15, title='Crime and Punishment', author_name='Fyodor', author_surname='Dostoevsky', month='January', year=2024)
+    )
+    db.session.commit()
+
+
+def test_mapped_book_text_is_decoded_in_chunks_without_shifting_sections(app, book_text_dir, monkeypatch):
+    monkeypatch.setattr(book_text_service, '_DECODE_CHUNK_SIZE', 5)
+    content = (
+        '<main><h2>Description</h2><p>Ünïcödé &amp; “quotes” — entities &#8212; split.</p>'
+        '<h2>Contents</h2><ul><li><a href="#één">Één</a></li><li><a href="#twee">Twee ✓</a></li></ul>'
+        '<h2>Text</h2><section id="één"><h3>Één</h3><p>Straße, naïve café.</p></section>'
+        '<section id="twee"><h3>Twee ✓</h3><p>Œuvre &eacute;t&eacute;.</p><p>Back to contents</p></section></main>'
+    )
+    (book_text_dir / 'book-5.html').write_text(content, encoding='utf-8')
+    (book_text_dir / 'book-6.html').write_bytes(b'')
+    expected = parse_book_text(content)
+
+    with app.app_context():
+        assert load_book_text_preview(5) == expected.preview
+        assert load_book_read_content(5) == expected.read_content
+        chapters = [load_book_text_section(5, section.section_id) for section in expected.read_content.text_sections]
+        assert load_book_text_preview(6) is None
+        assert load_book_text_section(6, 'één') is None
+
+    assert [chapter.section for chapter in chapters] == expected.read_content.text_sections
+
+
+def test_saving_book_text_keeps_existing_mappings_readable(app, book_text_dir):
+    long_body = '<h2>Description</h2><p>' + 'Long paragraph. ' * 4096 + '</p></body>'
+    with app.app_context():
+        source_path = save_book_text_source(11, long_body)
+        with book_text_service._map_book_text(source_path) as (data, _):
+            save_book_text_source(11, '<h2>Description</h2><p>Short.</p></body>')
+
+            assert bytes(data[-12:]) == b'</p></body>\n'
+        assert load_book_text_preview(11).summary == 'Short.'
+        assert not list(book_text_dir.glob('*.tmp'))
+
+
+def test_concurrent_book_text_writes_never_leave_a_torn_file(tmp_path):
+    target = tmp_path / 'book-12.json'
+    payloads = [bytes([ord('a') + index]) * (1 << 20) for index in range(4)]
+    errors = []
+
+    def write(payload):
+        try:
+            for _ in range(5):
+                book_text_service._replace_file(target, payload)
+        except OSError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write, args=(payload,)) for payload in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert target.read_bytes() in payloads
+    assert list(tmp_path.iterdir()) == [target]
+
+
+@pytest.mark.parametrize('source_path', SHIPPED_BOOK_TEXTS, ids=lambda path: path.name)
+def test_book_text_sections_match_the_full_read_content(app, source_path):
+    book_id = int(source_path.stem.removeprefix('book-'))
+    with app.app_context():
+        text_sections = load_book_read_content(book_id).text_sections
+        for position, section in enumerate(text_sections):
+            chapter = load_book_text_section(book_id, section.section_id)
+
+            assert chapter.section == section
+            previous_id = chapter.previous_section.target_id if chapter.previous_section else None
+            next_id = chapter.next_section.target_id if chapter.next_section else None
+            assert previous_id == (text_sections[position - 1].section_id if position else None)
+            assert next_id == (text_sections[position + 1].section_id if position + 1 < len(text_sections) else None)
+
+
+def test_book_text_section_index_is_built_once_per_file_version(app, book_text_dir, monkeypatch):
+    builds = []
+    original = book_text_service.build_book_text_index
+
+    def counting_build(raw, signature):
+        builds.append(signature)
+        return original(raw, signature)
+
+    monkeypatch.setattr(book_text_service, 'build_book_text_index', counting_build)
+    source_path = book_text_dir / 'book-4.html'
+    source_path.write_text(
+        '<main><h2>Text</h2><h3 id="één">Één — “begin”</h3><p>Ça va, naïve café.</p>'
+        '<h3 id="two">Two</h3><p>Second ✓</p><p><a href="#contents">Back to contents</a></p></main>',
+        encoding='utf-8',
+    )
+
+    with app.app_context():
+        first = load_book_text_section(4, 'één')
+        second = load_book_text_section(4, 'two')
+        assert load_book_text_section(4, 'missing') is None
+        assert len(builds) == 1
+
+        source_path.write_text('<main><h2>Text</h2><h3 id="two">Two, revised</h3><p>Third</p></main>', encoding='utf-8')
+        stat = source_path.stat()
+        os.utime(source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        revised = load_book_text_section(4, 'two')
+
+    assert (first.section.title, first.section.paragraphs) == ('Één — “begin”', ['Ça va, naïve café.'])
+    assert first.next_section.target_id == 'two'
+    assert (second.section.paragraphs, second.previous_section.title) == (['Second ✓'], 'Één — “begin”')
+    assert (revised.section.title, revised.section.paragraphs, revised.previous_section) == ('Two, revised', ['Third'], None)
+    assert len(builds) == 2
+
+
+def test_book_read_section_page_and_api_serve_one_chapter(client, app, user):
+    with app.app_context():
+        _add_crime_and_punishment()
+
+    client.post('/login', data={'email': user, 'password': 'Secret123!'})
+    page = client.get('/book/15/read/ch2')
+    assert page.status_code == 200
+    html = page.get_data(as_text=True)
+    assert '<h2>Chapter 2</h2>' in html
+    assert '/book/15/read/ch1' in html and '/book/15/read/ch3' in html
+    assert 'Another structured excerpt showing reading flow and navigation.' in html
+    assert 'Prototype excerpt for Crime and Punishment' not in html
+    assert client.get('/book/15/read/missing').status_code == 404
+    assert '/book/15/read/ch1' in client.get('/book/15/read').get_data(as_text=True)
+
+    token = client.post('/api/v1/auth/login', json={'email': user, 'password': 'Secret123!'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    response = client.get('/api/v1/books/15/text/sections/ch1', headers=headers)
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert (payload['book_id'], payload['section_id'], payload['title']) == (15, 'ch1', 'Chapter 1')
+    assert payload['paragraphs'][0].startswith('Prototype excerpt for Crime and Punishment')
+    assert payload['previous_section'] is None
+    assert payload['next_section'] == {'section_id': 'ch2', 'title': 'Chapter 2'}
+    assert [item['section_id'] for item in payload['contents']] == ['ch1', 'ch2', 'ch3']
+    assert client.get('/api/v1/books/15/text/sections/ch1', headers={**headers, 'If-None-Match': f'"{response.get_etag()[0]}"'}).status_code == 304
+    assert client.get('/api/v1/books/15/text/sections/missing', headers=headers).status_code == 404
+    assert client.get('/api/v1/books/15/text/sections/ch1').status_code == 401
+
+
+@pytest.mark.parametrize('source_path', SHIPPED_BOOK_TEXTS, ids=lambda path: path.name)
+def test_single_pass_parser_matches_regex_parser_on_shipped_texts(source_path):
+    book_text = parse_book_text(source_path.read_text(encoding='utf-8'))
+
+    assert {
+        'preview': book_text.preview and asdict(book_text.preview),
+        'read_content': book_text.read_content and asdict(book_text.read_content),
+    } == EXPECTED_BOOK_TEXTS[source_path.name]
+
+
+@pytest.mark.parametrize(
+    ('content', 'preview', 'read_content'),
+    [
+        (
+            '<h1>Title</h1><p>Lead <b>bold</b> &amp; more</p><h2>Plot</h2><p>First</p><p>Second</p></main>',
+            BookTextPreview(summary='Lead bold & more', sections=[InfoSection(title='Plot', body='First')]),
+            None,
+        ),
+        (
+            '<h1>Title</h1><p> </p><h2>Description</h2><p>Fallback</p><h2>Open ended</h2><p>Never closed</p>',
+            BookTextPreview(summary='Fallback', sections=[]),
+            None,
+        ),
+        (
+            '<h2>Contents</h2><ul><li><a href="#a">A</a></li><li><a href="#">Skip</a></li></ul>'
+            '<h2>Text</h2><h3 id="a">A</h3><p>One</p><p><a href="#contents">Back to contents</a></p><h3 id="b">B</h3><p>Two</p></main>',
+            None,
+            BookReadContent(
+                contents=[ReadContentsItem('a', 'A')],
+                text_sections=[ReadTextSection('a', 'A', ['One']), ReadTextSection('b', 'B', ['Two'])],
+            ),
+        ),
+        (
+            '<h2>Text</h2><section id="c1"><h3>C1</h3><p>One<!-- note --><br>line</p></section><section id="c2"></section></body>',
+            None,
+            BookReadContent(contents=[], text_sections=[ReadTextSection('c1', 'C1', ['One line'])]),
+        ),
+        (
+            '<h2><em>Contents</em></h2><ul><li><a href="#x">X</a></li></ul><h2>TEXT</h2><h3 id="x">X</h3><p>T</p>',
+            None,
+            None,
+        ),
+    ],
+)
+def test_single_pass_parser_matches_regex_parser_on_edge_cases(content, preview, read_content):
+    book_text = parse_book_text(content)
+
+    assert book_text.preview == preview
+    assert book_text.read_content == read_content
+
+
+def test_single_pass_parser_follows_html_tokenization_rules():
+    content = (
+        '<H2>Contents</H2><ul><li><a title="x > y" href=\'#c&amp;1\'>C&amp;1</a></li></ul>'
+        '<h2>Text</h2><SECTION ID="c&amp;1"><h3>C1</h3><script>document.write("<p>no</p>")</script>'
+        '<p>x < y &lt; z</p></SECTION>'
+    )
+
+    read_content = parse_book_text(content).read_content
+
+    assert [(item.target_id, item.title) for item in read_content.contents] == [('c&1', 'C&1')]
+    assert [(section.section_id, section.title, section.paragraphs) for section in read_content.text_sections] == [
+        ('c&1', 'C1', ['x < y < z'])
+    ]
+
+
+@pytest.mark.parametrize(
+    'content',
+    ['<a ' + '=""' * 20000, '<a ' + '= ' * 20000, '<a "' * 20000, '<p>' + '<a b="' * 20000 + '>', '<!--' * 20000],
+    ids=['empty-values', 'bare-equals', 'stray-quotes', 'unclosed-values', 'unclosed-comments'],
+)
+def test_single_pass_parser_handles_unclosed_tags_in_linear_time(content):
+    started = time.perf_counter()
+
+    parse_book_text(content)
+    book_text_service._parse_book_text_data(content.encode())
+
+    assert time.perf_counter() - started < 2
+
+
+def test_single_pass_parser_gives_the_same_result_for_any_chunking(monkeypatch):
+    content = (
+        '<h2>Contents</h2><ul><li><a title="x > y" href="#c1">C1</a></li></ul><!-- a > b -->'
+        '<h2>Text</h2><section id="c1"><h3>C1</h3><p>x < y<br/>z</p><p a=\'1\' b = "2>">w</p></section>'
+    )
+    expected = parse_book_text(content)
+    monkeypatch.setattr(book_text_service, '_DECODE_CHUNK_SIZE', 1)
+
+    assert book_text_service._parse_book_text_data(content.encode()) == expected
+    assert expected.read_content.text_sections == [ReadTextSection('c1', 'C1', ['x < y z', 'w'])]
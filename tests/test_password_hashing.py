@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+from sqlalchemy import select
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app import cli
+from app.extensions import db
+from app.models import Reader
+from app.password_hashing import DEFAULT_PASSWORD_HASH_METHOD, PasswordHasher, normalize_password_method, password_hasher
+from app.services.exceptions import ServiceUnavailableError
+
+
+def test_password_hasher_runs_hashing_in_worker_processes():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    try:
+        password_hash = hasher.hash('Secret123!')
+
+        assert check_password_hash(password_hash, 'Secret123!')
+        assert hasher.verify(password_hash, 'Secret123!') is True
+        assert hasher.verify(password_hash, 'wrong-password') is False
+        stats = hasher.stats()
+        assert stats['hash']['count'] == 1
+        assert stats['verify']['count'] == 2
+        assert stats['verify']['p95_ms'] > 0
+        assert stats['in_flight'] == 0
+    finally:
+        hasher.shutdown()
+
+
+def test_password_hasher_rejects_when_queue_is_full(monkeypatch):
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+    started = threading.Barrier(3)
+
+    def blocked_submit(function, *args):
+        started.wait()
+        release.wait()
+        return function(*args)
+
+    monkeypatch.setattr(hasher, '_submit', blocked_submit)
+    threads = [threading.Thread(target=hasher.hash, args=('Secret123!',)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+
+    try:
+        with pytest.raises(ServiceUnavailableError):
+            hasher.verify('unused', 'Secret123!')
+        assert hasher.stats()['in_flight'] == 2
+        assert hasher.stats()['rejected'] == 1
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    assert hasher.stats()['hash']['count'] == 2
+
+
+def _saturate(monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(password_hasher, '_slots', slots)
+
+
+def test_api_login_returns_503_when_password_hashing_is_saturated(client, user, monkeypatch):
+    _saturate(monkeypatch)
+
+    response = client.post('/api/v1/auth/login', json={'email': user, 'password': 'Secret123!'})
+
+    assert response.status_code == 503
+    assert response.get_json()['error']['message'] == 'Too many sign-in attempts right now. Please try again in a moment.'
+
+
+def _store_legacy_hash(app, email):
+    with app.app_context():
+        reader = db.session.scalar(select(Reader).filter_by(email=email))
+        reader.password_hash = generate_password_hash('Secret123!', method='pbkdf2:sha256:1000')
+        db.session.commit()
+        db.session.remove()
+
+
+def _stored_hash(app, email):
+    with app.app_context():
+        password_hash = db.session.scalar(select(Reader.password_hash).filter_by(email=email))
+        db.session.remove()
+        return password_hash
+
+
+def test_password_methods_are_normalized_to_the_stored_prefix():
+    assert normalize_password_method('scrypt') == DEFAULT_PASSWORD_HASH_METHOD
+    assert normalize_password_method('pbkdf2:sha512') == 'pbkdf2:sha512:1000000'
+    assert generate_password_hash('x', method=normalize_password_method('pbkdf2:sha256:1000')).startswith('pbkdf2:sha256:1000$')
+    with pytest.raises(ValueError):
+        normalize_password_method('md5')
+
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000')
+    assert hasher.needs_rehash(generate_password_hash('x', method='pbkdf2:sha256:1000')) is False
+    assert hasher.needs_rehash(generate_password_hash('x', method='pbkdf2:sha256:2000')) is True
+
+
+def test_api_login_rehashes_outdated_password_hash(client, app, user):
+    _store_legacy_hash(app, user)
+    upgraded_before = password_hasher.stats()['upgraded']
+
+    response = client.post('/api/v1/auth/login', json={'email': user, 'password': 'Secret123!'})
+
+    assert response.status_code == 200
+    stored = _stored_hash(app, user)
+    assert stored.startswith(f'{password_hasher.method}$')
+    assert check_password_hash(stored, 'Secret123!')
+    assert password_hasher.stats()['upgraded'] == upgraded_before + 1
+
+
+def _busy_hash(password):
+    raise ServiceUnavailableError('busy')
+
+
+def test_login_keeps_outdated_hash_when_hashing_is_busy(client, app, user, monkeypatch):
+    _store_legacy_hash(app, user)
+    monkeypatch.setattr(password_hasher, 'hash', _busy_hash)
+
+    response = client.post('/api/v1/auth/login', json={'email': user, 'password': 'Secret123!'})
+
+    assert response.status_code == 200
+    assert _stored_hash(app, user).startswith('pbkdf2:sha256:1000$')
+
+
+def test_calibrate_password_hash_suggests_strongest_method_within_budget(runner, monkeypatch):
+    timings = {'scrypt:16384:8:1': 0.05, 'scrypt:32768:8:1': 0.1, 'scrypt:65536:8:1': 0.2, 'scrypt:131072:8:1': 0.4}
+    monkeypatch.setattr(cli, 'measure_verify_seconds', lambda method, samples: timings[method])
+
+    result = runner.invoke(args=['calibrate-password-hash', '--target-ms', '250'])
+
+    assert result.exit_code == 0
+    assert 'scrypt:131072:8:1' in result.output
+    assert 'Suggested: PASSWORD_HASH_METHOD=scrypt:65536:8:1' in result.output
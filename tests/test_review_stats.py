@@ -0,0 +1,139 @@
+from sqlalchemy import select, text
+
+from app.db_schema import ensure_database_schema
+from app.extensions import db
+from app.models import Book, Reader, Review
+from app.repositories.book_repository import BookRepository
+
+
+def api_login(client, email='test.user@example.com', password='Secret123!'):
+    response = client.post('/api/v1/auth/login', json={'email': email, 'password': password})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def _add_book(title, **overrides):
+    values = {'title': title, 'author_name': 'Ann', 'author_surname': 'Reed', 'month': 'May', 'year': 2020}
+    values.update(overrides)
+    book = Book(**values)
+    db.session.add(book)
+    db.session.commit()
+    return book.id
+
+
+def _book_stats(book_id):
+    book = db.session.get(Book, book_id, populate_existing=True)
+    return book.review_count, book.review_star_total, book.rating_average, book.review_histogram
+
+
+def test_review_writes_keep_book_aggregates_in_step(client, app, user, librarian):
+    reader_headers = api_login(client)
+    librarian_headers = api_login(client, email=librarian)
+    with app.app_context():
+        book_id = _add_book('Rated Book')
+
+    first = client.post(f'/api/v1/books/{book_id}/reviews', headers=reader_headers, json={'text': 'Good', 'stars': 4})
+    second = client.post(f'/api/v1/books/{book_id}/reviews', headers=reader_headers, json={'text': 'Fine', 'stars': 2})
+    assert first.status_code == second.status_code == 201
+
+    with app.app_context():
+        assert _book_stats(book_id) == (2, 6, 3.0, {1: 0, 2: 1, 3: 0, 4: 1, 5: 0})
+
+    second_id = second.get_json()['id']
+    assert client.patch(f'/api/v1/reviews/{second_id}', headers=librarian_headers, json={'stars': 5}).status_code == 200
+    with app.app_context():
+        assert _book_stats(book_id) == (2, 9, 4.5, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+    assert client.delete(f"/api/v1/reviews/{first.get_json()['id']}", headers=librarian_headers).status_code == 204
+    with app.app_context():
+        assert _book_stats(book_id) == (1, 5, 5.0, {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+
+    details = client.get(f'/api/v1/books/{book_id}', headers=reader_headers).get_json()
+    assert details['rating'] == {'count': 1, 'average': 5.0, 'histogram': {'1': 0, '2': 0, '3': 0, '4': 0, '5': 1}}
+
+
+def test_api_books_sort_by_rating_and_refresh_after_review(client, app, user):
+    headers = api_login(client)
+    with app.app_context():
+        unrated_id = _add_book('Unrated', year=2024)
+        _add_book('Liked', review_count=3, review_star_total=12, rating_average=4.0, review_stars_4=3)
+        _add_book('Loved', year=1990, review_count=2, review_star_total=10, rating_average=5.0, review_stars_5=2)
+
+    default_order = client.get('/api/v1/books', headers=headers).get_json()
+    assert [item['title'] for item in default_order['items']] == ['Unrated', 'Liked', 'Loved']
+
+    by_rating = client.get('/api/v1/books?sort=rating', headers=headers).get_json()
+    assert by_rating['sort'] == 'rating'
+    assert [item['title'] for item in by_rating['items']] == ['Loved', 'Liked', 'Unrated']
+    assert by_rating['items'][1]['rating'] == {'count': 3, 'average': 4.0, 'histogram': {'1': 0, '2': 0, '3': 0, '4': 3, '5': 0}}
+
+    client.post(f'/api/v1/books/{unrated_id}/reviews', headers=headers, json={'text': 'Perfect', 'stars': 5})
+    refreshed = client.get('/api/v1/books?sort=rating', headers=headers).get_json()
+    assert [item['title'] for item in refreshed['items']] == ['Loved', 'Unrated', 'Liked']
+
+    assert client.get('/api/v1/books?sort=stars', headers=headers).status_code == 400
+    assert client.get('/api/v1/books?sort=rating&cursor=', headers=headers).status_code == 400
+
+
+def test_home_sorts_by_rating_and_shows_average(client, app, user):
+    with app.app_context():
+        _add_book('Quiet Shelf', year=2024)
+        _add_book('Crowd Favourite', year=1990, review_count=2, review_star_total=9, rating_average=4.5, review_stars_4=1, review_stars_5=1)
+
+    client.post('/login', data={'email': user, 'password': 'Secret123!'})
+    page = client.get('/home?sort=rating').get_data(as_text=True)
+
+    assert page.index('Crowd Favourite') < page.index('Quiet Shelf')
+    assert '★ 4.5 (2 reviews)' in page
+
+
+def test_rebuild_review_stats_command_repairs_drift(app, runner, user):
+    with app.app_context():
+        reader_id = db.session.scalar(select(Reader.id).filter_by(email=user))
+        book_id = _add_book('Drifted', review_count=7, review_star_total=7, rating_average=1.0, review_stars_1=7)
+        empty_id = _add_book('Emptied', review_count=1, review_star_total=3, rating_average=3.0, review_stars_3=1)
+        db.session.add_all(
+            [
+                Review(text='One', stars=3, book_id=book_id, reviewer_id=reader_id),
+                Review(text='Two', stars=5, book_id=book_id, reviewer_id=reader_id),
+            ]
+        )
+        db.session.commit()
+
+    result = runner.invoke(args=['rebuild-review-stats'])
+
+    assert result.exit_code == 0
+    assert 'for 1 reviewed books' in result.output
+    with app.app_context():
+        assert _book_stats(book_id) == (2, 8, 4.0, {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+        assert _book_stats(empty_id) == (0, 0, 0.0, {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+
+
+def test_ensure_database_schema_adds_and_fills_review_aggregates(app, user):
+    with app.app_context():
+        reader_id = db.session.scalar(select(Reader.id).filter_by(email=user))
+        book_id = _add_book('Legacy Rated')
+        db.session.add(Review(text='Old review', stars=4, book_id=book_id, reviewer_id=reader_id))
+        db.session.commit()
+        db.session.remove()
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP INDEX ix_book_rating'))
+            connection.execute(text('DROP INDEX ix_book_visible_rating'))
+            for column in ('review_count', 'review_star_total', 'rating_average', 'review_stars_4'):
+                connection.execute(text(f'ALTER TABLE book DROP COLUMN {column}'))
+
+        ensure_database_schema()
+
+        assert _book_stats(book_id) == (1, 4, 4.0, {1: 0, 2: 0, 3: 0, 4: 1, 5: 0})
+
+
+def test_rating_sort_reads_pages_from_the_rating_index(app):
+    with app.app_context():
+        _add_book('Indexed')
+        pagination = BookRepository(db.session).paginate(include_hidden=False, sort='rating', count=False)
+        statement = pagination._query_args['select'].limit(11)
+        compiled = statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+        plan = ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}')))
+
+        assert 'ix_book_visible_rating' in plan
+        assert 'TEMP B-TREE' not in plan
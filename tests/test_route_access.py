@@ -1,7 +1,11 @@
-from sqlalchemy import select
+import threading
+
+from sqlalchemy import event, select
+from werkzeug.security import generate_password_hash
 
 from app.extensions import db
 from app.models import Annotation, Book, Reader, Review
+from app.password_hashing import password_hasher
 
 def login(client, email='test.user@example.com', password='Secret123!'):
     return client.post(
@@ -50,6 +54,35 @@ def test_root_redirects_guest_to_login(client):
     #assert '/login' in response.headers['Location'], f"Expected /login redirect for guest, got {response.headers.get('Location')}"
 
 
+def test_login_returns_503_when_password_hashing_is_saturated(client, user, monkeypatch):
+    ensure_guest(client)
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(password_hasher, '_slots', slots)
+
+    response = login(client)
+
+    assert response.status_code == 503
+    assert b'Too many sign-in attempts right now.' in response.data
+
+
+def test_login_rehashes_outdated_password_hash(client, app, user):
+    ensure_guest(client)
+    with app.app_context():
+        reader = db.session.scalar(select(Reader).filter_by(email=user))
+        reader.password_hash = generate_password_hash('Secret123!', method='pbkdf2:sha256:1000')
+        db.session.commit()
+        db.session.remove()
+
+    response = login(client)
+
+    assert response.status_code == 302
+    assert '/home' in response.headers['Location']
+    with app.app_context():
+        stored = db.session.scalar(select(Reader.password_hash).filter_by(email=user))
+        assert stored.startswith(f'{password_hasher.method}$')
+
+
 def test_root_redirects_authenticated_user_to_home(client, user):
     login_response = login(client)
     assert login_response.status_code == 302
@@ -374,8 +407,90 @@ def test_api_book_data_returns_json_payload(client, app, user):
     assert payload['reviews'][0]['stars'] == 5
     assert len(payload['annotations']) == 1
     assert payload['annotations'][0]['text'] == 'API annotation'
+    assert payload['reviews'][0]['reviewer_name'] == 'Test User'
+    assert payload['annotations'][0]['author_name'] == 'Test User'
 
 
+def test_api_book_data_query_count_does_not_grow_with_reviews(client, app, user):
+    tokens = api_login(client, email=user, password='Secret123!')
+    assert client.get('/api/v1/auth/me', headers=api_headers(tokens['access_token'])).status_code == 200
+
+    def create_book(title, review_count):
+        with app.app_context():
+            book = Book(title=title, author_name='A', author_surname='B', month='May', year=2024)
+            db.session.add(book)
+            db.session.flush()
+            for index in range(review_count):
+                reviewer = Reader(name=f'{title} {index}', surname='Reviewer', email=f'{title}-{index}@example.com'.replace(' ', '-'))
+                db.session.add(reviewer)
+                db.session.flush()
+                db.session.add(Review(text=f'Review {index}', stars=4, book_id=book.id, reviewer_id=reviewer.id))
+                db.session.add(Annotation(text=f'Note {index}', book_id=book.id, reviewer_id=reviewer.id))
+            db.session.commit()
+            return book.id
+
+    def count_queries(book_id):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            response = client.get(f'/api/v1/books/{book_id}', headers=api_headers(tokens['access_token']))
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        assert response.status_code == 200
+        return len(statements), response.get_json()
+
+    small_count, _ = count_queries(create_book('Few Reviews', 2))
+    large_count, payload = count_queries(create_book('Many Reviews', 40))
+
+    assert large_count == small_count
+    assert len(payload['reviews']) == app.config['BOOK_DETAILS_PREVIEW_SIZE']
+    assert payload['reviews'][0]['reviewer_name'] == 'Many Reviews 39 Reviewer'
+    assert payload['reviews_next_cursor'] is not None
+    assert payload['annotations_next_cursor'] is not None
+
+
+def test_api_book_reviews_and_annotations_walk_newest_first_by_cursor(client, app, user, librarian):
+    tokens = api_login(client, email=user, password='Secret123!')
+    headers = api_headers(tokens['access_token'])
+
+    with app.app_context():
+        reader = db.session.scalar(select(Reader).filter_by(email=user))
+        book = Book(title='Long Thread', author_name='A', author_surname='B', month='May', year=2024)
+        hidden = Book(title='Hidden Thread', author_name='A', author_surname='B', month='May', year=2024, is_hidden=True)
+        db.session.add_all([book, hidden])
+        db.session.flush()
+        db.session.add_all([Review(text=f'Review {index}', stars=3, book_id=book.id, reviewer_id=reader.id) for index in range(23)])
+        db.session.add_all([Annotation(text=f'Note {index}', book_id=book.id, reviewer_id=reader.id) for index in range(3)])
+        db.session.commit()
+        book_id, hidden_id = book.id, hidden.id
+
+    texts = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(f'/api/v1/books/{book_id}/reviews?per_page=10&cursor={cursor}', headers=headers)
+        assert response.status_code == 200
+        payload = response.get_json()
+        texts.extend(item['text'] for item in payload['items'])
+        assert all(item['reviewer_name'] == 'Test User' for item in payload['items'])
+        cursor = payload['pagination']['next_cursor']
+
+    assert texts == [f'Review {index}' for index in reversed(range(23))]
+
+    annotations = client.get(f'/api/v1/books/{book_id}/annotations', headers=headers).get_json()
+    assert [item['text'] for item in annotations['items']] == ['Note 2', 'Note 1', 'Note 0']
+    assert all(item['author_name'] == 'Test User' for item in annotations['items'])
+    assert annotations['pagination']['has_next'] is False
+
+    assert client.get(f'/api/v1/books/{book_id}/reviews?cursor=not-a-cursor', headers=headers).status_code == 400
+    assert client.get(f'/api/v1/books/{hidden_id}/reviews', headers=headers).status_code == 403
+    assert client.get('/api/v1/books/999999/annotations', headers=headers).status_code == 404
+
 
 def test_api_book_data_requires_authentication(client):
     response = client.get('/api/v1/books/999999', follow_redirects=False)
@@ -608,6 +723,90 @@ def test_api_books_collection_returns_paginated_items(client, app, user):
 
 
 
+def test_api_books_collection_cursor_mode_walks_all_pages_without_count(client, app, user):
+    tokens = api_login(client, email=user, password='Secret123!')
+
+    with app.app_context():
+        db.session.add_all(
+            [
+                Book(title='Cursor Alpha', author_name='A', author_surname='A', month='May', year=2024),
+                Book(title='Cursor Beta', author_name='B', author_surname='B', month='May', year=2024),
+                Book(title='Cursor Gamma', author_name='C', author_surname='C', month='April', year=2024),
+                Book(title='Cursor Delta', author_name='D', author_surname='D', month='March', year=2023),
+                Book(title='Cursor Hidden', author_name='E', author_surname='E', month='March', year=2023, is_hidden=True),
+            ]
+        )
+        db.session.commit()
+
+    titles = []
+    cursor = ''
+    for _ in range(5):
+        response = client.get(
+            '/api/v1/books',
+            query_string={'search': 'Cursor', 'per_page': 2, 'cursor': cursor},
+            headers=api_headers(tokens['access_token']),
+            follow_redirects=False,
+        )
+        assert response.status_code == 200
+        payload = response.get_json()
+        assert payload['pagination']['total'] is None
+        assert 'page' not in payload['pagination']
+        titles.extend(item['title'] for item in payload['items'])
+        cursor = payload['pagination']['next_cursor']
+        assert payload['pagination']['has_next'] is (cursor is not None)
+        if cursor is None:
+            break
+
+    assert titles == ['Cursor Gamma', 'Cursor Alpha', 'Cursor Beta', 'Cursor Delta']
+
+    response = client.get(
+        '/api/v1/books',
+        query_string={'search': 'Cursor', 'per_page': 2, 'cursor': '', 'include_total': 'true'},
+        headers=api_headers(tokens['access_token']),
+        follow_redirects=False,
+    )
+    assert response.get_json()['pagination']['total'] == 4
+
+
+def test_api_books_collection_can_skip_total_count(client, app, user):
+    tokens = api_login(client, email=user, password='Secret123!')
+
+    with app.app_context():
+        db.session.add_all(
+            [
+                Book(title='Uncounted Alpha', author_name='A', author_surname='A', month='May', year=2024),
+                Book(title='Uncounted Beta', author_name='B', author_surname='B', month='May', year=2023),
+            ]
+        )
+        db.session.commit()
+
+    response = client.get(
+        '/api/v1/books?search=Uncounted&page=1&per_page=1&count=false',
+        headers=api_headers(tokens['access_token']),
+        follow_redirects=False,
+    )
+
+    assert response.status_code == 200
+    pagination = response.get_json()['pagination']
+    assert pagination['total'] is None
+    assert pagination['pages'] is None
+    assert pagination['has_next'] is True
+    assert pagination['has_prev'] is False
+
+
+def test_api_books_collection_rejects_invalid_cursor(client, user):
+    tokens = api_login(client, email=user, password='Secret123!')
+
+    response = client.get(
+        '/api/v1/books?cursor=not-a-cursor',
+        headers=api_headers(tokens['access_token']),
+        follow_redirects=False,
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()['error']['message'] == 'Invalid pagination cursor.'
+
+
 def test_api_books_collection_requires_authentication(client):
     response = client.get('/api/v1/books?search=Api&page=1&per_page=2', follow_redirects=False)
 
@@ -0,0 +1,135 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Reader, RefreshTokenSession
+from app.repositories import RefreshTokenRepository
+from app.services.auth_service import access_token_cache, session_revocations
+from app.services.factories import build_auth_service
+from app.session_pruning import SessionPruneScheduler
+
+
+def _add_session(reader_id, name, *, expires_in=timedelta(days=1), revoked_ago=None, last_used_ago=None):
+    now = datetime.utcnow()
+    db.session.add(
+        RefreshTokenSession(
+            user_id=reader_id,
+            session_id=f'session-{name}',
+            refresh_jti=f'jti-{name}',
+            token_hash=f'hash-{name}',
+            expires_at=now + expires_in,
+            created_at=now - timedelta(days=2),
+            last_used_at=now - last_used_ago if last_used_ago is not None else None,
+            revoked_at=now - revoked_ago if revoked_ago is not None else None,
+        )
+    )
+
+
+def _seed_sessions(app, email):
+    with app.app_context():
+        reader_id = db.session.scalar(select(Reader.id).filter_by(email=email))
+        _add_session(reader_id, 'expired', expires_in=timedelta(minutes=-1))
+        _add_session(reader_id, 'revoked-old', revoked_ago=timedelta(hours=1))
+        _add_session(reader_id, 'revoked-recent', revoked_ago=timedelta(minutes=1))
+        for index in range(5):
+            _add_session(reader_id, f'active-{index}', last_used_ago=timedelta(minutes=10 - index))
+        db.session.commit()
+        db.session.remove()
+
+
+def _session_ids(app):
+    with app.app_context():
+        rows = db.session.execute(select(RefreshTokenSession.session_id, RefreshTokenSession.revoked_at)).all()
+        db.session.remove()
+    return {session_id: revoked_at is not None for session_id, revoked_at in rows}
+
+
+def test_prune_sessions_deletes_in_batches_and_caps_active_sessions(app, user):
+    _seed_sessions(app, user)
+
+    with app.app_context():
+        result = build_auth_service().prune_sessions(batch_size=1, max_sessions_per_reader=3)
+        assert session_revocations.check('session-active-0', RefreshTokenRepository(db.session)) is True
+
+    assert result.deleted == 2
+    assert result.batches == 2
+    assert result.revoked_over_limit == 2
+    assert result.before['rows'] == 8
+    assert result.before['expired'] == 1
+    assert result.after['rows'] == 6
+    assert result.after['active'] == 3
+    assert _session_ids(app) == {
+        'session-revoked-recent': True,
+        'session-active-0': True,
+        'session-active-1': True,
+        'session-active-2': False,
+        'session-active-3': False,
+        'session-active-4': False,
+    }
+
+
+def test_prune_sessions_keeps_revocations_visible_to_fresh_workers(app, user):
+    _seed_sessions(app, user)
+
+    with app.app_context():
+        build_auth_service().prune_sessions(batch_size=500, max_sessions_per_reader=0)
+        session_revocations.clear()
+        access_token_cache.clear()
+        session_revocations.sync(RefreshTokenRepository(db.session))
+
+    assert session_revocations.stats()['revoked'] == 1
+
+
+def test_prune_refresh_sessions_command_reports_table_size(runner, app, user):
+    _seed_sessions(app, user)
+
+    result = runner.invoke(args=['prune-refresh-sessions', '--batch-size', '10', '--max-per-reader', '4'])
+
+    assert result.exit_code == 0
+    assert 'Deleted 2 refresh sessions in 1 batches; revoked 1 over the per-reader limit.' in result.output
+    assert 'Table before: 8 rows (5 active, 2 revoked, 1 expired' in result.output
+    assert 'Table after: 6 rows (4 active, 2 revoked, 0 expired' in result.output
+
+
+def test_session_prune_scheduler_runs_in_the_background(app, user):
+    _seed_sessions(app, user)
+    scheduler = SessionPruneScheduler()
+    app.config['SESSION_PRUNE_INTERVAL'] = 0.05
+    try:
+        scheduler.init_app(app)
+        deadline = time.monotonic() + 5
+        while scheduler.last_result is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.stop()
+        app.config['SESSION_PRUNE_INTERVAL'] = 0
+
+    assert scheduler.last_result is not None
+    assert scheduler.last_result.deleted == 2
+    assert scheduler.stats()['running'] is False
+
+
+def test_only_one_worker_prunes_per_interval(app, user):
+    _seed_sessions(app, user)
+    workers = [SessionPruneScheduler(), SessionPruneScheduler()]
+    app.config['SESSION_PRUNE_INTERVAL'] = 60
+    try:
+        for worker in workers:
+            worker.init_app(app)
+        results = [worker.run_if_leased() for worker in workers]
+    finally:
+        for worker in workers:
+            worker.stop()
+        app.config['SESSION_PRUNE_INTERVAL'] = 0
+
+    assert results[0] is not None and results[0].deleted == 2
+    assert results[1] is None
+    assert [worker.stats()['skipped'] for worker in workers] == [0, 1]
+
+
+def test_session_prune_scheduler_requires_an_app():
+    with pytest.raises(RuntimeError):
+        SessionPruneScheduler().run_once()